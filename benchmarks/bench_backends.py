@@ -0,0 +1,33 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark: JSON backends
+------------------------
+
+Times ``to_json`` with each registered JSON backend, pretty-printed and
+compact.
+
+    python benchmarks/bench_backends.py [rows] [columns]
+"""
+from __future__ import print_function
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from vincent import Line
+from vincent import encoder
+
+
+def main(rows=100000, columns=5):
+    chart = Line(pd.DataFrame(np.random.randn(rows, columns)))
+    for pretty_print in [True, False]:
+        for backend in sorted(encoder._backends):
+            start = time.time()
+            chart.to_json(pretty_print=pretty_print, backend=backend)
+            print('{0:<11} pretty_print={1!s:<5} {2:.2f}s'.format(
+                backend, pretty_print, time.time() - start))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
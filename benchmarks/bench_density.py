@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark: 2D density charts
+----------------------------
+
+Times ``Scatter``, ``Density2D`` and ``Hexbin`` plus ``to_json`` for a
+normal point cloud and reports the number of marks and the size of the
+spec.
+
+    python benchmarks/bench_density.py [points] [bins]
+"""
+from __future__ import print_function
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from vincent import Scatter, Density2D, Hexbin
+
+
+def main(points=200000, bins=50):
+    df = pd.DataFrame(np.random.randn(points, 2), columns=['x', 'y'])
+    charts = [('scatter', lambda: Scatter(df.set_index('x')['y'])),
+              ('density2d', lambda: Density2D(df, bins=bins)),
+              ('hexbin', lambda: Hexbin(df, bins=bins))]
+    for label, build in charts:
+        start = time.time()
+        chart = build()
+        spec = chart.to_json(pretty_print=False)
+        print('{0:<10} {1:>7} marks  {2:.3f}s  {3:.2f} MiB'.format(
+            label, len(chart.data['table'].values), time.time() - start,
+            len(spec) / 2.0 ** 20))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark: downsampling with max_points
+---------------------------------------
+
+Times ``Data.from_pandas`` plus ``to_json`` for a long random walk with a
+datetime index, in full and decimated to ``max_points`` with LTTB and
+min/max, and reports the size of the JSON produced.
+
+    python benchmarks/bench_downsample.py [points] [max_points]
+"""
+from __future__ import print_function
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from vincent import Data
+
+
+def main(points=1000000, max_points=2000):
+    index = pd.date_range('1/1/2000', periods=points, freq='s')
+    series = pd.Series(np.random.randn(points).cumsum(), index=index)
+    for label, kwargs in [('full', {}),
+                          ('lttb', {'max_points': max_points}),
+                          ('minmax', {'max_points': max_points,
+                                      'downsample': 'minmax'})]:
+        start = time.time()
+        data = Data.from_pandas(series, **kwargs)
+        spec = data.to_json(pretty_print=False)
+        print('{0:<7} {1:>8} points  {2:.3f}s  {3:.1f} MiB'.format(
+            label, len(data.values), time.time() - start,
+            len(spec) / 2.0 ** 20))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
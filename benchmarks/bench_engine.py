@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark: columnar evaluation of transforms
+--------------------------------------------
+
+Runs ``filter``, ``formula``, ``stack`` and ``stats`` transforms over many
+tuples, once through numpy columns and once tuple by tuple, as the engine
+does when numpy is missing or a column mixes types. ``stats`` has no
+columnar path and is listed for comparison.
+
+    python benchmarks/bench_engine.py [tuples]
+"""
+from __future__ import print_function
+import sys
+import time
+
+import numpy as np
+
+from vincent import engine
+
+FACET = [{'type': 'facet', 'keys': ['data.c']}]
+
+# Name, untimed transforms to prepare the data, timed transforms
+TRANSFORMS = [
+    ('filter', [], [{'type': 'filter',
+                     'test': 'd.data.y > 0.5 && d.data.x != 3'}]),
+    ('formula', [], [{'type': 'formula', 'field': 'f',
+                      'expr': 'd.data.y * 2 + d.data.x / 4'}]),
+    ('stack', FACET, [{'type': 'stack', 'point': 'data.x',
+                       'height': 'data.y'}]),
+    ('stats', [], [{'type': 'stats', 'value': 'data.y'}]),
+]
+
+
+def run(setup, transforms, values):
+    data = engine.apply_transforms(
+        setup, engine.ingest([dict(v) for v in values]))
+    start = time.time()
+    engine.apply_transforms(transforms, data)
+    return time.time() - start
+
+
+def main(tuples=100000):
+    rng = np.random.RandomState(0)
+    values = [{'x': int(x), 'y': float(y), 'c': int(c)} for x, y, c in
+              zip(rng.randint(0, 1000, tuples), rng.rand(tuples),
+                  rng.randint(0, 10, tuples))]
+    for name, setup, transforms in TRANSFORMS:
+        columnar = run(setup, transforms, values)
+        engine.np = None
+        try:
+            scalar = run(setup, transforms, values)
+        finally:
+            engine.np = np
+        print('{0:<8} columnar {1:.3f}s  per tuple {2:.3f}s'.format(
+            name, columnar, scalar))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark: Data.from_pandas on DataFrames
+-----------------------------------------
+
+Compares the columnar ``Data.from_pandas`` conversion against the original
+``iterrows`` loop that serialized every cell individually.
+
+    python benchmarks/bench_from_pandas.py [rows] [columns]
+"""
+from __future__ import print_function
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from vincent.data import Data
+
+
+def legacy_from_pandas(pd_obj, grouped=False):
+    """The per-cell loop ``Data.from_pandas`` used to run"""
+    values = []
+    for i, row in pd_obj.iterrows():
+        for num, (k, v) in enumerate(row.items()):
+            value = {}
+            value['idx'] = Data.serialize(i)
+            value['col'] = Data.serialize(k)
+            value['val'] = Data.serialize(v)
+            if grouped:
+                value['group'] = num
+            values.append(value)
+    return values
+
+
+def best_of(func, repeat=3):
+    """Return the fastest wall-clock time of ``repeat`` calls"""
+    timings = []
+    for _ in range(repeat):
+        start = time.time()
+        func()
+        timings.append(time.time() - start)
+    return min(timings)
+
+
+def main(rows=20000, columns=10):
+    df = pd.DataFrame(np.random.randn(rows, columns),
+                      columns=['col%d' % i for i in range(columns)])
+    assert Data.from_pandas(df).values == legacy_from_pandas(df)
+
+    legacy = best_of(lambda: legacy_from_pandas(df), repeat=1)
+    columnar = best_of(lambda: Data.from_pandas(df))
+    print('{0} cells'.format(rows * columns))
+    print('  iterrows loop:   {0:.3f}s'.format(legacy))
+    print('  columnar:        {0:.3f}s ({1:.0f}x)'.format(
+        columnar, legacy / columnar))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark: GrammarDict.__call__
+-------------------------------
+
+Compares building the plain Python grammar of a chart through a JSON round
+trip (the previous implementation) against ``GrammarDict.__call__``.
+
+    python benchmarks/bench_grammar.py [rows] [columns]
+"""
+from __future__ import print_function
+import json
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from vincent import Line
+from vincent.encoder import default
+
+
+def best_of(func, repeat=3):
+    times = []
+    for _ in range(repeat):
+        start = time.time()
+        func()
+        times.append(time.time() - start)
+    return min(times)
+
+
+def main(rows=100000, columns=5):
+    chart = Line(pd.DataFrame(np.random.randn(rows, columns)))
+
+    def round_trip():
+        return json.loads(json.dumps(chart.grammar, default=default))
+
+    assert round_trip() == chart.grammar()
+    old, new = best_of(round_trip), best_of(chart.grammar)
+    print('round trip  {0:.3f}s'.format(old))
+    print('__call__    {0:.3f}s  ({1:.1f}x)'.format(new, old / new))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
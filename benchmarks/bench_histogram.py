@@ -0,0 +1,33 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark: Histogram
+--------------------
+
+Times ``Histogram`` plus ``to_json`` for increasing numbers of normal
+samples and reports the size of the spec, which only depends on the number
+of bins.
+
+    python benchmarks/bench_histogram.py [max_samples] [bins]
+"""
+from __future__ import print_function
+import sys
+import time
+
+import numpy as np
+
+from vincent import Histogram
+
+
+def main(max_samples=10000000, bins=50):
+    samples = 1000
+    while samples <= max_samples:
+        data = np.random.randn(samples)
+        start = time.time()
+        spec = Histogram(data, bins=bins).to_json(pretty_print=False)
+        print('{0:>9} samples  {1:.3f}s  {2} bytes'.format(
+            samples, time.time() - start, len(spec)))
+        samples *= 10
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark: Data.keypairs
+------------------------
+
+Times ``Data.keypairs`` on a county-sized DataFrame, as ``Map`` and
+``Map.rebind`` call it, against the row-by-row ``iterrows`` extraction it
+replaced.
+
+    python benchmarks/bench_keypairs.py [rows] [repeat]
+"""
+from __future__ import print_function
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from vincent import Data
+
+
+def iterrows_keypairs(data, columns):
+    return [{"x": Data.serialize(x[1][columns[0]]),
+             "y": Data.serialize(x[1][columns[1]])}
+            for x in data.iterrows()]
+
+
+def main(rows=3200, repeat=20):
+    df = pd.DataFrame({'FIPS': ['{0:05d}'.format(i) for i in range(rows)],
+                       'Unemployment': np.random.rand(rows) * 10,
+                       'Employed': np.random.randint(0, 10 ** 6, rows)})
+    columns = ['FIPS', 'Unemployment']
+    for label, func in [
+            ('iterrows', lambda: iterrows_keypairs(df, columns)),
+            ('keypairs', lambda: Data.keypairs(df, columns=columns))]:
+        start = time.time()
+        for _ in range(repeat):
+            func()
+        print('{0:<9} {1:.2f} ms per call'.format(
+            label, (time.time() - start) / repeat * 1000))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark: grammar node size
+----------------------------
+
+Measures the memory held by each grammar node of many small marks, as a
+large faceted chart builds them, and the time to build them and to read
+a property.
+
+    python benchmarks/bench_nodes.py [marks]
+"""
+from __future__ import print_function
+import sys
+import time
+import tracemalloc
+
+from vincent import ValueRef, PropertySet, Mark, MarkProperties
+
+# Grammar nodes in each mark built by ``build``
+NODES = 7
+
+
+def build(marks):
+    return [Mark(type='rect', properties=MarkProperties(enter=PropertySet(
+        x=ValueRef(scale='x', field='data.idx'),
+        y=ValueRef(scale='y', field='data.val'),
+        width=ValueRef(scale='x', band=True, offset=-1),
+        fill=ValueRef(value='steelblue'))))
+        for _ in range(marks)]
+
+
+def main(marks=20000):
+    build(10)
+    start = time.time()
+    built = build(marks)
+    print('build     {0:.2f} us per node'.format(
+        (time.time() - start) / (marks * NODES) * 1e6))
+    del built
+
+    tracemalloc.start()
+    built = build(marks)
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    print('memory    {0:.0f} bytes per node'.format(size / (marks * NODES)))
+
+    ref = built[0].properties.enter.x
+    start = time.time()
+    for _ in range(10 ** 6):
+        ref.scale
+    print('getattr   {0:.3f} us'.format(time.time() - start))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark: precomputed stacks and sums
+--------------------------------------
+
+Builds a stacked ``Bar`` chart over many categories, with the stack and
+stats transforms left to Vega and with ``precompute=True``. It reports the
+Python time and the size of the spec, and the number of records the
+browser has to aggregate: all of ``table`` when Vega computes the stats,
+none when they are precomputed.
+
+    python benchmarks/bench_precompute.py [categories] [series]
+"""
+from __future__ import print_function
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from vincent import Bar
+
+
+def main(categories=20000, series=10):
+    df = pd.DataFrame(np.random.randint(0, 100, (categories, series)),
+                      index=['c{0}'.format(i) for i in range(categories)],
+                      columns=['s{0}'.format(j) for j in range(series)])
+    for precompute in (False, True):
+        start = time.time()
+        bar = Bar(df, precompute=precompute)
+        spec = bar.to_json(pretty_print=False)
+        aggregated = 0 if precompute else len(bar.data['table'].values)
+        print('precompute={0!s:<5}  {1:.3f}s  {2:.1f} MiB  '
+              '{3} records aggregated in the browser'.format(
+                  precompute, time.time() - start, len(spec) / 2.0 ** 20,
+                  aggregated))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,33 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark: re-serializing a chart after a styling change
+--------------------------------------------------------
+
+Times ``to_json`` on a large chart, then again after changing its colors.
+The second call reuses the cached JSON of the data.
+
+    python benchmarks/bench_rerender.py [rows] [columns]
+"""
+from __future__ import print_function
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from vincent import Line
+
+
+def main(rows=100000, columns=5):
+    chart = Line(pd.DataFrame(np.random.randn(rows, columns)))
+    for label, change in [('first', None), ('colors', 'Set1'),
+                          ('colors', 'Set2')]:
+        if change:
+            chart.colors(brew=change)
+        start = time.time()
+        chart.to_json(cache=True)
+        print('{0:<8} {1:.3f}s'.format(label, time.time() - start))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
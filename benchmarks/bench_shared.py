@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark: shared grammar nodes
+-------------------------------
+
+Builds and serializes many small ``GroupedBar`` and ``Line`` charts, as a
+process generating charts in bulk does, with the ``ValueRef`` and
+``PropertySet`` nodes of the chart templates shared, and with sharing
+turned off.
+
+    python benchmarks/bench_shared.py [charts]
+"""
+from __future__ import print_function
+import gc
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from vincent import core, GroupedBar, Line
+
+
+def run(df, charts):
+    start = time.time()
+    built = [cls(df) for _ in range(charts) for cls in (GroupedBar, Line)]
+    build = time.time() - start
+    for chart in built:
+        chart.data[0].values
+    start = time.time()
+    for chart in built:
+        chart.to_json()
+    encode = time.time() - start
+    return built, build, encode
+
+
+def main(charts=1000):
+    df = pd.DataFrame(np.random.rand(10, 3), columns=['a', 'b', 'c'])
+    # As timeit does, so that collections of the kept charts do not land
+    # in one of the timings
+    gc.disable()
+    shared_max = core._shared_max
+    for label, max_size in [('unshared', 0), ('shared', shared_max)]:
+        core._shared_max = max_size
+        core._shared_grammars.clear()
+        run(df, 10)
+        built, build, encode = run(df, charts)
+        del built
+        tracemalloc.start()
+        built = [cls(df) for _ in range(charts) for cls in (GroupedBar, Line)]
+        size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        del built
+        print('{0:<9} build {1:.3f} ms, to_json {2:.3f} ms, {3:.1f} KiB '
+              'per chart'.format(label, build / charts / 2 * 1000,
+                                 encode / charts / 2 * 1000,
+                                 size / charts / 2 / 1024))
+    core._shared_max = shared_max
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark: chart templates
+--------------------------
+
+Builds and serializes many nearly identical ``Line``, ``Bar`` and
+``GroupedBar`` charts, as a report generator does, with the chart
+constructors and with ``from_template``.
+
+    python benchmarks/bench_templates.py [charts]
+"""
+from __future__ import print_function
+import gc
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from vincent import Line, Bar, GroupedBar
+
+
+def main(charts=20000):
+    frames = [pd.DataFrame(np.random.rand(5, 2), columns=['a', 'b'])
+              for _ in range(50)]
+    classes = (Line, Bar, GroupedBar)
+    # As timeit does, so that collections of the kept charts do not land
+    # in one of the timings
+    gc.disable()
+    for label, make in [('constructor', lambda cls, df: cls(df)),
+                        ('template', lambda cls, df: cls.from_template(df))]:
+        start = time.time()
+        built = [make(classes[i % 3], frames[i % 50])
+                 for i in range(charts)]
+        build = time.time() - start
+        for chart in built:
+            chart.data['table'].values
+        start = time.time()
+        for chart in built:
+            chart.to_json()
+        encode = time.time() - start
+        del built
+        gc.collect()
+        print('{0:<11} build {1:.1f} s, to_json {2:.1f} s for {3} '
+              'charts'.format(label, build, encode, charts))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark: writing specs with to_json(path=...)
+-----------------------------------------------
+
+Compares time and peak traced memory of the streaming writer used by
+``GrammarClass.to_json(path=...)`` against a plain ``json.dump`` of the
+whole grammar, for a chart whose data is held as ``ColumnarValues``.
+
+    python benchmarks/bench_to_json.py [rows] [columns]
+"""
+from __future__ import print_function
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from vincent import Line, Data
+from vincent.encoder import default
+
+
+def measure(func):
+    """Return (seconds, peak MiB) of ``func``, timed without tracing"""
+    start = time.time()
+    func()
+    elapsed = time.time() - start
+    tracemalloc.start()
+    func()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak / 2.0 ** 20
+
+
+def main(rows=100000, columns=5):
+    df = pd.DataFrame(np.random.randn(rows, columns))
+    chart = Line(df)
+    chart.data['table'] = Data.from_pandas(df, columnar=True)
+    path = os.path.join(tempfile.mkdtemp(), 'spec.json')
+
+    def json_dump():
+        with open(path, 'w') as f:
+            json.dump(chart.grammar, f, default=default, sort_keys=True,
+                      indent=2, separators=(',', ': '))
+
+    for label, func in [('json.dump', json_dump),
+                        ('streaming', lambda: chart.to_json(path))]:
+        elapsed, peak = measure(func)
+        print('{0:<10} {1:.2f}s  peak {2:.1f} MiB'.format(label, elapsed,
+                                                         peak))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark: trusted construction
+-------------------------------
+
+Times building many small ``GroupedBar`` charts, as a batch job does,
+with every property checked and in trusted mode, and then the cost of
+validating the trusted charts once, which includes converting their
+data.
+
+    python benchmarks/bench_trusted.py [charts]
+"""
+from __future__ import print_function
+import gc
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from vincent import GroupedBar, trusted
+
+
+def main(charts=2000):
+    df = pd.DataFrame(np.random.rand(10, 3), columns=['a', 'b', 'c'])
+    GroupedBar(df)
+    # As timeit does, so that collections of the kept charts do not land
+    # in one of the timings
+    gc.disable()
+
+    start = time.time()
+    built = [GroupedBar(df) for _ in range(charts)]
+    print('checked   {0:.2f} ms per chart'.format(
+        (time.time() - start) / charts * 1000))
+
+    del built
+    start = time.time()
+    with trusted():
+        built = [GroupedBar(df) for _ in range(charts)]
+    print('trusted   {0:.2f} ms per chart'.format(
+        (time.time() - start) / charts * 1000))
+
+    start = time.time()
+    for chart in built:
+        chart.validate()
+    print('validate  {0:.2f} ms per chart'.format(
+        (time.time() - start) / charts * 1000))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
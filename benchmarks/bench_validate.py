@@ -0,0 +1,33 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark: Visualization.validate
+---------------------------------
+
+Times validating a chart of a large DataFrame, then validating it again
+unchanged. The second call still checks the row types of the values, which
+may have changed in place, but does not set them again.
+
+    python benchmarks/bench_validate.py [rows]
+"""
+from __future__ import print_function
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from vincent import Line
+
+
+def main(rows=1000000):
+    df = pd.DataFrame({'y': np.random.rand(rows)})
+    vis = Line(df)
+    vis.data[0].values
+    for label in ['first', 'second']:
+        start = time.time()
+        vis.validate()
+        print('{0:<7} {1:.4f} s'.format(label, time.time() - start))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -9,7 +9,10 @@ Tests for Vincent chart types, which also serve as reference grammar.
 import pandas as pd
 import nose.tools as nt
 from vincent.charts import (data_type, Chart, Bar, Scatter, Line, Area,
-                            GroupedBar, Map, Pie, Word)
+                            GroupedBar, Histogram, Density2D, Hexbin, Map,
+                            Pie, Word)
+from vincent.transforms import Transform
+from vincent.data import Data
 
 
 def chart_runner(chart, scales, axes, marks):
@@ -96,6 +99,89 @@ class TestChart(object):
         nt.assert_raises(ValueError, Chart)
         nt.assert_raises(ValueError, Chart, [])
 
+    def test_from_template(self):
+        """Charts made from a template match charts built from scratch,
+        and can be changed independently"""
+        frames = [pd.DataFrame({'a': [1, 2, 3], 'b': [4, 5, 6]}),
+                  pd.DataFrame({'a': [7, 8], 'b': [9, 10]}),
+                  pd.DataFrame({'a': [1, 2]},
+                               index=pd.date_range('2013-01-01', periods=2))]
+        for cls, options in [(Line, {}), (Bar, {'precompute': True}),
+                             (GroupedBar, {'data_labels': True}),
+                             (Line, {'columns': ['a'], 'width': 300})]:
+            for df in frames:
+                chart = cls.from_template(df, **options)
+                nt.assert_equal(chart.to_json(), cls(df, **options).to_json())
+                chart.validate()
+
+        first, second = [Line.from_template(df) for df in frames[:2]]
+        first.axis_titles(x='x', y='y')
+        first.scales['x'].type = 'log'
+        first.marks[0].marks[0].properties.enter.stroke_width.value = 5
+        first.marks[0].from_.transform.append(Transform(type='sort'))
+        nt.assert_equal(Line.from_template(frames[1]).to_json(),
+                        second.to_json())
+        nt.assert_equal(second.to_json(), Line(frames[1]).to_json())
+
+        # Evaluating the transforms of a clone leaves the others as they were
+        charts = [Bar.from_template(df, width=301) for df in frames[:2] * 2]
+        before = [chart.to_json() for chart in charts]
+        nt.assert_equal(charts[1].evaluate_transforms(), ['stats'])
+        nt.assert_equal(charts[1].scales['y'].domain.field, 'data.sum')
+        for chart, spec in zip(charts[:1] + charts[2:], before[:1] +
+                               before[2:]):
+            nt.assert_equal(chart.scales['y'].domain.field, 'sum')
+            nt.assert_equal(chart.to_json(), spec)
+        later = Bar.from_template(frames[0], width=301)
+        nt.assert_equal(later.scales['y'].domain.field, 'sum')
+        nt.assert_equal(later.to_json(), before[0])
+
+        # Clones set the attributes that __init__ would
+        for data in [frames[0], frames[2], [1, 2, 3], [4, 5, 6]]:
+            chart = Line.from_template(data)
+            nt.assert_equal(chart._is_datetime, Line(data)._is_datetime)
+            nt.assert_equal(chart._pandas_args, Line(data)._pandas_args)
+
+        # The chart a template is taken from is left unshared
+        original = Line.from_template(frames[0], width=299)
+        mark = original.marks[0].marks[0]
+        nt.assert_false(mark._grammar._shared)
+        mark._grammar['type'] = 'area'
+        nt.assert_equal(Line.from_template(frames[0], width=299).to_json(),
+                        Line(frames[0], width=299).to_json())
+
+        # Skeletons built from the data are not reused
+        hist = Histogram.from_template(frames[0])
+        nt.assert_equal(hist.to_json(), Histogram(frames[0]).to_json())
+
+    def test_iter_idx_pandas(self):
+        """iter_idx on pandas data loads the columns as iterables"""
+        df = pd.DataFrame({'a': [1, 2, 3], 'b': [4, 5, 6], 'c': [7, 8, 9]})
+        chart = Scatter(df, iter_idx='a')
+        nt.assert_equal(chart.data['table'].grammar(),
+                        Data.from_mult_iters(idx='a', **df).grammar())
+        nt.assert_equal(chart.data['table'].values[0],
+                        {'idx': 1, 'col': 'b', 'val': 4})
+
+    def test_validate(self):
+        """Charts validate, and again from what was remembered"""
+        chart = Line(pd.DataFrame({'y': [1, 2, 3]}))
+        chart.validate()
+        nt.assert_in('values', chart.data[0].grammar._validated)
+        chart.validate()
+
+    def test_shared_grammar_edits(self):
+        """Editing a chart's grammar dicts leaves other charts alone"""
+        first, second = [Line(pd.DataFrame({'y': [1, 2]})) for _ in range(2)]
+        enter = first.marks[0].marks[0].properties.enter
+        enter.grammar['x'].grammar['scale'] = 'other'
+        enter.grammar['stroke_width'] = 5
+        nt.assert_equal(enter.x.scale, 'other')
+        nt.assert_equal(second.marks[0].marks[0].properties.enter.x.scale,
+                        'x')
+        nt.assert_equal(Line(pd.DataFrame({'y': [1, 2]})).to_json(),
+                        second.to_json())
+
 
 class TestScatter(object):
     """Test Scatter Chart"""
@@ -332,6 +418,182 @@ class TestBar(object):
         chart_runner(bar, scales, axes, marks)
         chart_runner(stacked_bar, scales, axes, marks)
 
+    def test_precompute(self):
+        df = pd.DataFrame({'y': [4, 5, float('nan')], 'z': [7, 8, 9]},
+                          index=[1, 2, 2])
+        bar = Bar(df, precompute=True)
+
+        nt.assert_equal(bar.data['table'].values[:2], [
+            {'idx': 1, 'col': 'y', 'y2': 0.0, 'y': 4.0},
+            {'idx': 1, 'col': 'z', 'y2': 4.0, 'y': 11.0}])
+        nt.assert_equal(bar.data['table'].values[-1],
+                        {'idx': 2, 'col': 'z', 'y2': 13.0, 'y': 22.0})
+        nt.assert_equal(bar.data['stats'].grammar(), {
+            'name': 'stats',
+            'values': [{'idx': 1, 'sum': 11.0}, {'idx': 2, 'sum': 22.0}]})
+
+        nt.assert_equal(bar.scales['y'].domain.grammar(),
+                        {'data': 'stats', 'field': 'data.sum'})
+        group = bar.marks[0].grammar()
+        nt.assert_equal(group['from']['transform'],
+                        [{'type': 'facet', 'keys': ['data.col']}])
+        nt.assert_equal(group['marks'][0]['properties']['enter']['y2'],
+                        {'field': 'data.y2', 'scale': 'y'})
+
+        nt.assert_raises(ValueError, Bar, [1, 2, 3], precompute=True)
+
+    def test_precompute_unsupported(self):
+        """Only stacked charts read precomputed offsets"""
+        df = pd.DataFrame({'y': [4, 5, 6], 'z': [7, 8, 9]})
+        for cls in [Line, Scatter, GroupedBar, Pie]:
+            nt.assert_raises(ValueError, cls, df, precompute=True)
+            nt.assert_raises(ValueError, cls.from_template, df,
+                             precompute=True)
+        nt.assert_raises(ValueError, Histogram, df, precompute=True)
+        for cls in [Bar, Area]:
+            values = cls(df, precompute=True).data['table'].values
+            nt.assert_not_in('val', values[0])
+
+    def test_precompute_duplicate_index(self):
+        df = pd.DataFrame({'y': [1, 2, 3, 4], 'z': [10, 20, 30, 40]},
+                          index=['a', 'b', 'a', 'a'])
+        bar = Bar(df, precompute=True)
+
+        tops = {}
+        for record in bar.data['table'].values:
+            tops[record['idx']] = max(tops.get(record['idx'], 0),
+                                      record['y'])
+        sums = dict((record['idx'], record['sum'])
+                    for record in bar.data['stats'].values)
+        nt.assert_equal(tops, sums)
+        nt.assert_equal(sums, {'a': 88.0, 'b': 22.0})
+        nt.assert_equal(bar.data['table'].values[4],
+                        {'idx': 'a', 'col': 'y', 'y2': 11.0, 'y': 14.0})
+
+
+class TestHistogram(object):
+    """Test Histogram Chart"""
+
+    def test_init(self):
+        hist = Histogram([1, 2, 2, 3, float('nan')], bins=2)
+        nt.assert_equal(hist.data['table'].values, [
+            {'idx': 1.0, 'end': 2.0, 'col': 'data', 'val': 1},
+            {'idx': 2.0, 'end': 3.0, 'col': 'data', 'val': 3}])
+
+        scales = [{'domain': {'data': 'table',
+                              'field': ['data.idx', 'data.end']},
+                   'name': 'x',
+                   'range': 'width',
+                   'zero': False},
+                  {'domain': {'data': 'table', 'field': 'data.val'},
+                   'name': 'y',
+                   'nice': True,
+                   'range': 'height'},
+                  {'domain': {'data': 'table', 'field': 'data.col'},
+                   'name': 'color',
+                   'range': 'category20',
+                   'type': 'ordinal'}]
+
+        axes = [{'scale': 'x', 'type': 'x'},
+                {'scale': 'y', 'type': 'y'}]
+
+        marks = [{
+            'type': 'group',
+            'from': {
+                'data': 'table',
+                'transform': [{'type': 'facet', 'keys': ['data.col']}]
+            },
+            'marks': [{
+                'type': 'rect',
+                'properties': {
+                    'enter': {
+                        'x': {'field': 'data.idx', 'offset': 1,
+                              'scale': 'x'},
+                        'x2': {'field': 'data.end', 'scale': 'x'},
+                        'y': {'field': 'data.val', 'scale': 'y'},
+                        'y2': {'scale': 'y', 'value': 0},
+                        'fill': {'field': 'data.col', 'scale': 'color'},
+                        'fillOpacity': {'value': 1}
+                    }
+                }
+            }]
+        }]
+
+        chart_runner(hist, scales, axes, marks)
+
+    def test_weights(self):
+        df = pd.DataFrame({'a': [0, 1, 1], 'b': [0, 0, 1],
+                           'w': [1, 2, 3]})
+        hist = Histogram(df, bins=[0, 0.5, 1], weights='w')
+        nt.assert_equal([r['col'] for r in hist.data['table'].values],
+                        ['a', 'a', 'b', 'b'])
+        nt.assert_equal([r['val'] for r in hist.data['table'].values],
+                        [1, 5, 3, 3])
+
+        # The payload does not grow with the number of samples
+        hist = Histogram({'x': range(100000)}, bins='sturges')
+        nt.assert_equal(len(hist.data['table'].values), 18)
+
+        nt.assert_raises(ValueError, Histogram, [])
+        nt.assert_raises(ValueError, Histogram, [1, 2], weights=[1])
+
+
+class TestDensity2D(object):
+    """Test Density2D and Hexbin Charts"""
+
+    def test_init(self):
+        points = [(0, 0), (0.1, 0.2), (1, 1), (float('nan'), 1)]
+        density = Density2D(points, bins=2)
+        nt.assert_equal(density.data['table'].values, [
+            {'x': 0.0, 'x2': 0.5, 'y': 0.0, 'y2': 0.5, 'val': 2},
+            {'x': 0.5, 'x2': 1.0, 'y': 0.5, 'y2': 1.0, 'val': 1}])
+
+        scales = [{'domain': [0.0, 1.0], 'name': 'x', 'range': 'width',
+                   'zero': False},
+                  {'domain': [0.0, 1.0], 'name': 'y', 'range': 'height',
+                   'zero': False},
+                  {'domain': [1, 2], 'name': 'color', 'type': 'quantize',
+                   'range': ["#ffffd9", "#edf8b1", "#c7e9b4", "#7fcdbb",
+                             "#41b6c4", "#1d91c0", "#225ea8", "#253494",
+                             "#081d58"]}]
+
+        axes = [{'scale': 'x', 'type': 'x'},
+                {'scale': 'y', 'type': 'y'}]
+
+        marks = [{
+            'type': 'rect',
+            'from': {'data': 'table'},
+            'properties': {
+                'enter': {
+                    'x': {'field': 'data.x', 'scale': 'x'},
+                    'x2': {'field': 'data.x2', 'scale': 'x'},
+                    'y': {'field': 'data.y', 'scale': 'y'},
+                    'y2': {'field': 'data.y2', 'scale': 'y'},
+                    'fill': {'field': 'data.val', 'scale': 'color'}
+                }
+            }
+        }]
+
+        chart_runner(density, scales, axes, marks)
+
+        nt.assert_raises(ValueError, Density2D, points, shape='circle')
+        nt.assert_raises(ValueError, Density2D, [1, 2, 3])
+
+    def test_hexbin(self):
+        df = pd.DataFrame({'a': [0, 0.01, 1, 0.5], 'b': [0, 0.01, 1, 0.5],
+                           'w': [1, 2, 3, 4]})
+        hexbin = Hexbin(df, bins=10, weights='w', width=100, height=100)
+        values = hexbin.data['table'].values
+        nt.assert_equal(sorted(r['val'] for r in values), [3, 3, 4])
+        nt.assert_equal(values[0], {'x': 0.0, 'y': 0.0, 'val': 3})
+
+        enter = hexbin.marks[0].grammar()['properties']['enter']
+        nt.assert_equal(hexbin.marks[0].type, 'path')
+        nt.assert_equal(enter['path']['value'],
+                        'M0.00,-5.77L5.00,-2.89L5.00,2.89L0.00,5.77'
+                        'L-5.00,2.89L-5.00,-2.89Z')
+        nt.assert_equal(hexbin.scales['color'].domain, [3, 4])
+
 
 class TestGroupedBar(object):
     """Test grouped bar chart"""
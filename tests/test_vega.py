@@ -6,14 +6,24 @@ Test Vincent.vega
 '''
 from datetime import datetime, timedelta
 from itertools import product
+import copy
+import pickle
+import hashlib
+import os
+import tempfile
 import time
 import json
 
-from vincent.charts import Line
+from vincent import encoder, engine, sampling
+from vincent.charts import Line, Bar, GroupedBar
+from vincent.export import export_charts
 from vincent.core import (grammar, GrammarClass, GrammarDict, KeyedList,
-                          LoadError, ValidationError)
+                          LoadError, ValidationError, trusted,
+                          set_trusted)
 from vincent.visualization import Visualization
-from vincent.data import Data
+from vincent.data import Data, LazyData
+from vincent.columnar import ColumnarValues
+from vincent.patch import apply_patch, diff
 from vincent.transforms import Transform
 from vincent.properties import PropertySet
 from vincent.scales import DataRef, Scale
@@ -26,6 +36,11 @@ import nose.tools as nt
 import pandas as pd
 import numpy as np
 
+try:
+    from StringIO import StringIO
+except ImportError:
+    from io import StringIO
+
 
 sequences = {
     'int': range,
@@ -95,6 +110,48 @@ def test_keyed_list():
     nt.assert_equal(err.exception.args[0], 'object must have type attribute')
 
 
+def test_keyed_list_index():
+    """Keyed lookups stay correct as the list changes"""
+
+    class TestKey(object):
+        def __init__(self, name=None):
+            self.name = name
+
+    keys = [TestKey(name) for name in 'abcdef']
+    key_list = KeyedList(attr_name='name')
+    key_list.append(keys[0])
+    key_list.extend(keys[1:3])
+    key_list += keys[3:4]
+    key_list.insert(0, keys[4])
+    for key in keys[:5]:
+        nt.assert_is(key_list[key.name], key)
+
+    del key_list['a']
+    key_list.pop(0)
+    key_list.reverse()
+    key_list[1:1] = [keys[5]]
+    nt.assert_equal([k.name for k in key_list], ['d', 'f', 'c', 'b'])
+    for key in key_list:
+        nt.assert_is(key_list[key.name], key)
+    nt.assert_raises(KeyError, key_list.__getitem__, 'a')
+
+    # Renamed in place
+    keys[1].name = 'g'
+    nt.assert_is(key_list['g'], keys[1])
+    nt.assert_raises(KeyError, key_list.__getitem__, 'b')
+
+    # Duplicates found on insert are reported until removed
+    key_list.extend([TestKey('d')])
+    nt.assert_raises(ValidationError, key_list.__getitem__, 'c')
+    key_list.remove(key_list[-1])
+    nt.assert_is(key_list['d'], keys[3])
+
+    copied = copy.deepcopy(key_list)
+    nt.assert_equal([k.name for k in copied], ['d', 'f', 'c', 'g'])
+    nt.assert_equal(copied['f'].name, 'f')
+    nt.assert_equal(copied.attr_name, 'name')
+
+
 def test_grammar():
     """Grammar decorator behaves correctly."""
 
@@ -179,6 +236,33 @@ def test_grammar_dict():
     nt.assert_equal(g_dict.encoder(test), test.grammar)
 
 
+def test_grammar_dict_call():
+    """GrammarDict() matches a JSON round trip without sharing objects"""
+
+    class Label(str):
+        pass
+
+    df = pd.DataFrame({'one': [1, 2, 3], 'two': [4.5, np.nan, 6.5]})
+    test = Line(df)
+    test.data.append(Data.from_pandas(df, name='columnar', columnar=True))
+    test.grammar['misc'] = {1: (1, 2), 2.5: Label('label'), None: True,
+                            'np': [np.int64(3), np.float64(0.5)],
+                            'nested': [{'a': [1]}, object()]}
+
+    expected = json.loads(json.dumps(test.grammar, default=encoder.default))
+    actual = test.grammar()
+    # Compare as text since NaN != NaN
+    nt.assert_equal(json.dumps(actual, sort_keys=True),
+                    json.dumps(expected, sort_keys=True))
+    nt.assert_is(type(actual['misc']['2.5']), str)
+    nt.assert_is(type(actual['misc']['np'][1]), float)
+
+    actual['data'][0]['values'][0]['val'] = 'changed'
+    actual['misc']['nested'][0]['a'].append(2)
+    nt.assert_equal(test.data[0].values[0]['val'], 1)
+    nt.assert_equal(test.grammar['misc']['nested'][0]['a'], [1])
+
+
 def assert_grammar_typechecking(grammar_types, test_obj):
     """Assert that the grammar fields of a test object are correctly
     type-checked.
@@ -236,6 +320,130 @@ class TestGrammarClass(object):
         nt.assert_equal(err.exception.args[0],
                         'invalid contents: axes[0] must be Axis')
 
+    def test_slots(self):
+        """Grammar nodes have no __dict__, and still copy and pickle"""
+        mark = Mark(type='rect', properties=MarkProperties(
+            enter=PropertySet(x=ValueRef(scale='x', field='data.idx'))))
+        for node in [mark, mark.properties, mark.properties.enter,
+                     mark.properties.enter.x, mark.grammar]:
+            nt.assert_false(hasattr(node, '__dict__'))
+        nt.assert_raises(AttributeError, setattr, mark, 'not_grammar', 1)
+        for clone in [copy.deepcopy(mark), pickle.loads(pickle.dumps(mark))]:
+            nt.assert_equal(clone.grammar(), mark.grammar())
+        # Protocols 0 and 1 need __getstate__ for slotted classes
+        for protocol in [0, 2]:
+            for node in [ValueRef(value=1), mark,
+                         ValueRef.shared(scale='x', field='data.idx')]:
+                clone = pickle.loads(pickle.dumps(node, protocol))
+                nt.assert_is(type(clone), type(node))
+                nt.assert_equal(clone.grammar(), node.grammar())
+            line = Line([1, 2, 3])
+            clone = pickle.loads(pickle.dumps(line, protocol))
+            nt.assert_equal(clone.grammar(), line.grammar())
+            nt.assert_equal(clone._is_datetime, line._is_datetime)
+
+        # Subclasses without __slots__ can keep other attributes
+        vis = Visualization()
+        vis.not_grammar = 1
+        nt.assert_not_in('not_grammar', vis.grammar)
+
+    def test_shared(self):
+        """Shared nodes share their grammar until they are changed"""
+        a = ValueRef.shared(scale='x', field='data.idx')
+        b = ValueRef.shared(field='data.idx', scale='x')
+        nt.assert_is_not(a, b)
+        nt.assert_is(a._grammar, b._grammar)
+        for value in [1, 1.0, True, -0.0]:
+            nt.assert_equal(ValueRef.shared(value=value).grammar(),
+                            {'value': value})
+        nt.assert_is_not(ValueRef.shared(value=1)._grammar,
+                         ValueRef.shared(value=True)._grammar)
+
+        # Copy on write
+        a.scale = 'y'
+        nt.assert_equal(a.grammar(), {'scale': 'y', 'field': 'data.idx'})
+        nt.assert_equal(b.grammar(), {'scale': 'x', 'field': 'data.idx'})
+        del b.field
+        nt.assert_equal(ValueRef.shared(scale='x', field='data.idx').field,
+                        'data.idx')
+        nt.assert_false(copy.deepcopy(b).grammar._shared)
+
+        # So do changes made through the grammar dict
+        c = ValueRef.shared(scale='x', field='data.idx')
+        c.grammar['scale'] = 'z'
+        nt.assert_equal(c.scale, 'z')
+        nt.assert_equal(ValueRef.shared(scale='x', field='data.idx').scale,
+                        'x')
+        nested = PropertySet.shared(x=ValueRef.shared(value=2))
+        nested.grammar['x'].grammar['value'] = 5
+        nt.assert_equal(nested.grammar(), {'x': {'value': 5}})
+        nt.assert_equal(PropertySet.shared(x=ValueRef.shared(value=2)).to_json(
+            pretty_print=False), '{"x": {"value": 2}}')
+
+        # Nodes read from a shared grammar are copied too
+        props = [PropertySet.shared(
+            x=ValueRef.shared(scale='x', field='data.idx'),
+            y=ValueRef.shared(value=2)) for _ in range(2)]
+        nt.assert_is(props[0]._grammar, props[1]._grammar)
+        props[0].x.scale = 'y'
+        nt.assert_equal(props[1].x.scale, 'x')
+        nt.assert_equal(json.loads(props[1].to_json()),
+                        {'x': {'scale': 'x', 'field': 'data.idx'},
+                         'y': {'value': 2}})
+        nt.assert_equal(props[1].to_json(), props[1].to_json())
+        nt.assert_true(ValueRef.shared(value=2)._grammar._fragments)
+        nt.assert_equal(encoder.dumps(props[1], sort_keys=True),
+                        PropertySet(
+                            x=ValueRef(scale='x', field='data.idx'),
+                            y=ValueRef(value=2)).to_json(pretty_print=False))
+
+        # Changing an argument afterwards changes no shared grammar
+        v = ValueRef.shared(value=2)
+        p = PropertySet.shared(x=v)
+        q = PropertySet.shared(x=ValueRef.shared(value=2))
+        nt.assert_is(p._grammar, q._grammar)
+        p.to_json()
+        v.value = 3
+        for node in [p, q, PropertySet.shared(x=ValueRef.shared(value=2))]:
+            nt.assert_equal(node.grammar(), {'x': {'value': 2}})
+            nt.assert_equal(json.loads(node.to_json()), {'x': {'value': 2}})
+        nt.assert_equal(PropertySet.shared(x=v).grammar(),
+                        {'x': {'value': 3}})
+
+        # Shared grammars are checked, even in trusted mode
+        with trusted():
+            nt.assert_raises(ValueError, ValueRef.shared, scale=1)
+        nt.assert_raises(ValueError, ValueRef.shared, value=[1])
+        vis = Visualization.shared(width=100)
+        nt.assert_false(vis.grammar._shared)
+        nt.assert_equal(vis.data, [])
+
+    def test_trusted(self):
+        """Trusted mode skips checks until validation"""
+        with trusted():
+            ref = ValueRef(value=1)
+            ref.scale = 3
+            nt.assert_equal(ref.scale, 3)
+            # Validation checks even in trusted mode
+            nt.assert_raises(ValidationError, ref.validate)
+            # So does construction, for keywords that are not properties
+            nt.assert_raises(ValueError, ValueRef, bad_kwarg=2)
+            nt.assert_raises(ValueError, Visualization, widht=300)
+        nt.assert_raises(ValueError, setattr, ref, 'scale', 3)
+        nt.assert_raises(ValueError, ValueRef, bad_kwarg=2)
+
+        # Nested blocks restore the mode they found
+        nt.assert_false(set_trusted(True))
+        with trusted(False):
+            nt.assert_raises(ValueError, setattr, ref, 'scale', 3)
+        nt.assert_true(set_trusted(False))
+
+        with trusted():
+            chart = GroupedBar(pd.DataFrame({'a': [1, 2], 'b': [3, 4]}))
+        chart.validate()
+        nt.assert_equal(chart.grammar(), GroupedBar(
+            pd.DataFrame({'a': [1, 2], 'b': [3, 4]})).grammar())
+
 
 class TestVisualization(object):
     """Test the Visualization Class"""
@@ -380,6 +588,282 @@ class TestVisualization(object):
         actual, tested = json.loads(pretty), json.loads(test.to_json())
         nt.assert_dict_equal(actual, tested)
 
+    def test_to_json_streaming(self):
+        """JSON streamed to files matches json.dumps exactly"""
+        df = pd.DataFrame({'one': [1, 2, 3], 'two': [4.5, np.nan, 6.5]},
+                          index=pd.date_range('1/2/2000', periods=3))
+        test = Line(df)
+        test.data.append(Data.from_pandas(df, name='columnar',
+                                          columnar=True))
+        test.axis_titles(x=u'été', y='y')
+        test.grammar['misc'] = {'tuple': (1, 2), 'none': None, 'empty': []}
+
+        for pretty_print in [True, False]:
+            dumps_args = ({'indent': 2, 'separators': (',', ': ')}
+                          if pretty_print else {})
+            expected = json.dumps(test.grammar, default=encoder.default,
+                                  sort_keys=True, **dumps_args)
+            nt.assert_equal(test.to_json(pretty_print=pretty_print),
+                            expected)
+            for batch_size in [1, 2, 1024]:
+                chunks = encoder.iterencode(test, batch_size=batch_size,
+                                            **dumps_args)
+                nt.assert_equal(''.join(chunks), expected)
+
+            out = StringIO()
+            test.to_json(out, pretty_print=pretty_print)
+            nt.assert_equal(out.getvalue(), expected)
+
+        path = os.path.join(tempfile.mkdtemp(), 'test.json')
+        test.to_json(path)
+        with open(path) as f:
+            nt.assert_equal(f.read(), test.to_json())
+
+        circular = {'vis': test}
+        test.grammar['circular'] = [circular]
+        nt.assert_raises(ValueError, ''.join, encoder.iterencode(circular))
+
+    def test_from_json(self):
+        """Specs load back into the same classes and JSON"""
+        df = pd.DataFrame({'one': [1.0, 2.0, 3.0], 'two': [4.0, 5.0, 6.0]})
+        for chart in [Line(df), GroupedBar(df)]:
+            chart.axis_titles(x='x', y='y')
+            chart.legend(title='legend')
+            chart.grammar['unknown'] = {'kept': [1, 2]}
+            spec = chart.to_json()
+            for validate, columnar in product([True, False], repeat=2):
+                loaded = Visualization.from_json(spec, validate=validate,
+                                                 columnar=columnar)
+                nt.assert_equal(loaded.to_json(), spec)
+
+        loaded = Visualization.from_json(spec, columnar=True)
+        nt.assert_is_instance(loaded.data['table'], Data)
+        nt.assert_is_instance(loaded.data['table'].values, ColumnarValues)
+        nt.assert_equal(loaded.scales.attr_name, 'name')
+        nt.assert_is_instance(loaded.scales['x'], Scale)
+        nt.assert_is_instance(loaded.scales['x'].domain, DataRef)
+        nt.assert_equal(loaded.axes.attr_name, 'type')
+        nt.assert_is_instance(loaded.axes['x'], Axis)
+        group = loaded.marks[0]
+        nt.assert_is_instance(group.from_, MarkRef)
+        nt.assert_is_instance(group.from_.transform[0], Transform)
+        nt.assert_is_instance(group.scales[0], Scale)
+        nt.assert_is_instance(group.marks[0].properties.enter.x, ValueRef)
+        nt.assert_equal(loaded.grammar['unknown'], {'kept': [1, 2]})
+
+        path = os.path.join(tempfile.mkdtemp(), 'spec.json')
+        chart.to_json(path)
+        nt.assert_equal(Visualization.from_json(path).to_json(), spec)
+        with open(path) as f:
+            nt.assert_equal(Visualization.from_json(f).to_json(), spec)
+        nt.assert_equal(Data.from_json({'name': 'x', 'values': []}).name,
+                        'x')
+
+        nt.assert_raises(ValueError, Visualization.from_json,
+                         {'width': 'wide'})
+        nt.assert_equal(Visualization.from_json(
+            {'width': 'wide'}, validate=False).width, 'wide')
+        nt.assert_raises(LoadError, Visualization.from_json, '[]')
+
+    def test_to_json_data_path(self):
+        """Data values are written to content-addressed files"""
+        df = pd.DataFrame({'one': [1.0, 2.0, 3.0]})
+        test = Line(df)
+        test.data.append(Data(name='copy', values=test.data[0].values))
+        test.data.append(Data(name='remote', url='http://example.com/d'))
+        spec = test.to_json()
+        data_path = os.path.join(tempfile.mkdtemp(), 'data')
+
+        external = json.loads(test.to_json(data_path=data_path,
+                                           data_url='data/'))
+        nt.assert_equal(test.to_json(), spec)
+        files = os.listdir(data_path)
+        nt.assert_equal(len(files), 1)
+        with open(os.path.join(data_path, files[0]), 'rb') as f:
+            content = f.read()
+        nt.assert_equal(files[0],
+                        hashlib.sha1(content).hexdigest() + '.json')
+        nt.assert_equal(json.loads(content.decode('utf-8')),
+                        test.data['table'].values)
+
+        urls = [d.get('url') for d in external['data']]
+        nt.assert_equal(urls, ['data/' + files[0], 'data/' + files[0],
+                               'http://example.com/d'])
+        nt.assert_true(all('values' not in d for d in external['data']))
+        nt.assert_equal(external['marks'], json.loads(spec)['marks'])
+
+        data = json.loads(test.data[0].to_json(data_path=data_path))
+        nt.assert_equal(data, {'name': 'table',
+                               'url': data_path + '/' + files[0]})
+        nt.assert_equal(len(os.listdir(data_path)), 1)
+
+    def test_export_charts(self):
+        """Batches of charts share one file per distinct data block"""
+        df1 = pd.DataFrame({'one': [1.0, 2.0, 3.0]})
+        df2 = pd.DataFrame({'two': [4.0, 5.0, 6.0]})
+        line, bar = Line(df1), Bar(df1)
+        bar.data['table'] = Data(values=line.data['table'].values)
+        charts = [('line', line), ('bar', bar), ('same', Line(df1)),
+                  ('other', Line(df2))]
+        specs = [vis.to_json() for _, vis in charts]
+        out = tempfile.mkdtemp()
+        data_path = os.path.join(out, 'data')
+
+        report = export_charts(charts, out, data_path, data_url='data')
+        nt.assert_equal(report.specs, [os.path.join(out, name + '.json')
+                                       for name, _ in charts])
+        nt.assert_equal(len(os.listdir(data_path)), 2)
+        nt.assert_equal((report.blocks, report.unique_blocks,
+                         report.written_blocks), (4, 2, 2))
+        sizes = [os.path.getsize(os.path.join(data_path, f))
+                 for f in os.listdir(data_path)]
+        nt.assert_equal(report.unique_bytes, sum(sizes))
+        nt.assert_equal(report.saved_bytes,
+                        report.total_bytes - report.unique_bytes)
+        nt.assert_true(report.saved_bytes > 0)
+        nt.assert_equal([vis.to_json() for _, vis in charts], specs)
+
+        for (name, vis), spec in zip(charts, report.specs):
+            with open(spec) as f:
+                data = json.load(f)['data'][0]
+            nt.assert_true(data['url'].startswith('data/'))
+            with open(os.path.join(out, data['url'])) as f:
+                nt.assert_equal(json.load(f), vis.data[0].values)
+
+        report = export_charts(dict(charts), out, data_path)
+        nt.assert_equal(report.written_blocks, 0)
+
+    def test_diff(self):
+        """Patches match keyed elements and reproduce the new spec"""
+        df = pd.DataFrame({'one': [1.0, 2.0, 3.0], 'two': [4.0, 5.0, 6.0]})
+        old = Line(df)
+        new = copy.deepcopy(old)
+        nt.assert_equal(old.diff(new), [])
+
+        new.data['table'].values[0]['val'] = -1.0
+        new.data['table'].values.append({'idx': 3, 'col': 'one',
+                                         'val': 7.0})
+        new.data.insert(0, Data(name='extra', values=[{'x': 1}]))
+        new.scales.reverse()
+        new.colors(range_=['#000', '#fff'])
+        new.axes[0].title = 'x/y~z'
+
+        ops = old.diff(new)
+        nt.assert_equal(apply_patch(old.grammar(), ops), new.grammar())
+        nt.assert_in({'op': 'replace', 'path': '/data/1/values/0/val',
+                      'value': -1.0}, ops)
+        nt.assert_in({'op': 'add', 'path': '/data/1/values/-',
+                      'value': {'idx': 3, 'col': 'one', 'val': 7.0}}, ops)
+        nt.assert_in({'op': 'add', 'path': '/data/0',
+                      'value': {'name': 'extra', 'values': [{'x': 1}]}},
+                     ops)
+        nt.assert_in({'op': 'replace', 'path': '/scales/0/range',
+                      'value': ['#000', '#fff']}, ops)
+        nt.assert_in({'op': 'add', 'path': '/axes/0/title',
+                      'value': 'x/y~z'}, ops)
+        nt.assert_equal(json.loads(old.to_patch(new)), ops)
+
+        del new.data['table']
+        ops = old.diff(new)
+        nt.assert_in({'op': 'remove', 'path': '/data/0'}, ops)
+        nt.assert_equal(apply_patch(old.grammar(), ops), new.grammar())
+
+        # Values that compare equal in Python but not as JSON
+        for before, after in [([1], [True]), (1, 1.0), ([1, 2], [1.0, 2]),
+                              (0.0, -0.0), ({'a': [0]}, {'a': [False]})]:
+            ops = diff({'v': before}, {'v': after})
+            nt.assert_not_equal(ops, [])
+            nt.assert_equal(json.dumps(apply_patch({'v': before}, ops)),
+                            json.dumps({'v': after}))
+        nt.assert_equal(diff({'v': [float('nan')]}, {'v': [float('nan')]}),
+                        [])
+
+        # Shifted data is replaced whole
+        new = copy.deepcopy(old)
+        new.data['table'].values.insert(0, {'idx': -1, 'col': 'one',
+                                            'val': 0.0})
+        nt.assert_equal(old.diff(new), [
+            {'op': 'replace', 'path': '/data/0/values',
+             'value': new.data['table'].values}])
+
+    def test_to_json_cache(self):
+        """Cached JSON of large data is reused until the data changes"""
+        def expected():
+            return json.dumps(test.grammar, default=encoder.default,
+                              sort_keys=True, indent=2,
+                              separators=(',', ': '))
+
+        df = pd.DataFrame({'one': np.arange(300.0)})
+        test = Line(df)
+        nt.assert_equal(test.to_json(cache=True), expected())
+        fragments = test.data['table'].grammar._fragments
+        cached = fragments['values'][-1]
+        test.colors(brew='Set1')
+        nt.assert_equal(test.to_json(cache=True), expected())
+        nt.assert_is(fragments['values'][-1], cached)
+        nt.assert_equal(test.to_json(pretty_print=False, cache=True),
+                        json.dumps(test.grammar, default=encoder.default,
+                                   sort_keys=True))
+
+        # Appended in place, replaced, and modified in place
+        test.data['table'].values.append({'idx': 300, 'col': 'one',
+                                          'val': -1})
+        nt.assert_equal(test.to_json(cache=True), expected())
+        test.data['table'].values = test.data['table'].values[:-1]
+        nt.assert_equal(test.to_json(cache=True), expected())
+        test.data['table'].values[0]['val'] = -2
+        test.data['table'].grammar.invalidate('values')
+        nt.assert_equal(test.to_json(cache=True), expected())
+        nt.assert_in('"val": -2', test.to_json(cache=True))
+
+        nt.assert_equal(copy.deepcopy(test.data['table']).grammar._fragments,
+                        {})
+
+        # Without the cache, changes in place are always written
+        test.data['table'].values[0]['val'] = 999.0
+        nt.assert_in('"val": 999.0', test.to_json())
+
+    def test_to_json_backends(self):
+        """Every JSON backend matches json.dumps exactly"""
+        df = pd.DataFrame({'one': [1, 2, 3], 'two': [4.5, np.nan, 6.5]})
+        test = Line(df)
+        test.data.append(Data.from_pandas(df, name='columnar',
+                                          columnar=True))
+        test.axis_titles(x=u'été', y='y')
+
+        for pretty_print in [True, False]:
+            dumps_args = ({'indent': 2, 'separators': (',', ': ')}
+                          if pretty_print else {})
+            expected = json.dumps(test.grammar, default=encoder.default,
+                                  sort_keys=True, **dumps_args)
+            for backend in encoder._backends:
+                nt.assert_equal(test.to_json(pretty_print=pretty_print,
+                                             backend=backend), expected)
+                out = StringIO()
+                test.to_json(out, pretty_print=pretty_print,
+                             backend=backend)
+                nt.assert_equal(out.getvalue(), expected)
+
+        nt.assert_equal(str(test.grammar),
+                        json.dumps(test.grammar, default=encoder.default))
+        nt.assert_raises(ValueError, test.to_json, backend='nope')
+        nt.assert_raises(ValueError, encoder.set_backend, 'nope')
+
+        calls = []
+
+        def make_encoder(**kwargs):
+            calls.append(kwargs)
+            return encoder.get_backend('json')(**kwargs)
+
+        encoder.register_backend('counting', make_encoder)
+        try:
+            encoder.set_backend('counting')
+            nt.assert_equal(test.to_json(), test.to_json(backend='json'))
+            nt.assert_equal(len(calls), 1)
+        finally:
+            encoder.set_backend(None)
+            del encoder._backends['counting']
+
 
 class TestData(object):
     """Test the Data class"""
@@ -401,6 +885,40 @@ class TestData(object):
         del test_obj.name
         nt.assert_raises(ValidationError, test_obj.validate)
 
+    def test_validate_cached(self):
+        """Values changed in place are always checked again"""
+        data = Data('table', values=[1, 2.5, {'x': 1}])
+        data.validate()
+        nt.assert_in('values', data.grammar._validated)
+
+        data.values.append('bad')
+        nt.assert_raises(ValidationError, data.validate)
+        data.values.pop()
+        data.validate()
+
+        # Same length, same list
+        data.values[0] = 'bad'
+        with nt.assert_raises(ValidationError) as err:
+            data.validate()
+        nt.assert_equal(err.exception.args[0],
+                        'invalid contents: values row must be one of '
+                        '(float, int, dict)')
+        data.values[0] = 1
+
+        # Passing values are not set again, so their JSON stays cached
+        data.values.extend(range(1000))
+        vis = Visualization()
+        vis.data.append(data)
+        vis.to_json(cache=True)
+        nt.assert_in('values', data.grammar._fragments)
+        data.validate()
+        nt.assert_in('values', data.grammar._fragments)
+
+        # Setting a value drops what was remembered about it
+        data.values = [1, 2]
+        nt.assert_not_in('values', data.grammar._validated)
+        data.validate()
+
     def test_serialize(self):
         """Objects are serialized to JSON-compatible objects"""
 
@@ -431,6 +949,51 @@ class TestData(object):
         nt.assert_equals(err.exception.args[0],
                          'cannot serialize index of type BadType')
 
+    def test_datetime_array_serialize(self):
+        """Datetime arrays are converted to epoch ms in one pass"""
+        old_tz = os.environ.get('TZ')
+        try:
+            for tz in ['UTC', 'America/New_York', 'Australia/Lord_Howe']:
+                os.environ['TZ'] = tz
+                time.tzset()
+                # Crosses the 2013 DST transitions of both local zones
+                for start in ['2013-03-09', '2013-04-06', '2013-10-05',
+                              '2013-11-02']:
+                    index = pd.date_range(start, periods=400, freq='13min')
+                    nt.assert_list_equal(
+                        Data._serialize_array(index),
+                        [Data.serialize(i) for i in index])
+                # Timezone-aware values keep their wall-clock time and DST
+                # flag, as mktime(timetuple()) reads them
+                for zone in ['Europe/Berlin', 'US/Pacific']:
+                    aware = pd.date_range('2013-03-09', periods=600,
+                                          freq='37min', tz=zone)
+                    expected = [int(time.mktime(t.timetuple())) * 1000
+                                for t in aware]
+                    nt.assert_list_equal(Data._serialize_array(aware),
+                                         expected)
+                    nt.assert_list_equal(
+                        Data._serialize_array(pd.Series(aware)), expected)
+                    nt.assert_list_equal([Data.serialize(t) for t in aware],
+                                         expected)
+            os.environ['TZ'] = 'America/New_York'
+            time.tzset()
+            pacific = pd.Timestamp('2013-01-01', tz='US/Pacific')
+            nt.assert_equal(Data.serialize(pacific), 1357016400000)
+            nt.assert_equal(
+                Data._serialize_array(pd.DatetimeIndex([pacific])),
+                [1357016400000])
+        finally:
+            if old_tz is None:
+                del os.environ['TZ']
+            else:
+                os.environ['TZ'] = old_tz
+            time.tzset()
+
+        missing = pd.DatetimeIndex(['2013-01-01', None])
+        nt.assert_list_equal(Data._serialize_array(missing),
+                             [Data.serialize(missing[0]), None])
+
     def test_pandas_series_loading(self):
         """Pandas Series objects are correctly loaded"""
         # Test valid series types
@@ -519,6 +1082,29 @@ class TestData(object):
         # Bad obj
         nt.assert_raises(ValueError, Data.from_pandas, {})
 
+    def test_pandas_dataframe_mixed_dtypes(self):
+        """DataFrames of mixed dtypes match per-cell serialization"""
+        index = pd.date_range('1/2/2000', periods=3)
+        df = pd.DataFrame({'int': np.arange(3, dtype=np.int32),
+                           'float': np.array([0.5, np.nan, 2.5]),
+                           'char': ['a', 'b', 'c'],
+                           'time': pd.date_range('1/1/2013', periods=3),
+                           1: np.array([1, 2, 3], dtype=np.float32)},
+                          index=index)
+        cols = [list(df.iloc[:, j]) for j in range(df.shape[1])]
+        expected = [{'idx': Data.serialize(i), 'col': Data.serialize(k),
+                     'val': Data.serialize(v), 'group': num}
+                    for i, row in zip(index, zip(*cols))
+                    for num, (k, v) in enumerate(zip(df.columns, row))]
+
+        data = Data.from_pandas(df, grouped=True)
+        nt.assert_equal(len(data.values), len(expected))
+        for got, exp in zip(data.values, expected):
+            nt.assert_equal(sorted(got), sorted(exp))
+            nt.assert_equal(type(got['val']), type(exp['val']))
+            if exp['val'] == exp['val']:
+                nt.assert_equal(got, exp)
+
     def test_numpy_loading(self):
         """Numpy ndarray objects are correctly loaded"""
         test_data = np.random.randn(6, 3)
@@ -559,6 +1145,114 @@ class TestData(object):
             Data.from_numpy(test_data, 'test', columns, index)
         nt.assert_equal(err.expected, LoadError)
 
+    def test_columnar_loading(self):
+        """Columnar values match the list of records they replace"""
+        index = pd.date_range('1/2/2000', periods=4)
+        df = pd.DataFrame({'one': np.arange(4), 'two': np.random.randn(4),
+                           'three': list('abcd')}, index=index)
+        series = pd.Series([1.5, 2.5, 3.5], name='s')
+
+        for obj, grouped in [(df, False), (df, True), (series, False)]:
+            records = Data.from_pandas(obj, grouped=grouped)
+            columnar = Data.from_pandas(obj, grouped=grouped, columnar=True)
+            nt.assert_is_instance(columnar.values, ColumnarValues)
+            nt.assert_equal(len(columnar.values), len(records.values))
+            nt.assert_equal(columnar.values, records.values)
+            nt.assert_equal(list(columnar.values), records.values)
+            nt.assert_equal(columnar.values[-1], records.values[-1])
+            nt.assert_equal(columnar.values[1:3], records.values[1:3])
+            nt.assert_equal(columnar.grammar(), records.grammar())
+            nt.assert_equal(columnar.to_json(), records.to_json())
+            columnar.validate()
+
+        values = Data.from_pandas(df, columnar=True).values
+        nt.assert_equal(values.columns, ['one', 'two', 'three'])
+        nt.assert_equal(values.codes.dtype, np.uint8)
+        nt.assert_raises(IndexError, values.__getitem__, 12)
+        nt.assert_raises(ValueError, ColumnarValues, [0], [0, 0], ['a'], [1])
+
+    def test_downsampling(self):
+        """max_points decimates each series, keeping its extremes"""
+        x = np.arange(10.0)
+        y = np.array([0, 1, 0, 5, 0, 1, 0, -4, 0, 1.0])
+        nt.assert_equal(sampling.lttb(x, y, 5).tolist(), [0, 2, 3, 7, 9])
+        nt.assert_equal(sampling.min_max(y, 6).tolist(), [0, 2, 3, 5, 7, 9])
+        nt.assert_equal(sampling.lttb(x, y, 20).tolist(), list(range(10)))
+
+        rng = np.random.RandomState(0)
+        index = pd.date_range('1/1/2000', periods=1000, freq='min')
+        df = pd.DataFrame({'one': rng.randn(1000).cumsum(),
+                           'two': rng.randn(1000)}, index=index)
+        df.iloc[500, 1] = np.nan
+
+        for method in ['lttb', 'minmax']:
+            data = Data.from_pandas(df['one'], max_points=100,
+                                    downsample=method)
+            nt.assert_true(len(data.values) <= 100)
+            idx = [v['idx'] for v in data.values]
+            vals = [v['val'] for v in data.values]
+            nt.assert_equal(idx[0], Data.serialize(index[0]))
+            nt.assert_equal(idx[-1], Data.serialize(index[-1]))
+            nt.assert_equal(idx, sorted(idx))
+            if method == 'minmax':
+                nt.assert_equal(max(vals), df['one'].max())
+                nt.assert_equal(min(vals), df['one'].min())
+
+            data = Data.from_pandas(df, max_points=100, downsample=method)
+            rows = len(data.values) // 2
+            nt.assert_true(100 < rows <= 200)
+            columnar = Data.from_pandas(df, max_points=100, columnar=True,
+                                        downsample=method)
+            nt.assert_equal(columnar.values, data.values)
+
+        nt.assert_raises(ValueError, Data.from_pandas, df, max_points=10,
+                         downsample='every')
+        nt.assert_equal(len(Line(df['one'], max_points='auto',
+                                 width=40).data['table'].values), 80)
+        nt.assert_raises(ValueError, Line, [1, 2, 3], max_points=2)
+
+    def test_lazy_data(self):
+        """LazyData converts its source once, when first needed"""
+        calls = []
+
+        def converter(source):
+            calls.append(source)
+            return Data.from_pandas(source)
+
+        df1 = pd.DataFrame({'one': [1, 2, 3]})
+        df2 = pd.DataFrame({'two': [4, 5]})
+        lazy = LazyData(df1, converter=converter)
+        vis = Visualization(data=KeyedList('name', [lazy]))
+        nt.assert_equal(lazy.name, 'table')
+        nt.assert_is(vis.data['table'], lazy)
+        nt.assert_equal(calls, [])
+
+        expected = Data.from_pandas(df1)
+        nt.assert_equal(vis.grammar()['data'][0], expected.grammar())
+        nt.assert_equal(lazy.values, expected.values)
+        nt.assert_equal(lazy.to_json(), expected.to_json())
+        nt.assert_equal(len(calls), 1)
+
+        lazy.source = df2
+        nt.assert_not_in('values', dict(lazy.grammar))
+        nt.assert_equal(lazy.grammar(), Data.from_pandas(df2).grammar())
+        nt.assert_equal(len(calls), 2)
+
+        for serialize in [lambda d: json.loads(str(d.grammar)),
+                          lambda d: json.loads(d.to_json()),
+                          lambda d: copy.deepcopy(d).grammar()]:
+            lazy.source = df1
+            nt.assert_equal(serialize(lazy), expected.grammar())
+
+        lazy.values = [1, 2]
+        lazy.source = None
+        nt.assert_equal(lazy.grammar(), {'name': 'table'})
+
+        line = Line(df1)
+        nt.assert_is_instance(line.data['table'], LazyData)
+        nt.assert_not_in('values', dict(line.data['table'].grammar))
+        nt.assert_equal(line.data['table'].values, expected.values)
+
     def test_from_mult_iters(self):
         """Test set of iterables"""
         test1 = Data.from_mult_iters(x=[0, 1, 2], y=[3, 4, 5], z=[7, 8, 9],
@@ -610,6 +1304,45 @@ class TestData(object):
         Data.keypairs(((0, 1), (0, 2), (0, 3)))
         Data.keypairs({'A': 10, 'B': 20, 'C': 30, 'D': 40, 'E': 50})
 
+        series = pd.Series([3, 1, 2], index=['c', 'a', 'b'])
+        nt.assert_equal(Data.keypairs(series).values,
+                        [{'x': 'a', 'y': 1}, {'x': 'b', 'y': 2},
+                         {'x': 'c', 'y': 3}])
+        nt.assert_equal(Data.keypairs(series, sort=False).values[0],
+                        {'x': 'c', 'y': 3})
+
+        df = pd.DataFrame({'fips': ['01001', '01003'], 'rate': [5, 7.5],
+                           'count': [10, 20]},
+                          index=pd.to_datetime(['2000-01-01',
+                                                '2000-01-02']))
+        nt.assert_equal(Data.keypairs(df, columns=['fips', 'count']).values,
+                        [{'x': '01001', 'y': 10}, {'x': '01003', 'y': 20}])
+        values = Data.keypairs(df, columns=['rate'], use_index=True).values
+        nt.assert_equal([v['y'] for v in values], [5.0, 7.5])
+        nt.assert_equal(values[0]['x'], Data.serialize(df.index[0]))
+
+    def test_keypairs_numpy(self):
+        pairs = [{'x': 0, 'y': 1.5}, {'x': 1, 'y': 2.5}]
+        for arr in [np.array([1.5, 2.5]), np.array([[1.5], [2.5]])]:
+            nt.assert_equal(Data.keypairs(arr).values, pairs)
+        xy = [{'x': 1, 'y': 10}, {'x': 2, 'y': 20}]
+        for arr in [np.array([[1, 10], [2, 20]]),
+                    np.matrix([[1, 10], [2, 20]]),
+                    np.array([(10, 1), (20, 2)],
+                             dtype=[('y', 'i4'), ('x', 'i8')]),
+                    np.rec.array([(1, 10), (2, 20)],
+                                 dtype=[('a', 'i4'), ('b', 'i4')])]:
+            values = Data.keypairs(arr).values
+            nt.assert_equal(values, xy)
+            nt.assert_equal([type(v['y']) for v in values], [int, int])
+        dates = np.array(['2000-01-01', '2000-01-02'], dtype='datetime64[s]')
+        values = Data.keypairs(np.rec.fromarrays(
+            [dates, [1.0, 2.0]], names='x,y')).values
+        nt.assert_equal(values[0]['x'], Data.serialize(pd.Timestamp(
+            '2000-01-01')))
+        nt.assert_raises(ValueError, Data.keypairs, np.zeros((2, 3)))
+        nt.assert_raises(ValueError, Data.keypairs, np.zeros((2, 2, 2)))
+
 
 class TestTransform(object):
     """Test the Transform class"""
@@ -632,6 +1365,155 @@ class TestTransform(object):
         assert_grammar_typechecking(grammar_types, Transform())
 
 
+class TestEngine(object):
+    """Test the evaluation of transforms in Python"""
+
+    def test_fixtures(self):
+        """Evaluated transforms match the expected tuples of the fixtures"""
+        path = os.path.join(os.path.dirname(__file__), 'data',
+                            'transform_fixtures.json')
+        with open(path) as f:
+            fixtures = json.load(f)
+        for fixture in fixtures:
+            datasets = KeyedList(attr_name='name')
+            for spec in fixture['data']:
+                datasets.append(Data.from_json(spec))
+            result = engine.evaluate(datasets[-1], datasets)
+            nt.assert_equal(json.loads(json.dumps(result)),
+                            fixture['expected'], fixture['name'])
+
+    def test_expressions(self):
+        """Only expressions with unambiguous results are evaluated"""
+        d = {'data': {'x': 2, 's': 'a'}}
+        for expr, result in [('d.data.x * (1 + 2) - 1', 5),
+                             ('-d.data.x / 4', -0.5),
+                             ('d.data.s + "b" === \'ab\'', True),
+                             ('!d.data.y || d.data.x', True),
+                             ('d.data.y == null && d.data.x >= 2', True)]:
+            nt.assert_equal(engine.compile_expression(expr)(d), result)
+        for expr in ['Math.abs(d.data.x)', 'd.data.x ? 1 : 0',
+                     'd.data.x % 2', 'd.data.x = 1']:
+            nt.assert_raises(engine.UnsupportedTransform,
+                             engine.compile_expression, expr)
+        for expr in ['d.data.x < "3"', 'd.data.s + 1', 'd.data.x / 0']:
+            nt.assert_raises(engine.UnsupportedTransform,
+                             engine.compile_expression(expr), d)
+
+    def test_js_string(self):
+        """Numbers are formatted as by Javascript's String()"""
+        for value, string in [(1e-7, '1e-7'), (1.5e-7, '1.5e-7'),
+                              (0.000001, '0.000001'), (0.1, '0.1'),
+                              (2.0, '2'), (-0.0, '0'), (12.5, '12.5'),
+                              (1e20, '100000000000000000000'),
+                              (1e21, '1e+21'), (1.25e21, '1.25e+21'),
+                              (-3.25e-9, '-3.25e-9'), (5e-324, '5e-324'),
+                              (2 ** 53 + 1, '9007199254740992'),
+                              (10 ** 21, '1e+21'), (float('nan'), 'NaN'),
+                              (True, 'true'), (None, 'null')]:
+            nt.assert_equal(engine._js_string(value), string)
+
+    def test_unsupported(self):
+        """Transforms the engine does not implement are left to Vega"""
+        for spec in [{'type': 'window', 'size': 2},
+                     {'type': 'cross'},
+                     {'type': 'truncate', 'value': 'data'},
+                     {'type': 'unique', 'field': 'data', 'as': ['u']}]:
+            nt.assert_raises(engine.UnsupportedTransform,
+                             engine.apply_transforms, [spec],
+                             engine.ingest([1, 2]))
+        nt.assert_false(engine.supported({'type': 'window'}))
+        nt.assert_true(engine.supported({'type': 'fold'}))
+        nt.assert_raises(engine.UnsupportedTransform,
+                         engine.apply_transforms,
+                         [{'type': 'truncate', 'limit': 3}],
+                         engine.ingest([u'\U0001f600 smile']))
+
+    def test_vectorized(self):
+        """Columnar evaluation gives the results of the per-tuple path"""
+        values = [{'x': i % 7 - 3, 'y': i * 0.5 + 1, 'z': i % 3} for i in
+                  range(50)]
+        for expr in ['d.data.x * 2 + d.data.y', 'd.data.x / d.data.y',
+                     '-d.data.y >= d.data.x || !d.data.z',
+                     'd.data.x == 1 && d.data.y', 'd.data.z != 2']:
+            func = engine.compile_expression(expr)
+            expected = [func(d) for d in engine.ingest(values)]
+            result = engine.apply_transforms(
+                [{'type': 'formula', 'field': 'f', 'expr': expr}],
+                engine.ingest(values))
+            nt.assert_equal([json.dumps(d['f']) for d in result],
+                            [json.dumps(v) for v in expected], expr)
+
+        stack = [{'type': 'facet', 'keys': ['data.z']},
+                 {'type': 'stack', 'point': 'data.x', 'height': 'data.y'}]
+        tree = engine.apply_transforms(stack, engine.ingest(values))
+        baselines = {}
+        for group in tree['values']:
+            for d in group['values']:
+                y0 = baselines.get(d['data']['x'], 0)
+                nt.assert_equal((d['y2'], d['y'], d['cy']),
+                                (y0, y0 + d['data']['y'],
+                                 y0 + d['data']['y'] / 2))
+                baselines[d['data']['x']] = d['y']
+
+    def test_fold(self):
+        """Each field of each tuple becomes a tuple of its own"""
+        result = engine.apply_transforms(
+            [{'type': 'fold', 'fields': ['data.a', 'data.b']}],
+            engine.ingest([{'a': 1, 'b': 2}, {'a': 3}]))
+        nt.assert_equal([(d['index'], d['key'], d['value']) for d in result],
+                        [(0, 'data.a', 1), (1, 'data.b', 2),
+                         (2, 'data.a', 3), (3, 'data.b', None)])
+        nt.assert_equal(result[3]['data'], {'a': 3})
+
+    def test_truncate(self):
+        """Text is shortened as by vg.truncate"""
+        text = 'hello world foo bar'
+        for spec, result in [({}, 'hello w...'),
+                             ({'wordbreak': True}, 'hello...'),
+                             ({'position': 'left'}, '...foo bar'),
+                             ({'position': 'middle'}, 'hell...bar'),
+                             ({'ellipsis': '~', 'limit': 6}, 'hello~'),
+                             ({'limit': 30}, text)]:
+            spec = dict({'type': 'truncate', 'limit': 10}, **spec)
+            d = engine.apply_transforms([spec], engine.ingest([text]))[0]
+            nt.assert_equal(d['truncate'], result)
+
+    def test_unique(self):
+        """Distinct values are kept in the order they first appear"""
+        result = engine.apply_transforms(
+            [{'type': 'unique', 'field': 'data.k', 'as': 'k'}],
+            engine.ingest([{'k': 'b'}, {'k': 'a'}, {'k': 'b'}, {'k': 1},
+                           {'k': '1'}]))
+        nt.assert_equal(result, [{'k': 'b'}, {'k': 'a'}, {'k': 1}])
+        nt.assert_raises(engine.UnsupportedTransform,
+                         engine.apply_transforms,
+                         [{'type': 'unique', 'field': 'data'}],
+                         engine.ingest(['toString']))
+
+    def test_evaluate_transforms(self):
+        """Supported transforms are replaced with values"""
+        bar = Bar({'x': [1, 2], 'y': [4, 5], 'z': [7, 9]}, iter_idx='x')
+        nt.assert_equal(bar.evaluate_transforms(), ['stats'])
+        nt.assert_equal(bar.data['stats'].grammar(),
+                        {'name': 'stats',
+                         'values': [{'sum': 11}, {'sum': 14}]})
+        nt.assert_equal(bar.scales['y'].domain.field, 'data.sum')
+        # The stacks are computed by the marks and stay with Vega
+        nt.assert_equal(bar.marks[0].from_.transform[1].type, 'stack')
+
+        vis = Visualization()
+        vis.data['table'] = Data(name='table', values=[1, 2, 3])
+        vis.data['big'] = Data(name='big', source='table', transform=[
+            Transform(type='filter', test='d.data > 1')])
+        vis.data['odd'] = Data(name='odd', source='table', transform=[
+            Transform(type='window', size=2)])
+        vis.marks.append(Mark(type='rect', from_=MarkRef(data='big')))
+        nt.assert_equal(vis.evaluate_transforms(), ['big'])
+        nt.assert_equal(vis.data['big'].grammar(),
+                        {'name': 'big', 'values': [2, 3]})
+        nt.assert_equal(vis.data['odd'].source, 'table')
+
+
 class TestValueRef(object):
     """Test the ValueRef class"""
 
@@ -805,7 +1687,8 @@ class TestAxisProperties(object):
     def test_grammar_typechecking(self):
         """Test grammar of AxisProperties"""
 
-        grammar_types = [('major_ticks', [PropertySet]),
+        grammar_types = [('ticks', [PropertySet]),
+                         ('major_ticks', [PropertySet]),
                          ('minor_ticks', [PropertySet]),
                          ('labels', [PropertySet]),
                          ('axis', [PropertySet])]
@@ -1,21 +1,26 @@
 # -*- coding: utf-8 -*-
 __all__ = [
     "Chart", "Bar", "Line", "Area", "Scatter",
-    "StackedBar", "StackedArea", "GroupedBar", "Map", "Pie", "Word",
-    "Visualization", "Data", "Transform",
+    "StackedBar", "StackedArea", "GroupedBar", "Histogram", "Density2D",
+    "Hexbin", "Map", "Pie", "Word",
+    "Visualization", "Data", "LazyData", "ColumnarValues", "Transform",
     "PropertySet", "ValueRef", "DataRef", "Scale",
     "MarkProperties", "MarkRef", "Mark",
-    "AxisProperties", "Axis", "initialize_notebook"
+    "AxisProperties", "Axis", "initialize_notebook", "trusted",
+    "set_trusted", "export_charts"
 ]
 
-from .core import initialize_notebook
+from .core import initialize_notebook, trusted, set_trusted
 from .charts import (Chart, Bar, Line, Area, Scatter, StackedBar, StackedArea,
-                     GroupedBar, Map, Pie, Word)
+                     GroupedBar, Histogram, Density2D, Hexbin, Map, Pie,
+                     Word)
 from .visualization import Visualization
-from .data import Data
+from .data import Data, LazyData
+from .columnar import ColumnarValues
 from .transforms import Transform
 from .values import ValueRef
 from .properties import PropertySet
 from .scales import DataRef, Scale
 from .marks import MarkProperties, MarkRef, Mark
 from .axes import AxisProperties, Axis
+from .export import export_charts
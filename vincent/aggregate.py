@@ -0,0 +1,251 @@
+# -*- coding: utf-8 -*-
+"""
+
+Aggregate: Vectorized stacking, summing and binning of data, so that the
+browser receives results rather than samples
+
+"""
+from __future__ import (print_function, division)
+
+try:
+    import pandas as pd
+except ImportError:
+    pd = None
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+def _numeric(values):
+    """2-D array of ``values`` with missing values as 0"""
+    values = np.asarray(values)
+    if values.ndim == 1:
+        values = values.reshape(-1, 1)
+    if values.dtype.kind not in 'biuf':
+        raise ValueError('only numeric data can be stacked or summed')
+    if values.dtype.kind == 'f':
+        values = np.where(np.isnan(values), 0, values)
+    return values
+
+
+def stack(values, index=None):
+    """Baseline and top of every value stacked on the values of the
+    previous columns of its row
+
+    This is what a ``stack`` transform with ``point`` on the index and
+    faceted by column computes. Missing values stack as 0.
+
+    Parameters
+    ----------
+    values : 2-D array-like of numbers
+        One row per index value, one column per series.
+    index : array-like or pandas Index, default None
+        Index value of each row. Rows that repeat an index value stack on
+        the earlier rows with that value, so that the top of the last one
+        is the sum computed by :func:`sums`.
+
+    Returns
+    -------
+    (y2, y) : tuple of arrays shaped like ``values``
+        Bottom and top of each stacked value.
+    """
+    values = _numeric(values)
+    y = np.cumsum(values, axis=1)
+    if index is not None and not pd.Index(index).is_unique:
+        totals = pd.Series(y[:, -1])
+        codes = pd.factorize(np.asarray(index))[0]
+        offsets = (totals.groupby(codes, sort=False).cumsum() - totals)
+        y = y + offsets.values.reshape(-1, 1)
+    return y - values, y
+
+
+def sums(index, values):
+    """Total of the values of each index value
+
+    This is what a ``facet`` on the index followed by a ``stats`` transform
+    computes: rows with the same index value are summed together. Missing
+    values count as 0.
+
+    Parameters
+    ----------
+    index : array-like or pandas Index
+        Index value of each row.
+    values : 2-D array-like of numbers
+        One row per index value, one column per series.
+
+    Returns
+    -------
+    pandas Series
+        Sums indexed by the distinct index values, in order of first
+        appearance.
+    """
+    totals = pd.Series(_numeric(values).sum(axis=1), index=index)
+    if totals.index.is_unique:
+        return totals
+    return totals.groupby(level=0, sort=False).sum()
+
+
+def histogram(columns, bins=10, range_=None, weights=None, density=False):
+    """Counts of the values of each column in bins shared by all columns
+
+    Values that are NaN or infinite are left out. This is
+    ``np.histogram``, with the bin edges computed once from the values of
+    all columns.
+
+    Parameters
+    ----------
+    columns : list of array-likes of numbers
+        Samples of each series.
+    bins : int, string or sequence of numbers, default 10
+        Number of equal-width bins, a rule of ``np.histogram_bin_edges``
+        such as ``'auto'``, ``'fd'`` or ``'sturges'``, or the bin edges.
+    range_ : (float, float), default None
+        Lower and upper edge of the bins. Defaults to the range of the
+        values.
+    weights : array-like of numbers, default None
+        Weight of each sample, counted instead of 1. Shared by all columns,
+        which must then have the same length.
+    density : boolean, default False
+        If True, return the values of the probability density function of
+        each column rather than counts.
+
+    Returns
+    -------
+    (edges, counts) : array of ``n + 1`` edges and a list of arrays of
+    ``n`` counts, one per column
+    """
+    columns = [np.asarray(c, dtype=float) for c in columns]
+    if weights is not None:
+        weights = np.asarray(weights, dtype=float)
+        if any(len(c) != len(weights) for c in columns):
+            raise ValueError('weights must be as long as the data')
+    finite = [np.isfinite(c) for c in columns]
+    samples = [c[keep] for c, keep in zip(columns, finite)]
+    edges = np.histogram_bin_edges(
+        np.concatenate(samples) if samples else np.empty(0),
+        bins=bins, range=range_)
+    counts = [np.histogram(s, bins=edges, density=density,
+                           weights=None if weights is None else
+                           weights[keep])[0]
+              for s, keep in zip(samples, finite)]
+    return edges, counts
+
+
+def _points(x, y, range_=None, weights=None):
+    """Finite points within ``range_``, their weights, and the range"""
+    x, y = np.asarray(x, dtype=float), np.asarray(y, dtype=float)
+    if len(x) != len(y):
+        raise ValueError('x and y must have the same length')
+    if weights is not None:
+        weights = np.asarray(weights, dtype=float)
+        if len(weights) != len(x):
+            raise ValueError('weights must be as long as the data')
+    keep = np.isfinite(x) & np.isfinite(y)
+    if range_ is not None:
+        (x0, x1), (y0, y1) = range_
+        keep &= (x >= x0) & (x <= x1) & (y >= y0) & (y <= y1)
+    x, y = x[keep], y[keep]
+    if weights is not None:
+        weights = weights[keep]
+    if range_ is None:
+        range_ = [(x.min(), x.max()) if len(x) else (0.0, 1.0),
+                  (y.min(), y.max()) if len(y) else (0.0, 1.0)]
+    # Give empty extents a width, as np.histogram does
+    range_ = [(lo - 0.5, hi + 0.5) if lo == hi else (lo, hi)
+              for lo, hi in range_]
+    return x, y, weights, [(float(lo), float(hi)) for lo, hi in range_]
+
+
+def grid(x, y, bins=50, range_=None, weights=None):
+    """Counts of points in the cells of a rectangular grid
+
+    Parameters
+    ----------
+    x, y : array-likes of numbers
+        Point coordinates. Points with a NaN or infinite coordinate are
+        left out.
+    bins : int or (int, int), default 50
+        Number of cells along both axes, or along x and y.
+    range_ : ((float, float), (float, float)), default None
+        Extent of the grid along x and y. Points outside are left out.
+        Defaults to the extent of the points.
+    weights : array-like of numbers, default None
+        Weight of each point, counted instead of 1.
+
+    Returns
+    -------
+    (cells, range_) : ``cells`` holds the ``x``, ``x2``, ``y``, ``y2``
+    edges and ``count`` of the non-empty cells, as a dict of arrays;
+    ``range_`` is the extent of the grid.
+    """
+    x, y, weights, range_ = _points(x, y, range_, weights)
+    counts, x_edges, y_edges = np.histogram2d(x, y, bins=bins,
+                                              range=range_, weights=weights)
+    if weights is None:
+        counts = counts.astype(np.int64)
+    i, j = np.nonzero(counts)
+    cells = {'x': x_edges[i], 'x2': x_edges[i + 1],
+             'y': y_edges[j], 'y2': y_edges[j + 1], 'count': counts[i, j]}
+    return cells, range_
+
+
+def hexbin(x, y, width, height, gridsize=50, range_=None, weights=None):
+    """Counts of points in the cells of a hexagonal grid
+
+    The hexagons are regular once the grid is drawn ``width`` by
+    ``height`` pixels. They are pointy-topped, and ``gridsize`` of them
+    span the width. Points are assigned to the nearest hexagon center, as
+    d3.hexbin does.
+
+    Parameters
+    ----------
+    x, y, range_, weights :
+        As for :func:`grid`.
+    width, height : number
+        Size of the plotted grid, in pixels.
+    gridsize : int, default 50
+        Number of hexagons along the x axis.
+
+    Returns
+    -------
+    (cells, range_, radius) : ``cells`` holds the ``x`` and ``y`` centers
+    and ``count`` of the non-empty cells, as a dict of arrays; ``range_``
+    is the extent of the grid and ``radius`` the radius of the hexagons in
+    pixels.
+    """
+    x, y, weights, range_ = _points(x, y, range_, weights)
+    (x0, x1), (y0, y1) = range_
+    dx = width / gridsize
+    radius = dx / np.sqrt(3)
+    dy = 1.5 * radius
+
+    # Position in rows and columns of hexagons, rounded half up like
+    # Javascript's Math.round
+    py = (y - y0) * (height / (y1 - y0)) / dy
+    pj = np.floor(py + 0.5)
+    odd = pj % 2
+    px = (x - x0) * (width / (x1 - x0)) / dx - odd / 2
+    pi = np.floor(px + 0.5)
+    # Near the pointy edges, the nearest center may be in the next row
+    py1 = py - pj
+    px1 = px - pi
+    pi2 = pi + np.where(px < pi, -0.5, 0.5)
+    pj2 = pj + np.where(py < pj, -1, 1)
+    closer = (np.abs(py1) * 3 > 1) & \
+        (px1 ** 2 + py1 ** 2 > (px - pi2) ** 2 + (py - pj2) ** 2)
+    pi = np.where(closer, pi2 + np.where(odd, 0.5, -0.5), pi)
+    pj = np.where(closer, pj2, pj)
+
+    # One count per cell, through integer cell numbers
+    pi, pj = pi.astype(np.int64), pj.astype(np.int64)
+    i0, j0 = (pi.min(), pj.min()) if len(pi) else (0, 0)
+    n_cols = (pi.max() - i0 + 1) if len(pi) else 1
+    counts = np.bincount((pj - j0) * n_cols + (pi - i0), weights=weights)
+    cell = np.nonzero(counts)[0]
+    pj, pi = cell // n_cols + j0, cell % n_cols + i0
+    cells = {'x': x0 + (pi + (pj % 2) / 2) * dx * ((x1 - x0) / width),
+             'y': y0 + pj * dy * ((y1 - y0) / height),
+             'count': counts[cell]}
+    return cells, range_, radius
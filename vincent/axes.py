@@ -16,6 +16,12 @@ class AxisProperties(GrammarClass):
     but instead of events, the axes are divided into major ticks, minor
     ticks, labels, and the axis itself.
     """
+    __slots__ = ()
+
+    @grammar(PropertySet)
+    def ticks(value):
+        """PropertySet : Definition of both major and minor tick marks"""
+
     @grammar(grammar_type=PropertySet, grammar_name='majorTicks')
     def major_ticks(value):
         """PropertySet : Definition of major tick marks"""
@@ -43,6 +49,8 @@ class Axis(GrammarClass):
     Axes are visual cues that the viewer uses to interpret the marks
     representing the data itself.
     """
+    __slots__ = ()
+
     @grammar(str_types)
     def type(value):
         """string : Type of axis - ``'x'`` or ``'y'``"""
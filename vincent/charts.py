@@ -4,8 +4,13 @@
 Charts: Constructors for different chart types in Vega grammar.
 
 """
+import copy
+from functools import partial
+from . import aggregate
+from .core import (GrammarDict, KeyedList, trusted, _copy_shared,
+                   _share_tree, _shareable_types)
 from .visualization import Visualization
-from .data import Data
+from .data import Data, LazyData
 from .transforms import Transform
 from .values import ValueRef
 from .properties import PropertySet
@@ -13,6 +18,7 @@ from .scales import DataRef, Scale
 from .marks import MarkProperties, MarkRef, Mark
 from .axes import Axis
 from .colors import brews
+from ._compat import str_types
 
 try:
     import pandas as pd
@@ -39,11 +45,43 @@ def data_type(data, grouped=False, columns=None, key_on='idx', iter_idx=None):
         raise ValueError('This data type is not supported by Vincent.')
 
 
+# Skeletons of charts, by class and options. See ``Chart.from_template``.
+_templates = {}
+_templates_max = 1000
+
+
+def _template_key(cls, data, options):
+    """Hashable key of the skeleton of ``cls(data, **options)``, or None
+    if an option cannot be part of a key"""
+    items = []
+    for name, value in sorted(options.items()):
+        if isinstance(value, (list, tuple)):
+            if any(type(v) not in _shareable_types for v in value):
+                return None
+            value = tuple(value)
+        elif type(value) not in _shareable_types:
+            return None
+        elif type(value) is float:
+            value = repr(value)
+        items.append((name, type(value), value))
+    # The only thing the skeleton takes from the data: time scales
+    is_datetime = pd is not None and \
+        isinstance(getattr(data, 'index', None), pd.DatetimeIndex)
+    return cls, is_datetime, tuple(items)
+
+
 class Chart(Visualization):
     """Abstract Base Class for all Chart types"""
+    # Whether the scales, axes and marks depend only on the options and
+    # not on the data, so that ``from_template`` can reuse them
+    _templatable = False
+    # Whether the marks can read the stacked offsets written with
+    # ``precompute``
+    _precomputable = False
 
     def __init__(self, data=None, columns=None, key_on='idx', iter_idx=None,
                  width=960, height=500, grouped=False, no_data=False,
+                 max_points=None, downsample='lttb', precompute=False,
                  *args, **kwargs):
         """Create a Vega Chart
 
@@ -70,6 +108,19 @@ class Chart(Visualization):
             Pass true to indicate that data is not being passed. For example,
             this is used for the Map class, where geodata is passed as a
             separate attibute
+        max_points: int or 'auto', default None
+            Pandas data only. Keep at most this many points per series, see
+            :func:`Data.from_pandas`. ``'auto'`` keeps two points per pixel of
+            ``width``. Meant for Line, Scatter and Area charts; bars would be
+            dropped.
+        downsample: string, default 'lttb'
+            Downsampling method, ``'lttb'`` or ``'minmax'``.
+        precompute: boolean, default False
+            Bar and Area charts of pandas data only. Compute aggregates in
+            Python rather than with Vega transforms in the browser: the
+            chart ships stacked ``y2``/``y`` offsets in place of the values,
+            and a ``stats`` data set holding only the sum at each index.
+            Other chart types raise ValueError.
 
         Returns
         -------
@@ -81,37 +132,166 @@ class Chart(Visualization):
 
         """
 
+        if precompute and not self._precomputable:
+            raise ValueError('precompute is not supported by '
+                             + type(self).__name__)
+
         super(Chart, self).__init__(*args, **kwargs)
 
         self.width, self.height = width, height
         self.padding = "auto"
         self.columns = columns
+        self.precompute = precompute
         self._is_datetime = False
+        self._pandas_args = None
+        self._table_args = dict(columns=columns, key_on=key_on,
+                                iter_idx=iter_idx, grouped=grouped,
+                                max_points=max_points, downsample=downsample)
 
         # Data
         if data is None and not no_data:
             raise ValueError('Please initialize the chart with data.')
 
         if not no_data:
-            if isinstance(data, (list, tuple, dict)):
-                if not data:
-                    raise ValueError('The data structure is empty.')
-            if isinstance(data, (pd.Series, pd.DataFrame)):
-                if isinstance(data.index, pd.DatetimeIndex):
-                    self._is_datetime = True
-
-            # Using a vincent KeyedList here
+            self._load_table(data)
+
+    def _load_table(self, data):
+        """Add the ``table`` data set holding ``data``"""
+        args = self._table_args
+        # Template clones do not run __init__
+        self._is_datetime = False
+        self._pandas_args = None
+        if isinstance(data, (list, tuple, dict)):
+            if not data:
+                raise ValueError('The data structure is empty.')
+        if isinstance(data, (pd.Series, pd.DataFrame)):
+            if isinstance(data.index, pd.DatetimeIndex):
+                self._is_datetime = True
+
+        # Using a vincent KeyedList here
+        max_points = args['max_points']
+        if max_points == 'auto':
+            max_points = 2 * self.width
+        if pd and isinstance(data, (pd.Series, pd.DataFrame)) and \
+                not args['iter_idx']:
+            self._pandas_args = dict(columns=args['columns'],
+                                     key_on=args['key_on'],
+                                     max_points=max_points,
+                                     downsample=args['downsample'])
+            # Converted when the values are first needed
+            self.data['table'] = LazyData(data, converter=partial(
+                Data.from_pandas, grouped=args['grouped'],
+                stacked=self.precompute, **self._pandas_args))
+        elif max_points is not None:
+            raise ValueError('max_points requires pandas data')
+        elif self.precompute:
+            raise ValueError('precompute requires pandas data')
+        else:
             self.data['table'] = (
-                data_type(data, grouped=grouped, columns=columns,
-                          key_on=key_on, iter_idx=iter_idx)
+                data_type(data, grouped=args['grouped'],
+                          columns=args['columns'], key_on=args['key_on'],
+                          iter_idx=args['iter_idx'])
                 )
 
+    def _derived_data(self):
+        """Data sets computed from the ``table`` data set"""
+        return []
+
+    @classmethod
+    def from_template(cls, data, **options):
+        """Create a chart like ``cls(data, **options)``, reusing the
+        scales, axes and marks of an earlier chart with the same options
+
+        The first chart of each class and set of options is built as
+        usual, and its scales, axes, marks and legends are kept as a
+        template. Later charts copy that skeleton and only convert their
+        own data, which is much faster when many similar charts are made.
+        The skeleton nodes are shared and copied on write, as with
+        ``GrammarClass.shared``, so charts can still be modified
+        independently, and their JSON is encoded once.
+
+        Options must be strings, numbers, booleans, None or lists of
+        those. With other options, or for chart types whose skeleton
+        depends on the data, such as ``Histogram`` or ``Map``, this is
+        ``cls(data, **options)``.
+
+        Parameters
+        ----------
+        data :
+            Input data, as for :class:`Chart`.
+        **options :
+            Keyword arguments of the chart class.
+
+        Example
+        -------
+        >>>charts = [Line.from_template(df, width=300) for df in frames]
+        """
+        key = _template_key(cls, data, options) if cls._templatable \
+            else None
+        template = _templates.get(key) if key is not None else None
+        if template is None:
+            with trusted(False):
+                chart = cls(data, **options)
+            if key is not None and len(_templates) < _templates_max:
+                _templates[key] = chart._template()
+            return chart
+
+        attrs, grammar = template
+        chart = cls.__new__(cls)
+        chart.__dict__.update(
+            (name, _copy_shared(value)) for name, value in attrs.items())
+        chart.grammar = GrammarDict(
+            (name, _copy_shared(value)) for name, value in grammar.items())
+        chart.data = KeyedList(attr_name='name')
+        chart._load_table(data)
+        chart.data.extend(chart._derived_data())
+        return chart
+
+    def _template(self):
+        """Copies of the attributes and grammar of the chart without its
+        data, with the grammar nodes made shared. The chart itself is left
+        as it is."""
+        grammar = dict((name, value) for name, value in self.grammar.items()
+                       if name != 'data')
+        attrs = dict((name, value) for name, value in self.__dict__.items()
+                     if name not in ('_is_datetime', '_pandas_args'))
+        attrs, grammar = copy.deepcopy((attrs, grammar))
+        _share_tree(list(grammar.values()))
+        return attrs, grammar
+
+    def _sum_field(self):
+        """Field holding the sum at each index in the ``stats`` data"""
+        return 'data.sum' if self.precompute else 'sum'
+
+    def _stack_fields(self):
+        """Fields holding the top and bottom of stacked values"""
+        return ('data.y', 'data.y2') if self.precompute else ('y', 'y2')
+
+    def _stats_data(self):
+        """Data set with the sum of the values at each index"""
+        if self.precompute:
+            return LazyData(self.data['table'].source, name='stats',
+                            converter=partial(Data.stats_from_pandas,
+                                              **self._pandas_args))
+        stats_transform = [Transform(type='facet', keys=['data.idx']),
+                           Transform(type='stats', value='data.val')]
+        return Data(name='stats', source='table', transform=stats_transform)
+
+    def _stacked_from(self):
+        """Source of marks that stack the values of each column"""
+        from_transform = [Transform(type='facet', keys=['data.col'])]
+        if not self.precompute:
+            from_transform.append(Transform(type='stack', point='data.idx',
+                                            height='data.val'))
+        return MarkRef(data='table', transform=from_transform)
+
 
 class Line(Chart):
     """Vega Line chart
 
     Support line and multi-lines chart.
     """
+    _templatable = True
 
     def __init__(self, *args, **kwargs):
         """Create a Vega Line Chart"""
@@ -138,11 +318,11 @@ class Line(Chart):
         from_ = MarkRef(
             data='table',
             transform=[Transform(type='facet', keys=['data.col'])])
-        enter_props = PropertySet(
-            x=ValueRef(scale='x', field="data.idx"),
-            y=ValueRef(scale='y', field="data.val"),
-            stroke=ValueRef(scale="color", field='data.col'),
-            stroke_width=ValueRef(value=2))
+        enter_props = PropertySet.shared(
+            x=ValueRef.shared(scale='x', field="data.idx"),
+            y=ValueRef.shared(scale='y', field="data.val"),
+            stroke=ValueRef.shared(scale="color", field='data.col'),
+            stroke_width=ValueRef.shared(value=2))
         marks = [Mark(type='line',
                       properties=MarkProperties(enter=enter_props))]
         mark_group = Mark(type='group', from_=from_, marks=marks)
@@ -151,6 +331,7 @@ class Line(Chart):
 
 class Scatter(Chart):
     """Vega Scatter chart"""
+    _templatable = True
 
     def __init__(self, *args, **kwargs):
         """Create a Vega Scatter Chart"""
@@ -177,11 +358,11 @@ class Scatter(Chart):
         from_ = MarkRef(
             data='table',
             transform=[Transform(type='facet', keys=['data.col'])])
-        enter_props = PropertySet(
-            x=ValueRef(scale='x', field="data.idx"),
-            y=ValueRef(scale='y', field="data.val"),
-            size=ValueRef(value=100),
-            fill=ValueRef(scale="color", field='data.col'))
+        enter_props = PropertySet.shared(
+            x=ValueRef.shared(scale='x', field="data.idx"),
+            y=ValueRef.shared(scale='y', field="data.val"),
+            size=ValueRef.shared(value=100),
+            fill=ValueRef.shared(scale="color", field='data.col'))
         marks = [Mark(type='symbol',
                       properties=MarkProperties(enter=enter_props))]
         mark_group = Mark(type='group', from_=from_, marks=marks)
@@ -193,6 +374,8 @@ class Bar(Chart):
 
     Support both bar and stacked bar charts.
     """
+    _templatable = True
+    _precomputable = True
 
     def __init__(self, *args, **kwargs):
         """Create a Vega Bar Chart"""
@@ -204,7 +387,7 @@ class Bar(Chart):
             Scale(name='x', type='ordinal', range='width', zero=False,
                   domain=DataRef(data='table', field='data.idx')),
             Scale(name='y', range='height', nice=True,
-                  domain=DataRef(data='stats', field='sum')),
+                  domain=DataRef(data='stats', field=self._sum_field())),
             Scale(name='color', type='ordinal', range='category20',
                   domain=DataRef(data='table', field='data.col'))
         ]
@@ -214,33 +397,34 @@ class Bar(Chart):
                       Axis(type='y', scale='y')]
 
         # Stats Data
-        stats_transform = [Transform(type='facet', keys=['data.idx']),
-                           Transform(type='stats', value='data.val')]
-        stats_data = Data(name='stats', source='table',
-                          transform=stats_transform)
-        self.data.append(stats_data)
+        self.data.extend(self._derived_data())
 
         # Marks
-        from_transform = [
-            Transform(type='facet', keys=['data.col']),
-            Transform(type='stack', point='data.idx', height='data.val')
-        ]
-        from_ = MarkRef(data='table', transform=from_transform)
-        enter_props = PropertySet(
-            x=ValueRef(scale='x', field='data.idx'),
-            y=ValueRef(scale='y', field='y'),
-            y2=ValueRef(scale='y', field='y2'),
-            width=ValueRef(scale='x', band=True, offset=-1),
-            fill=ValueRef(scale='color', field='data.col'))
+        from_ = self._stacked_from()
+        y_field, y2_field = self._stack_fields()
+        enter_props = PropertySet.shared(
+            x=ValueRef.shared(scale='x', field='data.idx'),
+            y=ValueRef.shared(scale='y', field=y_field),
+            y2=ValueRef.shared(scale='y', field=y2_field),
+            width=ValueRef.shared(scale='x', band=True, offset=-1),
+            fill=ValueRef.shared(scale='color', field='data.col'))
         marks = [Mark(type='rect',
                       properties=MarkProperties(enter=enter_props))]
         mark_group = Mark(type='group', from_=from_, marks=marks)
         self.marks.append(mark_group)
+
+    def _derived_data(self):
+        """The ``stats`` data set, see :meth:`Chart._stats_data`"""
+        return [self._stats_data()]
+
+
 StackedBar = Bar
 
 
 class Area(Chart):
     """Vega Area Chart"""
+    _templatable = True
+    _precomputable = True
 
     def __init__(self, *args, **kwargs):
         """Create a Vega Area Chart"""
@@ -253,7 +437,7 @@ class Area(Chart):
             Scale(name='x', type=x_type, range='width', zero=False,
                   domain=DataRef(data='table', field="data.idx")),
             Scale(name='y', range='height', nice=True,
-                  domain=DataRef(data='stats', field='sum')),
+                  domain=DataRef(data='stats', field=self._sum_field())),
             Scale(name='color', type='ordinal', range='category20',
                   domain=DataRef(data='table', field='data.col'))
         ]
@@ -263,33 +447,278 @@ class Area(Chart):
                       Axis(type='y', scale='y')]
 
         # Stats Data
-        stats_transform = [Transform(type='facet', keys=['data.idx']),
-                           Transform(type='stats', value='data.val')]
-        stats_data = Data(name='stats', source='table',
-                          transform=stats_transform)
-        self.data.append(stats_data)
+        self.data.extend(self._derived_data())
 
         # Marks
-        from_transform = [
-            Transform(type='facet', keys=['data.col']),
-            Transform(type='stack', point='data.idx', height='data.val')
-        ]
-        from_ = MarkRef(data='table', transform=from_transform)
-        enter_props = PropertySet(
-            x=ValueRef(scale='x', field='data.idx'),
-            y=ValueRef(scale='y', field='y'),
-            y2=ValueRef(scale='y', field='y2'),
-            interpolate=ValueRef(value='monotone'),
-            fill=ValueRef(scale='color', field='data.col'))
+        from_ = self._stacked_from()
+        y_field, y2_field = self._stack_fields()
+        enter_props = PropertySet.shared(
+            x=ValueRef.shared(scale='x', field='data.idx'),
+            y=ValueRef.shared(scale='y', field=y_field),
+            y2=ValueRef.shared(scale='y', field=y2_field),
+            interpolate=ValueRef.shared(value='monotone'),
+            fill=ValueRef.shared(scale='color', field='data.col'))
         marks = [Mark(type='area',
                       properties=MarkProperties(enter=enter_props))]
         mark_group = Mark(type='group', from_=from_, marks=marks)
         self.marks.append(mark_group)
+
+    def _derived_data(self):
+        """The ``stats`` data set, see :meth:`Chart._stats_data`"""
+        return [self._stats_data()]
+
+
 StackedArea = Area
 
 
+class Histogram(Chart):
+    """Vega Histogram
+
+    The samples are binned in Python, so the chart only holds the bin edges
+    and counts, however many samples there are.
+    """
+
+    def __init__(self, data=None, bins=10, range_=None, weights=None,
+                 density=False, *args, **kwargs):
+        """Create a Vega Histogram. Takes standard Chart class parameters.
+
+        Parameters
+        ----------
+        data: List, Numpy ndarray, Dict of iterables, Pandas Series or
+              Pandas DataFrame
+            Samples to bin. Each key of a dict, or column of a DataFrame,
+            is drawn as a separate series over the same bins.
+        bins: int, string or sequence, default 10
+            Number of equal-width bins, a binning rule such as ``'auto'``,
+            ``'fd'`` or ``'sturges'`` (see ``np.histogram_bin_edges``), or
+            the bin edges.
+        range_: (float, float), default None
+            Lower and upper edge of the bins. Defaults to the range of the
+            samples.
+        weights: array-like or string, default None
+            Weight of each sample, counted instead of 1. For a DataFrame,
+            this can be the name of a column, which is then not binned.
+        density: boolean, default False
+            Plot the probability density of each series rather than counts.
+
+        The table records are ``{'idx': ..., 'end': ..., 'col': ...,
+        'val': ...}``: the left and right edges of a bin, the series and
+        its count. NaN and infinite samples are left out.
+
+        Returns
+        -------
+        Vega Chart
+
+        Example
+        -------
+        >>>vis = vincent.Histogram(np.random.randn(1000000), bins='auto')
+
+        """
+        if data is None or (hasattr(data, '__len__') and not len(data)):
+            raise ValueError('Please initialize the chart with data.')
+        columns = kwargs.get('columns')
+        if pd and isinstance(data, pd.DataFrame):
+            if isinstance(weights, str_types):
+                weights, data = data[weights], data.drop(weights, axis=1)
+            names = list(columns or data.columns)
+            samples = [data[name].values for name in names]
+        elif pd and isinstance(data, pd.Series):
+            names = [data.name or 'data']
+            samples = [data.values]
+        elif isinstance(data, dict):
+            names = list(columns or data.keys())
+            samples = [data[name] for name in names]
+        else:
+            names = ['data']
+            samples = [data]
+
+        super(Histogram, self).__init__(no_data=True, *args, **kwargs)
+
+        edges, counts = aggregate.histogram(samples, bins=bins,
+                                            range_=range_, weights=weights,
+                                            density=density)
+        left, right = edges[:-1].tolist(), edges[1:].tolist()
+        names = [Data.serialize(name) for name in names]
+        self.data['table'] = Data(name='table', values=[
+            {'idx': start, 'end': end, 'col': name, 'val': count}
+            for name, column in zip(names, counts)
+            for start, end, count in zip(left, right, column.tolist())])
+
+        # Scales
+        self.scales += [
+            Scale(name='x', range='width', zero=False,
+                  domain=DataRef(data='table',
+                                 field=['data.idx', 'data.end'])),
+            Scale(name='y', range='height', nice=True,
+                  domain=DataRef(data='table', field='data.val')),
+            Scale(name='color', type='ordinal', range='category20',
+                  domain=DataRef(data='table', field='data.col'))
+        ]
+
+        # Axes
+        self.axes += [Axis(type='x', scale='x'),
+                      Axis(type='y', scale='y')]
+
+        # Marks
+        from_ = MarkRef(
+            data='table',
+            transform=[Transform(type='facet', keys=['data.col'])])
+        enter_props = PropertySet.shared(
+            x=ValueRef.shared(scale='x', field='data.idx', offset=1),
+            x2=ValueRef.shared(scale='x', field='data.end'),
+            y=ValueRef.shared(scale='y', field='data.val'),
+            y2=ValueRef.shared(scale='y', value=0),
+            fill=ValueRef.shared(scale='color', field='data.col'),
+            fill_opacity=ValueRef.shared(value=1 if len(names) == 1 else 0.5))
+        marks = [Mark(type='rect',
+                      properties=MarkProperties(enter=enter_props))]
+        mark_group = Mark(type='group', from_=from_, marks=marks)
+        self.marks.append(mark_group)
+
+
+class Density2D(Chart):
+    """Vega 2D density chart
+
+    Points are counted in the cells of a rectangular or hexagonal grid in
+    Python, and each non-empty cell is drawn colored by its count, so the
+    size of the chart is bounded by the number of cells rather than the
+    number of points.
+    """
+
+    def __init__(self, data=None, x=None, y=None, bins=50, shape='rect',
+                 range_=None, weights=None, brew='YlGnBu', *args, **kwargs):
+        """Create a Vega 2D density chart. Takes standard Chart class
+        parameters.
+
+        Parameters
+        ----------
+        data: Pandas DataFrame, Dict of iterables, or array-like of (x, y)
+              pairs
+            Points to count.
+        x: string, default None
+            DataFrame column or dict key of the x coordinates. Defaults to
+            the first column of a DataFrame, or ``'x'``.
+        y: string, default None
+            DataFrame column or dict key of the y coordinates. Defaults to
+            the second column of a DataFrame, or ``'y'``.
+        bins: int or (int, int), default 50
+            For ``'rect'``, the number of cells along both axes, or along x
+            and y. For ``'hex'``, the number of hexagons across the width.
+        shape: string, default 'rect'
+            ``'rect'`` for a rectangular grid, ``'hex'`` for hexagons.
+        range_: ((float, float), (float, float)), default None
+            Extent of the grid along x and y. Points outside are left out.
+            Defaults to the extent of the points.
+        weights: array-like or string, default None
+            Weight of each point, counted instead of 1. For a DataFrame or
+            dict, this can be the name of a column.
+        brew: string, default 'YlGnBu'
+            Color brewer scale of the counts. See colors.py
+
+        The table records are ``{'x': ..., 'x2': ..., 'y': ..., 'y2': ...,
+        'val': ...}`` cell edges and counts for rectangles, and
+        ``{'x': ..., 'y': ..., 'val': ...}`` hexagon centers and counts.
+        Points with a NaN or infinite coordinate are left out.
+
+        Returns
+        -------
+        Vega Chart
+
+        Example
+        -------
+        >>>vis = vincent.Density2D(np.random.randn(1000000, 2), bins=100)
+
+        """
+        if shape not in ('rect', 'hex'):
+            raise ValueError("shape must be 'rect' or 'hex'")
+        if data is None or (hasattr(data, '__len__') and not len(data)):
+            raise ValueError('Please initialize the chart with data.')
+        if (pd and isinstance(data, pd.DataFrame)) or isinstance(data, dict):
+            if pd and isinstance(data, pd.DataFrame):
+                x = x if x is not None else data.columns[0]
+                y = y if y is not None else data.columns[1]
+            x_values, y_values = data[x or 'x'], data[y or 'y']
+            if isinstance(weights, str_types):
+                weights = data[weights]
+        else:
+            points = np.asarray(data, dtype=float)
+            if points.ndim != 2 or points.shape[1] != 2:
+                raise ValueError('data must be a sequence of (x, y) pairs')
+            x_values, y_values = points[:, 0], points[:, 1]
+
+        super(Density2D, self).__init__(no_data=True, *args, **kwargs)
+
+        if shape == 'rect':
+            cells, range_ = aggregate.grid(x_values, y_values, bins=bins,
+                                           range_=range_, weights=weights)
+            fields = ['x', 'x2', 'y', 'y2']
+        else:
+            cells, range_, radius = aggregate.hexbin(
+                x_values, y_values, self.width, self.height, gridsize=bins,
+                range_=range_, weights=weights)
+            fields = ['x', 'y']
+        columns = [cells[f].tolist() for f in fields]
+        counts = cells['count'].tolist()
+        self.data['table'] = Data(name='table', values=[
+            dict(zip(fields + ['val'], row))
+            for row in zip(*(columns + [counts]))])
+
+        # Scales. The domains are the extent the points were binned over,
+        # so hexagons drawn in pixels line up with their centers.
+        (x0, x1), (y0, y1) = range_
+        self.scales += [
+            Scale(name='x', range='width', zero=False, domain=[x0, x1]),
+            Scale(name='y', range='height', zero=False, domain=[y0, y1]),
+            Scale(name='color', type='quantize', range=brews[brew],
+                  domain=[min(counts) if counts else 0,
+                          max(counts) if counts else 1])
+        ]
+
+        # Axes
+        self.axes += [Axis(type='x', scale='x'),
+                      Axis(type='y', scale='y')]
+
+        # Marks
+        fill = ValueRef.shared(scale='color', field='data.val')
+        if shape == 'rect':
+            enter_props = PropertySet.shared(
+                x=ValueRef.shared(scale='x', field='data.x'),
+                x2=ValueRef.shared(scale='x', field='data.x2'),
+                y=ValueRef.shared(scale='y', field='data.y'),
+                y2=ValueRef.shared(scale='y', field='data.y2'),
+                fill=fill)
+        else:
+            enter_props = PropertySet.shared(
+                x=ValueRef.shared(scale='x', field='data.x'),
+                y=ValueRef.shared(scale='y', field='data.y'),
+                path=ValueRef.shared(value=_hexagon(radius)),
+                fill=fill)
+        self.marks.append(Mark(type='rect' if shape == 'rect' else 'path',
+                               from_=MarkRef(data='table'),
+                               properties=MarkProperties(enter=enter_props)))
+
+
+class Hexbin(Density2D):
+    """Vega hexbin chart: a :class:`Density2D` chart with hexagonal cells"""
+
+    def __init__(self, *args, **kwargs):
+        """Create a Vega hexbin chart. Takes the parameters of
+        :class:`Density2D`, with ``shape`` defaulting to ``'hex'``."""
+        kwargs.setdefault('shape', 'hex')
+        super(Hexbin, self).__init__(*args, **kwargs)
+
+
+def _hexagon(radius):
+    """SVG path of a pointy-topped hexagon centered on the origin"""
+    angles = np.arange(6) * np.pi / 3
+    corners = zip(np.sin(angles) * radius, -np.cos(angles) * radius)
+    return 'M' + 'L'.join('{0:.2f},{1:.2f}'.format(cx + 0.0, cy + 0.0)
+                          for cx, cy in corners) + 'Z'
+
+
 class GroupedBar(Chart):
     """Vega Grouped Bar Chart"""
+    _templatable = True
 
     def __init__(self, data=None, data_labels=False,
                  label_color='#000000', fontsize=12, baseline='top',
@@ -332,25 +761,25 @@ class GroupedBar(Chart):
 
         # Marks
         mark_props = MarkProperties(
-            enter=PropertySet(
-                x=ValueRef(scale='pos', field='data.col'),
-                y=ValueRef(scale='y', field='data.val'),
-                y2=ValueRef(scale='y', value=0),
-                width=ValueRef(scale='pos', band=True, offset=-1),
-                fill=ValueRef(scale='color', field='data.col')))
+            enter=PropertySet.shared(
+                x=ValueRef.shared(scale='pos', field='data.col'),
+                y=ValueRef.shared(scale='y', field='data.val'),
+                y2=ValueRef.shared(scale='y', value=0),
+                width=ValueRef.shared(scale='pos', band=True, offset=-1),
+                fill=ValueRef.shared(scale='color', field='data.col')))
         mark_group_marks = [Mark(type='rect', properties=mark_props)]
 
         if self.data_labels:
             mark_props_text = MarkProperties(
-                enter=PropertySet(
-                    x=ValueRef(scale='pos', field='data.col', offset=0),
-                    dx=ValueRef(scale='pos', band=True, mult=0.5),
-                    y=ValueRef(scale='y', field='data.val'),
-                    align=ValueRef(value='center'),
-                    text=ValueRef(field='data.val'),
-                    baseline=ValueRef(value=self.baseline),
-                    fill=ValueRef(value=self.label_color),
-                    font_size=ValueRef(value=self.fontsize)))
+                enter=PropertySet.shared(
+                    x=ValueRef.shared(scale='pos', field='data.col', offset=0),
+                    dx=ValueRef.shared(scale='pos', band=True, mult=0.5),
+                    y=ValueRef.shared(scale='y', field='data.val'),
+                    align=ValueRef.shared(value='center'),
+                    text=ValueRef.shared(field='data.val'),
+                    baseline=ValueRef.shared(value=self.baseline),
+                    fill=ValueRef.shared(value=self.label_color),
+                    font_size=ValueRef.shared(value=self.fontsize)))
 
             mark_group_marks.append(Mark(type='text',
                                          properties=mark_props_text))
@@ -359,8 +788,9 @@ class GroupedBar(Chart):
             data='table',
             transform=[Transform(type='facet', keys=['data.idx'])])
         mark_group_props = MarkProperties(
-            enter=PropertySet(x=ValueRef(scale='x', field='key'),
-                              width=ValueRef(scale='x', band=True)))
+            enter=PropertySet.shared(
+                x=ValueRef.shared(scale='x', field='key'),
+                width=ValueRef.shared(scale='x', band=True)))
         mark_group_scales = [Scale(name="pos", range="width", type="ordinal",
                              domain=DataRef(field="data.col"))]
         mark_group = Mark(
@@ -484,14 +914,14 @@ class Map(Chart):
 
             geo_from = MarkRef(data=dat['name'])
 
-            enter_props = PropertySet(
-                stroke=ValueRef(value='#000000'),
-                path=ValueRef(field='path')
+            enter_props = PropertySet.shared(
+                stroke=ValueRef.shared(value='#000000'),
+                path=ValueRef.shared(field='path')
                 )
 
             if get_brewer:
-                update_props = PropertySet(
-                    fill=ValueRef(scale='color', field='value.data.y')
+                update_props = PropertySet.shared(
+                    fill=ValueRef.shared(scale='color', field='value.data.y')
                     )
                 domain = [Data.serialize(data[data_bind].min()),
                           Data.serialize(data[data_bind].quantile(0.95))]
@@ -499,7 +929,8 @@ class Map(Chart):
                               range=brews[brew])
                 self.scales['color'] = scale
             else:
-                update_props = PropertySet(fill=ValueRef(value='steelblue'))
+                update_props = PropertySet.shared(
+                    fill=ValueRef.shared(value='steelblue'))
 
             mark_props = MarkProperties(enter=enter_props, update=update_props)
 
@@ -529,6 +960,7 @@ class Map(Chart):
 
 class Pie(Chart):
     """Vega Pie chart"""
+    _templatable = True
 
     def __init__(self, data=None, inner_radius=0, outer_radius=None,
                  *args, **kwargs):
@@ -545,15 +977,15 @@ class Pie(Chart):
         transform = MarkRef(
             data="table", transform=[Transform(type="pie", value="data.val")])
 
-        enter_props = PropertySet(
-            x=ValueRef(group="width", mult=0.5),
-            y=ValueRef(group="height", mult=0.5),
-            start_angle=ValueRef(field="startAngle"),
-            end_angle=ValueRef(field="endAngle"),
-            inner_radius=ValueRef(value=inner_radius),
-            outer_radius=ValueRef(value=outer_radius),
-            stroke=ValueRef(value="white"),
-            fill=ValueRef(scale="color", field="data.idx"))
+        enter_props = PropertySet.shared(
+            x=ValueRef.shared(group="width", mult=0.5),
+            y=ValueRef.shared(group="height", mult=0.5),
+            start_angle=ValueRef.shared(field="startAngle"),
+            end_angle=ValueRef.shared(field="endAngle"),
+            inner_radius=ValueRef.shared(value=inner_radius),
+            outer_radius=ValueRef.shared(value=outer_radius),
+            stroke=ValueRef.shared(value="white"),
+            fill=ValueRef.shared(scale="color", field="data.idx"))
 
         mark = Mark(type="arc", from_=transform,
                     properties=MarkProperties(enter=enter_props))
@@ -582,16 +1014,16 @@ class Word(Chart):
         self.data[0].transform = wordcloud_transform
 
         # Marks
-        enter_props = PropertySet(
-            x=ValueRef(field="x"),
-            y=ValueRef(field="y"),
-            angle=ValueRef(field="angle"),
-            align=ValueRef(value="center"),
-            baseline=ValueRef(value="middle"),
-            font=ValueRef(field="font"),
-            font_size=ValueRef(field="fontSize"),
-            text=ValueRef(field="data.idx"),
-            fill=ValueRef(scale="color", field="data.idx"))
+        enter_props = PropertySet.shared(
+            x=ValueRef.shared(field="x"),
+            y=ValueRef.shared(field="y"),
+            angle=ValueRef.shared(field="angle"),
+            align=ValueRef.shared(value="center"),
+            baseline=ValueRef.shared(value="middle"),
+            font=ValueRef.shared(field="font"),
+            font_size=ValueRef.shared(field="fontSize"),
+            text=ValueRef.shared(field="data.idx"),
+            fill=ValueRef.shared(scale="color", field="data.idx"))
 
         mark = Mark(type="text", from_=MarkRef(data="table"),
                     properties=MarkProperties(enter=enter_props))
@@ -0,0 +1,192 @@
+# -*- coding: utf-8 -*-
+"""
+
+Columnar: Compact, typed storage for long-form ``Data`` values
+
+"""
+from __future__ import (print_function, division)
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+_array_types = {float: 'float64', int: 'int64', bool: 'bool'}
+
+
+def _typed(values):
+    """Array of ``values`` whose ``tolist`` returns them unchanged"""
+    types = set(map(type, values))
+    if len(types) == 1:
+        dtype = _array_types.get(types.pop())
+        if dtype is not None:
+            try:
+                return np.array(values, dtype=dtype)
+            except OverflowError:
+                pass
+    array = np.empty(len(values), dtype=object)
+    for i, value in enumerate(values):
+        # Item by item, so that NumPy does not unpack nested lists
+        array[i] = value
+    return array
+
+
+class ColumnarValues(object):
+    """Long-form ``idx``/``col``/``val`` records stored as typed arrays
+
+    Holding every data point as a ``{'idx': ..., 'col': ..., 'val': ...}``
+    dict costs a few hundred bytes per point. This container keeps the
+    ``idx`` and ``val`` fields as NumPy arrays and dictionary-encodes the
+    ``col`` field as integer codes into a list of column labels, so a point
+    costs a handful of bytes until it is serialized.
+
+    To existing code it behaves like the list of records it represents:
+    ``len``, iteration, indexing and comparison with lists all work on
+    record dicts, which are built on demand.
+    """
+    _batch_size = 65536
+
+    def __init__(self, idx, codes, columns, val, grouped=False):
+        """Initialize ColumnarValues
+
+        Parameters
+        ----------
+        idx : array-like
+            Index value of each record.
+        codes : array-like of ints
+            Position in ``columns`` of each record's column label.
+        columns : list
+            Distinct column labels.
+        val : array-like
+            Value of each record.
+        grouped : boolean, default False
+            If True, records carry a ``group`` field equal to their column
+            code, as :func:`Data.from_pandas` does with ``grouped=True``.
+
+        Elements of ``idx``, ``val`` and ``columns`` must already be
+        JSON-serializable once converted with ``tolist``.
+        """
+        self.idx = np.asarray(idx)
+        self.codes = np.asarray(codes, dtype=np.min_scalar_type(
+            max(len(columns) - 1, 0)))
+        self.columns = list(columns)
+        self.val = np.asarray(val)
+        self.grouped = grouped
+        if not len(self.idx) == len(self.codes) == len(self.val):
+            raise ValueError('idx, codes and val must have the same length')
+
+    @classmethod
+    def from_wide(cls, index, columns, values, grouped=False):
+        """Build row-major records from an index and one array per column
+
+        Parameters
+        ----------
+        index : array-like
+            Index values, one per row.
+        columns : list
+            Column labels.
+        values : list of array-likes
+            One array per column, each as long as ``index``.
+        grouped : boolean, default False
+            See :class:`ColumnarValues`.
+        """
+        n_rows, n_cols = len(index), len(columns)
+        values = [np.asarray(v) for v in values]
+        if len(set(v.dtype for v in values)) > 1:
+            # Don't let NumPy upcast ints to floats or numbers to strings
+            values = [v.astype(object) for v in values]
+        if n_rows and n_cols:
+            stacked = np.column_stack(values).ravel()
+        else:
+            stacked = np.empty(0)
+        return cls(idx=np.repeat(np.asarray(index), n_cols),
+                   codes=np.tile(np.arange(n_cols), n_rows),
+                   columns=columns, val=stacked, grouped=grouped)
+
+    @classmethod
+    def from_records(cls, records):
+        """Build from a list of ``idx``/``col``/``val`` record dicts
+
+        Records may also carry a ``group`` field, as written by
+        ``grouped=True``. Values of a field that all have the same
+        numeric type are stored in a typed array; otherwise in an object
+        array, so the records are reproduced exactly.
+
+        Returns None if the records are not in that form.
+        """
+        try:
+            grouped = bool(records) and 'group' in records[0]
+            idx = [r['idx'] for r in records]
+            val = [r['val'] for r in records]
+            positions = {}
+            codes = [positions.setdefault(r['col'], len(positions))
+                     for r in records]
+            if grouped and any(r['group'] != code
+                               for r, code in zip(records, codes)):
+                return None
+        except (KeyError, TypeError):
+            # Other records, or unhashable column labels
+            return None
+        if set(map(len, records)) - {4 if grouped else 3}:
+            return None
+        columns = sorted(positions, key=positions.get)
+        return cls(idx=_typed(idx), codes=codes, columns=columns,
+                   val=_typed(val), grouped=grouped)
+
+    def _records(self, start, stop):
+        """Build the record dicts for positions ``start:stop``"""
+        columns = self.columns
+        idx = self.idx[start:stop].tolist()
+        codes = self.codes[start:stop].tolist()
+        val = self.val[start:stop].tolist()
+        if self.grouped:
+            return [{'idx': i, 'col': columns[c], 'val': v, 'group': c}
+                    for i, c, v in zip(idx, codes, val)]
+        return [{'idx': i, 'col': columns[c], 'val': v}
+                for i, c, v in zip(idx, codes, val)]
+
+    def batches(self, size=None):
+        """Yield the records as lists of at most ``size`` dicts"""
+        size = size or self._batch_size
+        for start in range(0, len(self), size):
+            yield self._records(start, start + size)
+
+    def to_records(self):
+        """Return the full list of record dicts"""
+        return self._records(0, len(self))
+
+    def __len__(self):
+        return len(self.codes)
+
+    def __iter__(self):
+        for batch in self.batches():
+            for record in batch:
+                yield record
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            start, stop, step = key.indices(len(self))
+            if step == 1:
+                return self._records(start, stop)
+            return [self[i] for i in range(start, stop, step)]
+        if key < 0:
+            key += len(self)
+        if not 0 <= key < len(self):
+            raise IndexError('ColumnarValues index out of range')
+        return self._records(key, key + 1)[0]
+
+    def __eq__(self, other):
+        if isinstance(other, (list, ColumnarValues)):
+            return len(self) == len(other) and list(self) == list(other)
+        return NotImplemented
+
+    def __ne__(self, other):
+        equal = self.__eq__(other)
+        return equal if equal is NotImplemented else not equal
+
+    __hash__ = None
+
+    def __repr__(self):
+        return '<ColumnarValues: {0} records, {1} columns>'.format(
+            len(self), len(self.columns))
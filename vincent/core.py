@@ -5,7 +5,9 @@ Core: The core functionality for Vincent to map to Vega grammar
 
 """
 from __future__ import (print_function, division)
+import copy
 import json
+from contextlib import contextmanager
 from string import Template
 from pkg_resources import resource_string
 
@@ -19,6 +21,8 @@ try:
 except ImportError:
     np = None
 
+from . import encoder, patch
+from .columnar import ColumnarValues
 from ._compat import str_types
 
 
@@ -124,38 +128,139 @@ class ValidationError(Exception):
     pass
 
 
+# Whether grammar property setters skip type checks and validators. See
+# ``trusted``.
+_trusted = False
+
+
+def set_trusted(enabled=True):
+    """Turn trusted construction on or off
+
+    In trusted mode, setting a grammar property stores the value without
+    type checks or validators. Unknown ``GrammarClass`` keyword arguments
+    are still rejected, as that check is cheap. This speeds up building
+    many charts from code known to produce valid grammar. Call
+    ``validate`` on the result to check it once.
+
+    Parameters
+    ----------
+    enabled : boolean, default True
+        True to skip checks, False to check every value again.
+
+    Returns
+    -------
+    boolean : whether trusted mode was on before
+    """
+    global _trusted
+    previous, _trusted = _trusted, bool(enabled)
+    return previous
+
+
+@contextmanager
+def trusted(enabled=True):
+    """Context manager that turns trusted construction on, see
+    :func:`set_trusted`, and restores the previous mode on exit
+
+    Examples
+    --------
+    >>> with trusted():
+    ...     charts = [GroupedBar(df) for df in frames]
+    >>> for chart in charts:
+    ...     chart.validate()
+    """
+    previous = set_trusted(enabled)
+    try:
+        yield
+    finally:
+        set_trusted(previous)
+
+
 class KeyedList(list):
     """A list that can optionally be indexed by the ``name`` attribute of
-    its elements"""
+    its elements
+
+    Keyed access goes through a key-to-position map that is updated as
+    elements are appended and rebuilt after other changes, so looking up a
+    key does not scan the list. Duplicate keys are recorded when elements
+    are added. If the key attribute of an element is changed in place, the
+    map is rebuilt by the next lookup that finds it stale."""
+    _index = None
+    _duplicates = False
+
     def __init__(self, attr_name='name', *args, **kwargs):
         self.attr_name = attr_name
         list.__init__(self, *args, **kwargs)
 
+    def __getstate__(self):
+        # The map holds positions only; rebuild it after copying
+        return {'attr_name': self.attr_name}
+
     def get_keys(self):
         keys = [getattr(x, self.attr_name) for x in self]
         if len(keys) != len(set(keys)):
             raise ValidationError('duplicate keys found')
         return keys
 
+    def _invalidate(self):
+        self._index = None
+
+    def _rebuild(self):
+        index = {}
+        for i, x in enumerate(list.__iter__(self)):
+            index.setdefault(getattr(x, self.attr_name), i)
+        self._index = index
+        self._duplicates = len(index) != len(self)
+
+    def _add_keys(self, start):
+        """Add the elements from position ``start`` on to the map"""
+        if self._index is None:
+            return
+        index = self._index
+        for i in range(start, len(self)):
+            try:
+                key = getattr(list.__getitem__(self, i), self.attr_name)
+            except AttributeError:
+                # Leave the error to the next keyed access, as before
+                self._invalidate()
+                return
+            if key in index:
+                self._duplicates = True
+            else:
+                index[key] = i
+
+    def _position(self, key):
+        """Position of the element keyed ``key``, or None if missing"""
+        if self._index is None or self._duplicates:
+            self._rebuild()
+        position = self._index.get(key)
+        if position is None or position >= len(self) or getattr(
+                list.__getitem__(self, position), self.attr_name) != key:
+            self._rebuild()
+            position = self._index.get(key)
+        if self._duplicates:
+            raise ValidationError('duplicate keys found')
+        return position
+
     def __getitem__(self, key):
         if isinstance(key, str_types):
-            keys = self.get_keys()
-            if key not in keys:
+            position = self._position(key)
+            if position is None:
                 raise KeyError(' "{0}" is an invalid key'.format(key))
             else:
-                return self[keys.index(key)]
+                return list.__getitem__(self, position)
         else:
             return list.__getitem__(self, key)
 
     def __delitem__(self, key):
         if isinstance(key, str_types):
-            keys = self.get_keys()
-            if key not in keys:
+            position = self._position(key)
+            if position is None:
                 raise KeyError(' "{0}" is an invalid key'.format(key))
             else:
-                list.__delitem__(self, keys.index(key))
+                list.__delitem__(self, position)
         else:
-            return list.__delitem__(self, key)
+            list.__delitem__(self, key)
+        self._invalidate()
 
     def __setitem__(self, key, value):
         if isinstance(key, str_types):
@@ -167,13 +272,92 @@ class KeyedList(list):
                     "key must be equal to '" + self.attr_name +
                     "' attribute")
 
-            keys = self.get_keys()
-            if key not in keys:
+            position = self._position(key)
+            if position is None:
                 self.append(value)
             else:
-                list.__setitem__(self, keys.index(key), value)
+                list.__setitem__(self, position, value)
         else:
             list.__setitem__(self, key, value)
+            self._invalidate()
+
+    def append(self, value):
+        list.append(self, value)
+        self._add_keys(len(self) - 1)
+
+    def extend(self, values):
+        start = len(self)
+        list.extend(self, values)
+        self._add_keys(start)
+
+    def __iadd__(self, values):
+        self.extend(values)
+        return self
+
+    def insert(self, position, value):
+        list.insert(self, position, value)
+        self._invalidate()
+
+    def pop(self, *args):
+        value = list.pop(self, *args)
+        self._invalidate()
+        return value
+
+    def remove(self, value):
+        list.remove(self, value)
+        self._invalidate()
+
+    def sort(self, *args, **kwargs):
+        list.sort(self, *args, **kwargs)
+        self._invalidate()
+
+    def reverse(self):
+        list.reverse(self)
+        self._invalidate()
+
+    def __imul__(self, n):
+        list.__imul__(self, n)
+        self._invalidate()
+        return self
+
+    if hasattr(list, 'clear'):
+        def clear(self):
+            list.clear(self)
+            self._invalidate()
+
+    # Python 2 routes simple slices through these
+    def __setslice__(self, i, j, values):
+        list.__setslice__(self, i, j, values)
+        self._invalidate()
+
+    def __delslice__(self, i, j):
+        list.__delslice__(self, i, j)
+        self._invalidate()
+
+
+class GrammarProperty(property):
+    """Property created by :func:`grammar`
+
+    Attributes
+    ----------
+    grammar_name : string
+        Key of the property in the ``grammar`` dict.
+    grammar_type : type or tuple of types
+        Allowed types of the value, or None if it is not type-checked.
+    validator : function
+        The decorated validator function.
+    """
+    grammar_name = None
+    grammar_type = None
+    validator = None
+
+    def check(self, value):
+        """Raise ValueError if ``value`` is not valid, as the setter would,
+        without setting it"""
+        if isinstance(self.grammar_type, (type, tuple)):
+            _assert_is_type(self.validator.__name__, value,
+                            self.grammar_type)
+        self.validator(value)
 
 
 def grammar(grammar_type=None, grammar_name=None):
@@ -215,19 +399,48 @@ def grammar(grammar_type=None, grammar_name=None):
     """
     def grammar_creator(validator, name):
         def setter(self, value):
-            if isinstance(grammar_type, (type, tuple)):
-                _assert_is_type(validator.__name__, value, grammar_type)
-            validator(value)
-            self.grammar[name] = value
+            if not _trusted:
+                if isinstance(grammar_type, (type, tuple)):
+                    _assert_is_type(validator.__name__, value, grammar_type)
+                validator(value)
+            try:
+                grammar = self._grammar
+            except AttributeError:
+                # Any class with a ``grammar`` dict, see above
+                grammar = self.grammar
+            if type(grammar) is _SharedGrammarDict:
+                grammar = self._unshare()
+            grammar[name] = value
 
         def getter(self):
-            return self.grammar.get(name, None)
+            try:
+                grammar = self._grammar
+            except AttributeError:
+                grammar = self.grammar
+            value = grammar.get(name, None)
+            if type(grammar) is _SharedGrammarDict and \
+                    isinstance(value, (GrammarClass, list, dict)):
+                # Hand out a value of our own, so that changes to it are not
+                # seen by the other nodes sharing the grammar
+                value = self._unshare().get(name)
+            return value
 
         def deleter(self):
-            if name in self.grammar:
-                del self.grammar[name]
+            try:
+                grammar = self._grammar
+            except AttributeError:
+                grammar = self.grammar
+            if name in grammar:
+                if type(grammar) is _SharedGrammarDict:
+                    grammar = self._unshare()
+                del grammar[name]
 
-        return property(getter, setter, deleter, validator.__doc__)
+        prop = GrammarProperty(getter, setter, deleter, validator.__doc__)
+        prop.grammar_name = name
+        prop.validator = validator
+        if isinstance(grammar_type, (type, tuple)):
+            prop.grammar_type = grammar_type
+        return prop
 
     if isinstance(grammar_type, (type, tuple)):
         # If grammar_type is a type, return another decorator.
@@ -254,25 +467,207 @@ class GrammarDict(dict):
     """The Vega Grammar. When called, obj.grammar returns a Python data
     structure for the Vega Grammar. When printed, obj.grammar returns a
     string representation."""
+    __slots__ = ('_loader', '_fragments', '_validated')
+    # Whether the dict is shared by several nodes. See
+    # ``GrammarClass.shared``.
+    _shared = False
 
     def __init__(self, *args, **kwargs):
         """Standard Dict init"""
         dict.__init__(self, *args, **kwargs)
+        # Called once before the dict is first read for serialization, to
+        # fill in values whose computation was deferred. See ``LazyData``.
+        self._loader = None
+        # JSON of large values, by key. See ``encoder.iterencode``.
+        self._fragments = {}
+        # Values that passed validation, by key. See
+        # ``GrammarClass.validate``.
+        self._validated = {}
+
+    def _load(self):
+        """Run the pending loader, if any"""
+        if self._loader is not None:
+            loader, self._loader = self._loader, None
+            loader()
+
+    def __reduce__(self):
+        # Copies and pickles start without cached JSON or validation
+        self._load()
+        return (self.__class__, (dict(self),))
+
+    def __setitem__(self, key, value):
+        dict.__setitem__(self, key, value)
+        # Inlined ``invalidate``: this runs for every property set
+        self._fragments.pop(key, None)
+        self._validated.pop(key, None)
+
+    def __delitem__(self, key):
+        dict.__delitem__(self, key)
+        self.invalidate(key)
+
+    def pop(self, key, *args):
+        self.invalidate(key)
+        return dict.pop(self, key, *args)
+
+    def popitem(self):
+        key, value = dict.popitem(self)
+        self.invalidate(key)
+        return key, value
+
+    def update(self, *args, **kwargs):
+        dict.update(self, *args, **kwargs)
+        self.invalidate()
+
+    def clear(self):
+        dict.clear(self)
+        self.invalidate()
+
+    def invalidate(self, key=None):
+        """Drop what is cached about a value that was modified in place
+
+        ``to_json(cache=True)`` caches the JSON of large lists, such as
+        ``Data.values``, until the key they are stored under is set again.
+        A value whose length changes is always encoded again. Call this
+        after changing such a value in place without changing its length.
+        ``validate`` needs no such call: it checks lists and dicts again
+        every time.
+
+        Parameters
+        ----------
+        key : string, default None
+            Key whose cached JSON and remembered validation are dropped. If
+            None, drop all of them.
+        """
+        if key is None:
+            self._fragments.clear()
+            self._validated.clear()
+        else:
+            self._fragments.pop(key, None)
+            self._validated.pop(key, None)
 
     def encoder(self, obj):
         """Encode grammar objects for each level of hierarchy"""
-        if hasattr(obj, 'grammar'):
-            return obj.grammar
+        return encoder.default(obj)
 
     def __call__(self):
-        """When called, return the Vega grammar as a Python data structure."""
+        """When called, return the Vega grammar as a Python data structure.
 
-        return json.loads(json.dumps(self, default=self.encoder))
+        The structure is built directly from the grammar tree; it is the
+        same as the result of a JSON round trip, without the JSON text."""
+
+        self._load()
+        return encoder.materialize(self)
 
     def __str__(self):
         """String representation of Vega Grammar"""
 
-        return json.dumps(self, default=self.encoder)
+        self._load()
+        return encoder.dumps(self)
+
+
+class _SharedGrammarDict(GrammarDict):
+    """Read-only ``GrammarDict`` shared by the nodes that
+    ``GrammarClass.shared`` returns. Nodes copy it before changing it, or
+    before handing it out as their ``grammar``."""
+    __slots__ = ()
+    _shared = True
+
+    def __reduce__(self):
+        # Copies belong to a single node
+        return (GrammarDict, (dict(self),))
+
+    def _read_only(self, *args, **kwargs):
+        raise TypeError('a shared grammar cannot be modified; set the '
+                        'properties of its node instead')
+
+    __setitem__ = __delitem__ = pop = popitem = setdefault = update = \
+        clear = _read_only
+
+
+# Grammars of shared nodes, by class and arguments. See
+# ``GrammarClass.shared``.
+_shared_grammars = {}
+_shared_max = 10000
+_shareable_types = frozenset(str_types + (int, float, bool, type(None)))
+
+
+def _content_key(value):
+    """Hashable key of a shareable value, built from its contents, or None
+    if it cannot be shared"""
+    value_type = type(value)
+    if value_type in _shareable_types:
+        # 1, 1.0 and True, or 0.0 and -0.0, encode differently
+        if value_type is float:
+            value = repr(value)
+        return value_type, value
+    elif isinstance(value, GrammarClass) and value._grammar._shared:
+        items = []
+        for attr, item in sorted(value._grammar.items()):
+            key = _content_key(item)
+            if key is None:
+                return None
+            items.append((attr, key))
+        return value_type, tuple(items)
+    return None
+
+
+def _shared_key(cls, kwargs):
+    """Hashable key of the grammar built by ``cls(**kwargs)``, or None if
+    an argument cannot be shared"""
+    items = []
+    for attr, value in sorted(kwargs.items()):
+        key = _content_key(value)
+        if key is None:
+            return None
+        items.append((attr, key))
+    return cls, tuple(items)
+
+
+def _copy_shared(value):
+    """Copy of a value read from a shared grammar, with lists and dicts
+    of its own, and nodes that copy the grammar they share before changing
+    it"""
+    if isinstance(value, GrammarClass):
+        if value._grammar._shared:
+            return value._wrap(value._grammar)
+        return copy.deepcopy(value)
+    elif isinstance(value, KeyedList):
+        return KeyedList(value.attr_name, [_copy_shared(v) for v in value])
+    elif isinstance(value, list):
+        return [_copy_shared(v) for v in value]
+    elif type(value) is dict:
+        return dict((k, _copy_shared(v)) for k, v in value.items())
+    return value
+
+
+def _share_tree(value):
+    """Make the grammar of the nodes in ``value``, and of the nodes within
+    them, shared and read-only, as if built by ``GrammarClass.shared``"""
+    if isinstance(value, GrammarClass):
+        grammar = value._grammar
+        if not grammar._shared:
+            grammar._load()
+            for item in grammar.values():
+                _share_tree(item)
+            value._grammar = _SharedGrammarDict(grammar)
+    elif isinstance(value, list):
+        for item in value:
+            _share_tree(item)
+    elif type(value) is dict:
+        for item in value.values():
+            _share_tree(item)
+
+
+def _slot_names(cls):
+    """Names of the slots declared by ``cls`` and its bases"""
+    names = []
+    for klass in cls.__mro__:
+        slots = klass.__dict__.get('__slots__', ())
+        if isinstance(slots, str_types):
+            slots = (slots, )
+        names.extend(name for name in slots
+                     if name not in ('__dict__', '__weakref__'))
+    return names
 
 
 class GrammarClass(object):
@@ -282,14 +677,26 @@ class GrammarClass(object):
     This should be used as a superclass for classes that map to some JSON
     structure. The JSON content is stored in an internal dict named
     ``grammar``.
+
+    Instances have no ``__dict__``: subclasses declare ``__slots__`` for
+    any attribute they keep outside of ``grammar``, so that the many small
+    nodes of a large chart stay compact. Subclasses that leave out
+    ``__slots__``, such as ``Visualization``, get a ``__dict__`` back.
     """
+    __slots__ = ('_grammar', )
+
+    # Class of the elements of list properties that hold grammar objects,
+    # by property name. Used by ``from_json``.
+    _element_types = {}
+
     def __init__(self, **kwargs):
         """Initialize a GrammarClass
 
         **kwargs are attribute-value pairs that are set on initialization.
         These will generally be keys for the ``grammar`` dict. If the
         attribute does not already exist as a property, then a
-        ``ValueError`` is raised.
+        ``ValueError`` is raised, even in trusted mode (see
+        :func:`set_trusted`).
         """
         self.grammar = GrammarDict()
 
@@ -299,29 +706,74 @@ class GrammarClass(object):
             else:
                 raise ValueError('unknown keyword argument ' + attr)
 
+    @property
+    def grammar(self):
+        """GrammarDict: the Vega grammar of the object
+
+        A node made by :meth:`shared` is given its own copy of the shared
+        grammar first, so the dict returned can be modified freely.
+        """
+        grammar = self._grammar
+        if grammar._shared:
+            grammar = self._unshare()
+        return grammar
+
+    @grammar.setter
+    def grammar(self, value):
+        self._grammar = value
+
     def validate(self):
         """Validate the contents of the object.
 
-        This calls ``setattr`` for each of the class's grammar properties. It
-        will catch ``ValueError``s raised by the grammar property's setters
-        and re-raise them as :class:`ValidationError`.
+        This calls ``setattr`` for each of the class's grammar properties
+        found in ``grammar``, under its attribute name. It will catch
+        ``ValueError``s raised by the grammar property's setters and
+        re-raise them as :class:`ValidationError`.
+
+        Values that passed are not set again by later calls, which keeps
+        the JSON cached by ``to_json(cache=True)``. Lists and dicts, which
+        may have been modified in place, are still checked every time;
+        other values are skipped until they are replaced. Values are
+        checked even in trusted mode.
         """
-        for key, val in self.grammar.items():
-            try:
-                setattr(self, key, val)
-            except ValueError as e:
-                raise ValidationError('invalid contents: ' + e.args[0])
+        grammar = self._grammar
+        if grammar._shared:
+            # Checked when it was first shared, and read-only since
+            return
+        validated = grammar._validated
+        properties = self._grammar_properties()
+        trusted = set_trusted(False)
+        try:
+            for key, val in list(grammar.items()):
+                if key not in properties:
+                    # Loaded from JSON, with nothing to check it against
+                    continue
+                attr, prop = properties[key]
+                try:
+                    if validated.get(key) is not val:
+                        setattr(self, attr, val)
+                    elif isinstance(val, (list, dict)):
+                        prop.check(val)
+                except ValueError as e:
+                    raise ValidationError('invalid contents: ' + e.args[0])
+                if key in grammar:
+                    validated[key] = grammar[key]
+        finally:
+            set_trusted(trusted)
 
     def to_json(self, path=None, html_out=False,
                 html_path='vega_template.html', validate=False,
-                pretty_print=True):
+                pretty_print=True, backend=None, cache=False):
         """Convert object to JSON
 
         Parameters
         ----------
-        path: string, default None
+        path: string or file-like object, default None
             Path to write JSON out. If there is no path provided, JSON
-            will be returned as a string to the console.
+            will be returned as a string to the console. The JSON is
+            streamed to the file in chunks, so large ``Data`` values are
+            never held in memory as one string. An object with a ``write``
+            method is written to directly.
         html_out: boolean, default False
             If True, vincent will output an simple HTML scaffold to
             visualize the vega json output.
@@ -333,6 +785,16 @@ class GrammarClass(object):
         pretty_print : boolean
             If True (default), JSON is printed in more-readable form with
             indentation and spaces.
+        backend : string, default None
+            JSON backend, such as 'json' or 'simplejson'. If None, the
+            backend set with ``vincent.encoder.set_backend`` is used. All
+            backends produce identical output.
+        cache : boolean, default False
+            If True, the JSON of large data, such as ``Data.values``, is
+            kept between calls returning a string, and only data that was
+            replaced or changed length is encoded again. Values modified in
+            place must then be reported with ``grammar.invalidate``. See
+            ``encoder.iterencode``.
 
         Returns
         -------
@@ -347,30 +809,235 @@ class GrammarClass(object):
         else:
             dumps_args = {}
 
-        def encoder(obj):
-            if hasattr(obj, 'grammar'):
-                return obj.grammar
-
         if html_out:
             template = Template(
                 str(resource_string('vincent', 'vega_template.html')))
             with open(html_path, 'w') as f:
                 f.write(template.substitute(path=path))
 
-        if path:
+        if hasattr(path, 'write'):
+            encoder.dump(self._grammar, path, sort_keys=True,
+                         backend=backend, **dumps_args)
+        elif path:
             with open(path, 'w') as f:
-                json.dump(self.grammar, f, default=encoder, sort_keys=True,
-                          **dumps_args)
+                encoder.dump(self._grammar, f, sort_keys=True,
+                             backend=backend, **dumps_args)
         else:
-            return json.dumps(self.grammar, default=encoder, sort_keys=True,
-                              **dumps_args)
+            return ''.join(encoder.iterencode(
+                self._grammar, sort_keys=True, batch_size=None,
+                backend=backend, cache=cache, **dumps_args))
+
+    def diff(self, other):
+        """JSON Patch (RFC 6902) from this object's JSON to ``other``'s
+
+        Elements of keyed lists such as ``data`` and ``scales`` are matched
+        by name rather than by position. See :func:`vincent.patch.diff`.
+
+        Parameters
+        ----------
+        other : GrammarClass
+            Object to compare against, typically a modified copy.
+
+        Returns
+        -------
+        list of dicts
+            Patch operations, to be applied in order.
+        """
+        return patch.diff(self, other)
 
-    def from_json(self):
+    def to_patch(self, other, pretty_print=False, backend=None):
+        """JSON string of the patch from this object to ``other``
+
+        Parameters
+        ----------
+        other : GrammarClass
+            Object to compare against.
+        pretty_print : boolean, default False
+            If True, indent the JSON.
+        backend : string, default None
+            JSON backend, as for ``to_json``.
+        """
+        dumps_args = ({'indent': 2, 'separators': (',', ': ')}
+                      if pretty_print else {})
+        return encoder.dumps(self.diff(other), backend=backend,
+                             sort_keys=True, **dumps_args)
+
+    @classmethod
+    def from_json(cls, spec, validate=True, columnar=False):
         """Load object from JSON
 
-        Not yet implemented.
+        Nested grammar, such as the data, scales, marks, axes and legends of
+        a ``Visualization``, is rebuilt as the corresponding classes.
+        Fields that have no property on the class are kept in the
+        ``grammar`` dict as they are.
+
+        Parameters
+        ----------
+        spec : string, file-like object or dict
+            JSON string, path of a JSON file, file-like object, or the
+            already parsed JSON.
+        validate : boolean, default True
+            If True, each field is set through its property, which type
+            checks and validates it. If False, fields are written to the
+            ``grammar`` dicts directly, which is much faster for large
+            trusted specs.
+        columnar : boolean, default False
+            If True, ``values`` in long ``idx``/``col``/``val`` form are
+            stored as :class:`ColumnarValues`.
+
+        Returns
+        -------
+        Instance of the class on which it is called.
         """
-        raise NotImplementedError()
+        if hasattr(spec, 'read'):
+            spec = json.load(spec)
+        elif isinstance(spec, str_types):
+            if spec.lstrip()[:1] in ('{', '['):
+                spec = json.loads(spec)
+            else:
+                with open(spec) as f:
+                    spec = json.load(f)
+        if not isinstance(spec, dict):
+            raise LoadError('{0} JSON must be an object'.format(cls.__name__))
+        return cls._from_grammar(spec, validate, columnar)
+
+    @classmethod
+    def shared(cls, **kwargs):
+        """Create a node whose grammar is shared with identical nodes
+
+        Nodes created with the same keyword arguments share one read-only
+        grammar, which is built, validated and encoded to JSON once. Each
+        call still returns a new node: setting or deleting one of its
+        properties, reading a node, list or dict stored in it, or reading
+        its ``grammar``, first gives it its own copy of the grammar, so
+        other nodes never see the change.
+
+        This suits the many identical small nodes of chart templates, such
+        as ``ValueRef(scale='x', field='data.idx')``. Arguments must be
+        strings, numbers, booleans, None or shared nodes; with any other
+        argument, or for classes whose instances have a ``__dict__``, this
+        returns ``cls(**kwargs)``.
+
+        Parameters
+        ----------
+        **kwargs : dict
+            Attributes to set, as for ``cls(**kwargs)``.
+
+        Examples
+        --------
+        >>> x = ValueRef.shared(scale='x', field='data.idx')
+        >>> x.grammar['scale'] = 'y'
+        >>> ValueRef.shared(scale='x', field='data.idx').scale
+        'x'
+        """
+        key = _shared_key(cls, kwargs)
+        grammar = _shared_grammars.get(key) if key is not None else None
+        if grammar is None:
+            if key is not None:
+                # Store nodes of our own: the caller may change the ones it
+                # passed, which only hold the same read-only grammar
+                kwargs = dict((attr, value._wrap(value._grammar)
+                               if isinstance(value, GrammarClass) else value)
+                              for attr, value in kwargs.items())
+            with trusted(False):
+                obj = cls(**kwargs)
+            if key is None or hasattr(obj, '__dict__') or \
+                    len(_shared_grammars) >= _shared_max:
+                return obj
+            grammar = _shared_grammars[key] = _SharedGrammarDict(
+                obj._grammar)
+        return cls._wrap(grammar)
+
+    def __getstate__(self):
+        # Without this, slotted instances do not pickle with protocols 0
+        # and 1 on Python 2
+        state = dict(getattr(self, '__dict__', {}))
+        for name in _slot_names(type(self)):
+            if hasattr(self, name):
+                state[name] = getattr(self, name)
+        return state
+
+    def __setstate__(self, state):
+        for name, value in state.items():
+            object.__setattr__(self, name, value)
+
+    @classmethod
+    def _wrap(cls, grammar):
+        """New node holding ``grammar``, without running ``__init__``"""
+        obj = cls.__new__(cls)
+        obj._grammar = grammar
+        return obj
+
+    def _unshare(self):
+        """Give the node its own copy of a shared grammar, and return it
+
+        The nodes, lists and dicts in the grammar are copied too, so that
+        changing them through the copy leaves the shared grammar intact."""
+        grammar = self._grammar
+        if grammar._shared:
+            grammar = self._grammar = GrammarDict(
+                (key, _copy_shared(value)) for key, value in grammar.items())
+        return grammar
+
+    @classmethod
+    def _grammar_properties(cls):
+        """Map ``grammar`` keys to (attribute name, property)"""
+        if cls not in _grammar_properties:
+            properties = {}
+            for klass in reversed(cls.__mro__):
+                for attr, value in vars(klass).items():
+                    if isinstance(value, GrammarProperty):
+                        properties[value.grammar_name] = (attr, value)
+            _grammar_properties[cls] = properties
+        return _grammar_properties[cls]
+
+    @classmethod
+    def _from_grammar(cls, spec, validate, columnar):
+        obj = cls()
+        # Keep the KeyedLists set up by __init__, but none of its defaults
+        defaults, obj.grammar = obj.grammar, GrammarDict()
+        properties = cls._grammar_properties()
+        for key, value in spec.items():
+            if key not in properties:
+                obj.grammar[key] = value
+                continue
+            attr, prop = properties[key]
+            value = _load_value(value, prop.grammar_type,
+                                cls._element_types.get(attr),
+                                defaults.get(key), validate, columnar)
+            if validate:
+                setattr(obj, attr, value)
+            else:
+                obj.grammar[key] = value
+        return obj
+
+
+_grammar_properties = {}
+
+
+def _load_value(value, grammar_type, element_type, default, validate,
+                columnar):
+    """Convert a parsed JSON value to the type a grammar property expects"""
+    if isinstance(grammar_type, tuple):
+        types = grammar_type
+    else:
+        types = (grammar_type, ) if grammar_type else ()
+    if isinstance(value, dict):
+        if dict not in types:
+            for t in types:
+                if isinstance(t, type) and issubclass(t, GrammarClass):
+                    return t._from_grammar(value, validate, columnar)
+    elif isinstance(value, list):
+        if columnar and ColumnarValues in types:
+            values = ColumnarValues.from_records(value)
+            if values is not None:
+                return values
+        if element_type is not None:
+            value = [element_type._from_grammar(v, validate, columnar)
+                     if isinstance(v, dict) else v for v in value]
+            if isinstance(default, KeyedList):
+                value = KeyedList(default.attr_name, value)
+    return value
 
 
 class LoadError(Exception):
@@ -5,15 +5,24 @@ Data: Vincent Data Class for data importing and Vega Data type
 
 """
 from __future__ import (print_function, division)
+import copy
+import hashlib
+import os
+import posixpath
+import tempfile
 import time
 import json
+from . import aggregate, encoder, sampling
 from .core import (
     _assert_is_type,
     ValidationError,
     grammar,
     GrammarClass,
+    GrammarDict,
     LoadError
 )
+from .columnar import ColumnarValues
+from .transforms import Transform
 from ._compat import str_types
 
 try:
@@ -34,7 +43,9 @@ class Data(GrammarClass):
     containing the data and formatting instructions. Additionally, new data
     can be created from old data via the transform fields.
     """
+    __slots__ = ()
     _default_index_key = 'idx'
+    _element_types = {'transform': Transform}
 
     def __init__(self, name=None, **kwargs):
         """Initialize a Data object
@@ -47,7 +58,7 @@ class Data(GrammarClass):
         **kwargs : dict
             Attributes to set on initialization.
         """
-        super(self.__class__, self).__init__(**kwargs)
+        super(Data, self).__init__(**kwargs)
         self.name = name if name else 'table'
 
     @grammar(str_types)
@@ -65,9 +76,9 @@ class Data(GrammarClass):
             ``values`` attribute.
         """
 
-    @grammar(list)
+    @grammar((list, ColumnarValues))
     def values(value):
-        """list : Data contents
+        """list or ColumnarValues : Data contents
 
         Data is represented in tabular form, where each element of
         ``values`` corresponds to a row of data.  Each row of data is
@@ -91,10 +102,17 @@ class Data(GrammarClass):
 
         It may be more convenient to load data from pandas or NumPy objects.
         See the methods :func:`Data.from_pandas` and
-        :func:`Data.from_numpy`.
+        :func:`Data.from_numpy`. Large ``idx``/``col``/``val`` data sets can
+        be held compactly as a :class:`ColumnarValues`, whose rows are
+        always dicts.
         """
-        for row in value:
-            _assert_is_type('values row', row, (float, int, dict))
+        if isinstance(value, ColumnarValues):
+            return
+        # Check each distinct row type once, not each row
+        for row_type in set(map(type, value)):
+            if not issubclass(row_type, (float, int, dict)):
+                row = next(r for r in value if type(r) is row_type)
+                _assert_is_type('values row', row, (float, int, dict))
 
     @grammar(str_types)
     def source(value):
@@ -122,7 +140,7 @@ class Data(GrammarClass):
     def validate(self, *args):
         """Validate contents of class
         """
-        super(self.__class__, self).validate(*args)
+        super(Data, self).validate(*args)
         if not self.name:
             raise ValidationError('name is required for Data')
 
@@ -132,6 +150,11 @@ class Data(GrammarClass):
 
         This is used by the ``from_pandas`` and ``from_numpy`` functions to
         convert data to JSON-serializable types when loading.
+
+        Datetimes become Javascript epoch milliseconds of their wall-clock
+        time read in the system's local timezone, as ``time.mktime`` does.
+        Timezone-aware datetimes are not converted to UTC first: only their
+        zone's DST flag is used.
         """
         if isinstance(obj, str_types):
             return obj
@@ -150,9 +173,138 @@ class Data(GrammarClass):
             raise LoadError('cannot serialize index of type '
                             + type(obj).__name__)
 
+    @classmethod
+    def _serialize_array(cls, arr):
+        """Serialize every element of a one-dimensional pandas or NumPy object
+
+        Native NumPy numeric dtypes are converted in bulk with ``tolist``,
+        which yields the same Python scalars as :func:`Data.serialize`.
+        Anything else falls back to :func:`Data.serialize` per element.
+        """
+        dtype = getattr(arr, 'dtype', None)
+        if isinstance(dtype, np.dtype) and dtype.kind in 'biuf':
+            return np.asarray(arr).tolist()
+        elif getattr(dtype, 'kind', None) == 'M':
+            return cls._datetime_to_epoch_ms(arr).tolist()
+        values = np.asarray(arr, dtype=object).tolist()
+        if all(type(x) in str_types for x in values):
+            # Strings, such as labels and codes, serialize to themselves
+            return values
+        return [cls.serialize(x) for x in values]
+
+    @classmethod
+    def _typed_array(cls, arr):
+        """Like :func:`Data._serialize_array`, but return a NumPy array
+
+        Numeric data keeps its native dtype and datetimes become int64
+        epoch milliseconds; anything else is an object array of
+        serialized values.
+        """
+        dtype = getattr(arr, 'dtype', None)
+        if isinstance(dtype, np.dtype) and dtype.kind in 'biuf':
+            return np.asarray(arr)
+        elif getattr(dtype, 'kind', None) == 'M':
+            return cls._datetime_to_epoch_ms(arr)
+        typed = np.empty(len(arr), dtype=object)
+        typed[:] = [cls.serialize(x) for x in arr]
+        return typed
+
+    @staticmethod
+    def _datetime_to_epoch_ms(arr):
+        """Convert datetime64 values to an array of Javascript epoch ms
+
+        This is the vectorized equivalent of :func:`Data.serialize` for
+        datetimes. Values are wall-clock times read in the system's local
+        timezone, exactly as ``time.mktime`` interprets them, and are
+        truncated to whole seconds. Timezone-aware values keep their
+        wall-clock time and pass the DST flag of their own zone, as
+        ``mktime(timetuple())`` does. The result is an int64 array, or an
+        object array if there are ``NaT`` values, which become ``None``.
+
+        The local UTC offset is only looked up once per distinct quarter
+        hour (DST transitions fall on quarter-hour boundaries), so an index
+        is converted in one pass regardless of how many columns reuse it.
+        """
+        def epoch_seconds(values):
+            seconds = np.asarray(values, dtype='datetime64[s]')
+            missing = np.isnat(seconds)
+            seconds = seconds.astype(np.int64)
+            seconds[missing] = 0
+            return seconds, missing
+
+        tz = getattr(arr.dtype, 'tz', None)
+        if tz is None:
+            seconds, missing = epoch_seconds(arr)
+            isdst = np.full(len(seconds), -1, dtype=np.int64)
+        else:
+            index = pd.DatetimeIndex(arr)
+            seconds, missing = epoch_seconds(index.tz_localize(None))
+            # The zone's DST flag, looked up per quarter hour of the instant
+            instants = epoch_seconds(index.tz_convert('UTC')
+                                     .tz_localize(None))[0]
+            buckets, inverse = np.unique(instants - instants % 900,
+                                         return_inverse=True)
+            flags = np.array([
+                pd.Timestamp(b, unit='s', tz='UTC').tz_convert(tz)
+                .timetuple().tm_isdst for b in buckets.tolist()],
+                dtype=np.int64)
+            isdst = flags[inverse.ravel()]
+
+        def utc_offset(wall, flag):
+            # tm_isdst=-1 lets mktime resolve DST, as timetuple() does for
+            # naive datetimes
+            local = time.struct_time(time.gmtime(wall)[:8] + (flag,))
+            return wall - int(time.mktime(local))
+
+        keys = (seconds - seconds % 900) * 3 + isdst + 1
+        buckets, inverse = np.unique(keys, return_inverse=True)
+        offsets = np.array([utc_offset(b // 3, b % 3 - 1)
+                            for b in buckets.tolist()], dtype=np.int64)
+        seconds = seconds - offsets[inverse.ravel()]
+
+        values = seconds * 1000
+        if missing.any():
+            values = values.astype(object)
+            values[missing] = None
+        return values
+
+    @classmethod
+    def _frame_to_values(cls, frame, grouped=False):
+        """Melt a DataFrame into row-major ``idx``/``col``/``val`` records
+
+        The index, the column labels and each column are serialized once as
+        whole arrays; only the final record dicts are built per cell.
+        """
+        # We have to explicitly convert the column names to strings
+        # because the json serializer doesn't allow for integer keys.
+        index = cls._serialize_array(frame.index)
+        columns = [cls.serialize(k) for k in frame.columns]
+        rows = zip(*[cls._serialize_array(frame.iloc[:, j])
+                     for j in range(len(columns))])
+
+        if grouped:
+            return [{'idx': i, 'col': k, 'val': v, 'group': num}
+                    for i, row in zip(index, rows)
+                    for num, (k, v) in enumerate(zip(columns, row))]
+        return [{'idx': i, 'col': k, 'val': v}
+                for i, row in zip(index, rows)
+                for k, v in zip(columns, row)]
+
+    @classmethod
+    def _frame_to_columnar(cls, frame, grouped=False):
+        """Like :func:`Data._frame_to_values`, but return the records as
+        :class:`ColumnarValues`"""
+        columns = [cls.serialize(k) for k in frame.columns]
+        arrays = [cls._typed_array(frame.iloc[:, j])
+                  for j in range(len(columns))]
+        return ColumnarValues.from_wide(cls._typed_array(frame.index),
+                                        columns, arrays, grouped=grouped)
+
     @classmethod
     def from_pandas(cls, data, columns=None, key_on='idx', name=None,
-                    series_key='data', grouped=False, records=False, **kwargs):
+                    series_key='data', grouped=False, records=False,
+                    columnar=False, max_points=None, downsample='lttb',
+                    stacked=False, **kwargs):
         """Load values from a pandas ``Series`` or ``DataFrame`` object
 
         Parameters
@@ -179,6 +331,27 @@ class Data(GrammarClass):
         records: boolean, defaule False
             Requires Pandas 0.12 or greater. Writes the Pandas DataFrame
             using the df.to_json(orient='records') formatting.
+        columnar: boolean, default False
+            Store the ``idx``/``col``/``val`` records as a
+            :class:`ColumnarValues` of typed arrays instead of a list of
+            dicts. Records are only built when the data is serialized.
+        max_points: int, default None
+            If not None, keep at most this many points of each series, chosen
+            with ``downsample``. Rows kept for any column are kept for all of
+            them. About twice the chart width in pixels keeps the plot
+            visually unchanged.
+        downsample: string, default 'lttb'
+            ``'lttb'`` (Largest-Triangle-Three-Buckets), which preserves the
+            shape of lines, or ``'minmax'``, which keeps the extremes of each
+            bucket. See :mod:`vincent.sampling`.
+        stacked: boolean, default False
+            Replace the ``val`` field with ``y2`` and ``y`` fields holding
+            the bottom and top of each value stacked on the values of the
+            previous columns at the same index, as a ``stack`` transform
+            faceted on ``data.col`` would compute in the browser. Missing
+            values stack as 0. Rows that repeat an index value stack on the
+            earlier ones, so that the tops match :func:`stats_from_pandas`.
+            Not supported with ``records`` or ``columnar``.
         **kwargs : dict
             Additional arguments passed to the :class:`Data` constructor.
         """
@@ -195,44 +368,107 @@ class Data(GrammarClass):
         else:
             vega_data = cls(name='table', **kwargs)
 
-        pd_obj = data.copy()
-        if columns:
-            pd_obj = data[columns]
-        if key_on != 'idx':
-            pd_obj.index = data[key_on]
+        pd_obj = cls._select_pandas(data, columns, key_on, max_points,
+                                    downsample)
+        if stacked and (records or columnar):
+            raise ValueError('stacked values cannot be written as records '
+                             'or columnar')
         if records:
             # The worst
             vega_data.values = json.loads(pd_obj.to_json(orient='records'))
             return vega_data
 
-        vega_data.values = []
-
         if isinstance(pd_obj, pd.Series):
             data_key = data.name or series_key
-            for i, v in pd_obj.iteritems():
-                value = {}
-                value['idx'] = cls.serialize(i)
-                value['col'] = data_key
-                value['val'] = cls.serialize(v)
-                vega_data.values.append(value)
+            if columnar:
+                vega_data.values = ColumnarValues.from_wide(
+                    cls._typed_array(pd_obj.index), [data_key],
+                    [cls._typed_array(pd_obj)])
+            else:
+                vega_data.values = [
+                    {'idx': i, 'col': data_key, 'val': v}
+                    for i, v in zip(cls._serialize_array(pd_obj.index),
+                                    cls._serialize_array(pd_obj))]
 
         elif isinstance(pd_obj, pd.DataFrame):
-            # We have to explicitly convert the column names to strings
-            # because the json serializer doesn't allow for integer keys.
-            for i, row in pd_obj.iterrows():
-                for num, (k, v) in enumerate(row.iteritems()):
-                    value = {}
-                    value['idx'] = cls.serialize(i)
-                    value['col'] = cls.serialize(k)
-                    value['val'] = cls.serialize(v)
-                    if grouped:
-                        value['group'] = num
-                    vega_data.values.append(value)
+            if columnar:
+                vega_data.values = cls._frame_to_columnar(pd_obj,
+                                                          grouped=grouped)
+            else:
+                vega_data.values = cls._frame_to_values(pd_obj,
+                                                        grouped=grouped)
         else:
             raise ValueError('cannot load from data type '
                              + type(pd_obj).__name__)
+
+        if stacked:
+            # Records are row-major, as are the stacked arrays
+            y2, y = aggregate.stack(pd_obj.values, pd_obj.index)
+            for record, bottom, top in zip(vega_data.values,
+                                           y2.ravel().tolist(),
+                                           y.ravel().tolist()):
+                del record['val']
+                record['y2'], record['y'] = bottom, top
+        return vega_data
+
+    @classmethod
+    def stats_from_pandas(cls, data, columns=None, key_on='idx',
+                          name='stats', max_points=None, downsample='lttb',
+                          **kwargs):
+        """Load the sum of the values at each index of a pandas object
+
+        This computes what Vega's ``stats`` transform, applied to the data
+        loaded by :func:`Data.from_pandas` faceted on ``data.idx``, would
+        compute in the browser, but only keeps the sums: the values are
+        ``{'idx': ..., 'sum': ...}`` records, one per distinct index value.
+        Missing values count as 0.
+
+        Parameters
+        ----------
+        data : pandas ``Series`` or ``DataFrame``
+            Pandas object to sum. Its columns must be numeric.
+        columns, key_on, max_points, downsample :
+            As for :func:`Data.from_pandas`. Pass the same arguments to
+            both so that the sums match the loaded values.
+        name : string, default 'stats'
+            Name of the data set.
+        **kwargs : dict
+            Additional arguments passed to the :class:`Data` constructor.
+        """
+        if not pd:
+            raise LoadError('pandas could not be imported')
+        if not hasattr(data, 'index'):
+            raise ValueError('Please load a Pandas object.')
+
+        pd_obj = cls._select_pandas(data, columns, key_on, max_points,
+                                    downsample)
+        totals = aggregate.sums(pd_obj.index, pd_obj.values)
+        vega_data = cls(name=name, **kwargs)
+        vega_data.values = [
+            {'idx': i, 'sum': v}
+            for i, v in zip(cls._serialize_array(totals.index),
+                            cls._serialize_array(totals))]
         return vega_data
 
+    @classmethod
+    def _select_pandas(cls, data, columns, key_on, max_points, downsample):
+        """Columns, index and rows of ``data`` to load, as set by the
+        arguments of :func:`Data.from_pandas`"""
+        pd_obj = data.copy()
+        if columns:
+            pd_obj = data[columns]
+        if key_on != 'idx':
+            pd_obj.index = data[key_on]
+        if max_points is not None and len(pd_obj) > max_points:
+            if isinstance(pd_obj, pd.Series):
+                series = [pd_obj.values]
+            else:
+                series = [pd_obj.iloc[:, j].values
+                          for j in range(pd_obj.shape[1])]
+            pd_obj = pd_obj.iloc[sampling.downsample(
+                pd_obj.index, series, max_points, method=downsample)]
+        return pd_obj
+
     @classmethod
     def from_numpy(cls, np_obj, name, columns, index=None, index_key=None,
                    **kwargs):
@@ -364,7 +600,8 @@ class Data(GrammarClass):
         return cls(name, values=values)
 
     @classmethod
-    def keypairs(cls, data, columns=None, use_index=False, name=None):
+    def keypairs(cls, data, columns=None, use_index=False, name=None,
+                 sort=True):
         """This will format the data as Key: Value pairs, rather than the
         idx/col/val style. This is useful for some transforms, and to
         key choropleth map data
@@ -387,6 +624,10 @@ class Data(GrammarClass):
             y-values columns[1].
         use_index: boolean, default False
             Use the DataFrame index for your x-values
+        sort: boolean, default True
+            Sort the pairs of a Dict or Pandas Series by key. Pass False
+            if they are already in the desired order. A Series whose index
+            is strictly increasing is never re-sorted.
 
         """
         if not name:
@@ -403,23 +644,33 @@ class Data(GrammarClass):
                       for x, y in zip(range(len(data) + 1), data)]
 
         # Dicts
-        elif isinstance(data, dict) or isinstance(data, pd.Series):
-            values = [{"x": x, "y": y} for x, y in sorted(data.items())]
+        elif isinstance(data, dict):
+            items = sorted(data.items()) if sort else data.items()
+            values = [{"x": x, "y": y} for x, y in items]
+
+        # Series
+        elif isinstance(data, pd.Series):
+            pairs = zip(cls._serialize_array(data.index),
+                        cls._serialize_array(data))
+            if sort and not (data.index.is_monotonic_increasing and
+                             data.index.is_unique):
+                pairs = sorted(pairs)
+            values = [{"x": x, "y": y} for x, y in pairs]
 
         # Dataframes
         elif isinstance(data, pd.DataFrame):
             if len(columns) > 1 and use_index:
                 raise ValueError('If using index as x-axis, len(columns)'
                                  'cannot be > 1')
+            # Whole columns are serialized at once, without building a
+            # Series per row
             if use_index or len(columns) == 1:
-                values = [{"x": cls.serialize(x[0]),
-                           "y": cls.serialize(x[1][columns[0]])}
-                          for x in data.iterrows()]
+                xvals = cls._serialize_array(data.index)
+                yvals = cls._serialize_array(data[columns[0]])
             else:
-
-                values = [{"x": cls.serialize(x[1][columns[0]]),
-                           "y": cls.serialize(x[1][columns[1]])}
-                          for x in data.iterrows()]
+                xvals = cls._serialize_array(data[columns[0]])
+                yvals = cls._serialize_array(data[columns[1]])
+            values = [{"x": x, "y": y} for x, y in zip(xvals, yvals)]
 
         # NumPy arrays
         elif isinstance(data, np.ndarray):
@@ -429,51 +680,210 @@ class Data(GrammarClass):
 
         return cls(name, values=values)
 
-    @staticmethod
-    def _numpy_to_values(data):
-        '''Convert a NumPy array to values attribute'''
-        def to_list_no_index(xvals, yvals):
-            return [{"x": x, "y": np.asscalar(y)}
-                    for x, y in zip(xvals, yvals)]
-
-        if len(data.shape) == 1 or data.shape[1] == 1:
-            xvals = range(data.shape[0] + 1)
-            values = to_list_no_index(xvals, data)
-        elif len(data.shape) == 2:
-            if data.shape[1] == 2:
-                # NumPy arrays and matrices have different iteration rules.
-                if isinstance(data, np.matrix):
-                    xidx = (0, 0)
-                    yidx = (0, 1)
-                else:
-                    xidx = 0
-                    yidx = 1
-
-                xvals = [np.asscalar(row[xidx]) for row in data]
-                yvals = [np.asscalar(row[yidx]) for row in data]
-                values = [{"x": x, "y": y} for x, y in zip(xvals, yvals)]
-            else:
-                raise ValueError('arrays with > 2 columns not supported')
+    @classmethod
+    def _numpy_to_values(cls, data):
+        """Convert a NumPy array to values attribute
+
+        1-D and ``(N, 1)`` arrays are y-values keyed by position, ``(N, 2)``
+        arrays and matrices are ``(x, y)`` rows. Structured and record
+        arrays use their ``x`` and ``y`` fields if they have them, else
+        their first one or two fields in the same way. Columns are
+        converted whole, see :func:`Data._serialize_array`.
+        """
+        if data.dtype.names:
+            names = data.dtype.names
+            if 'x' in names and 'y' in names:
+                names = ('x', 'y')
+            elif len(names) > 2:
+                raise ValueError('arrays with > 2 fields not supported')
+            if data.ndim != 1:
+                raise ValueError('invalid dimensions for ndarray')
+            columns = [np.asarray(data[name]) for name in names]
         else:
-            raise ValueError('invalid dimensions for ndarray')
+            # Matrices stay 2-D when indexed; use them as plain arrays
+            data = np.asarray(data)
+            if data.ndim == 1:
+                columns = [data]
+            elif data.ndim == 2 and data.shape[1] in (1, 2):
+                columns = [data[:, j] for j in range(data.shape[1])]
+            elif data.ndim == 2:
+                raise ValueError('arrays with > 2 columns not supported')
+            else:
+                raise ValueError('invalid dimensions for ndarray')
 
-        return values
+        yvals = cls._serialize_array(columns[-1])
+        if len(columns) == 1:
+            xvals = range(len(yvals))
+        else:
+            xvals = cls._serialize_array(columns[0])
+        return [{"x": x, "y": y} for x, y in zip(xvals, yvals)]
 
-    def to_json(self, validate=False, pretty_print=True, data_path=None):
+    def to_json(self, validate=False, pretty_print=True, data_path=None,
+                data_url=None):
         """Convert data to JSON
 
         Parameters
         ----------
         data_path : string
-            If not None, then data is written to a separate file at the
-            specified path. Note that the ``url`` attribute if the data must
-            be set independently for the data to load correctly.
+            If not None, then ``values`` are written to a file in this
+            directory, named by the hash of its contents, and the JSON
+            references it with ``url`` instead. See :func:`Data.externalize`.
+        data_url : string, default None
+            URL prefix of the data files, if it differs from ``data_path``.
 
         Returns
         -------
         string
             Valid Vega JSON.
         """
-        # TODO: support writing to separate file
-        return super(self.__class__, self).to_json(validate=validate,
-                                                   pretty_print=pretty_print)
+        data = self
+        if data_path is not None:
+            data = self.externalize(data_path, data_url)
+        return super(Data, data).to_json(validate=validate,
+                                         pretty_print=pretty_print)
+
+    def externalize(self, data_path, data_url=None):
+        """Write ``values`` to a file and return a copy that loads it by URL
+
+        The values are written as compact JSON to ``<hash>.json`` in
+        ``data_path``, where ``<hash>`` is the SHA-1 of the file's contents,
+        so identical data is written once and its URL changes only when
+        the data does. The returned copy has ``url`` set and no ``values``;
+        this object is not modified.
+
+        Parameters
+        ----------
+        data_path : string
+            Directory to write the file to. It is created if needed.
+        data_url : string, default None
+            URL prefix of the file. If None, ``data_path`` is used.
+
+        Returns
+        -------
+        Data
+            Copy of this object, or this object if it has no ``values``.
+        """
+        if self.values is None:
+            return self
+        filename = self._write_values(data_path)[0]
+        return self._with_url(filename, data_path, data_url)
+
+    def _with_url(self, filename, data_path, data_url=None):
+        """Copy of this object that loads ``filename`` instead of values"""
+        external = copy.copy(self)
+        external.grammar = GrammarDict(self.grammar)
+        del external.grammar['values']
+        prefix = data_path if data_url is None else data_url
+        external.url = posixpath.join(prefix.replace(os.sep, '/'), filename)
+        return external
+
+    def _write_values(self, data_path):
+        """Write ``values`` to a content-addressed file in ``data_path``
+
+        Returns the file name, its size in bytes, and whether it was
+        written, as opposed to already existing.
+        """
+        if not os.path.isdir(data_path):
+            os.makedirs(data_path)
+        digest, size = hashlib.sha1(), 0
+        fd, tmp_path = tempfile.mkstemp(dir=data_path, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                for chunk in encoder.iterencode(self.values, sort_keys=True):
+                    chunk = chunk.encode('utf-8')
+                    digest.update(chunk)
+                    size += len(chunk)
+                    f.write(chunk)
+            filename = digest.hexdigest() + '.json'
+            path = os.path.join(data_path, filename)
+            if os.path.exists(path):
+                os.remove(tmp_path)
+                return filename, size, False
+            os.rename(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return filename, size, True
+
+
+class LazyData(Data):
+    """Data whose values are converted from a source object on first use
+
+    Converting a large DataFrame to ``values`` takes time and memory that
+    are wasted if the values are never serialized. ``LazyData`` keeps a
+    reference to the source and converts it the first time ``values`` is
+    read or the grammar is serialized, through ``to_json``, ``grammar()``
+    or the JSON of a parent. The result is kept until ``source`` is
+    replaced. Changes made to the source object in place after the
+    conversion are not picked up.
+    """
+    __slots__ = ('_source', 'converter')
+
+    def __init__(self, source=None, converter=None, name=None, **kwargs):
+        """Initialize a LazyData object
+
+        Parameters
+        ----------
+        source : object, default None
+            Object to convert, such as a pandas DataFrame or Series.
+        converter : callable, default None
+            Called with ``source``, it returns a ``Data`` object or a list
+            of values. If None, :func:`Data.from_pandas` is used.
+        name : string, default None
+            Name of the data set. If None (default), then the name will be
+            set to ``'table'``.
+        **kwargs : dict
+            Attributes to set on initialization.
+        """
+        super(LazyData, self).__init__(name=name, **kwargs)
+        self.converter = converter or Data.from_pandas
+        self.source = source
+
+    @property
+    def source(self):
+        """object : Source of the values, converted on first use
+
+        Setting it discards the values converted from the previous source.
+        """
+        return self._source
+
+    @source.setter
+    def source(self, value):
+        self._source = value
+        if 'values' in self.grammar:
+            del self.grammar['values']
+        self.grammar._loader = self._convert if value is not None else None
+
+    def _convert(self):
+        result = self.converter(self._source)
+        if isinstance(result, Data):
+            result = result.values
+        self.grammar['values'] = result
+
+    @property
+    def values(self):
+        """list or ColumnarValues : Data contents, see :attr:`Data.values`
+
+        Reading it converts the source if that has not been done yet.
+        Setting it replaces the source.
+        """
+        self.grammar._load()
+        return Data.values.fget(self)
+
+    @values.setter
+    def values(self, value):
+        self._source, self.grammar._loader = None, None
+        Data.values.fset(self, value)
+
+    @values.deleter
+    def values(self):
+        self._source, self.grammar._loader = None, None
+        Data.values.fdel(self)
+
+    def validate(self, *args):
+        """Validate contents of class, converting the source first so that
+        its values are checked
+        """
+        self.grammar._load()
+        super(LazyData, self).validate(*args)
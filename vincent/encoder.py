@@ -0,0 +1,385 @@
+# -*- coding: utf-8 -*-
+"""
+
+Encoder: Streaming JSON serialization of Vincent grammar trees
+
+"""
+from __future__ import (print_function, division)
+import json
+
+try:
+    import simplejson
+except ImportError:
+    simplejson = None
+
+from .columnar import ColumnarValues
+from ._compat import str_types
+
+
+def default(obj):
+    """``default`` hook for the ``json`` module
+
+    Grammar objects encode as their ``grammar`` dict, and
+    :class:`ColumnarValues` as the list of records they represent. Anything
+    else that ``json`` cannot encode becomes ``null``.
+    """
+    if hasattr(obj, '_grammar'):
+        _load(obj._grammar)
+        return obj._grammar
+    elif isinstance(obj, ColumnarValues):
+        return obj.to_records()
+
+
+def _load(grammar):
+    """Fill in deferred values of a ``GrammarDict`` before reading it"""
+    if getattr(grammar, '_loader', None) is not None:
+        grammar._load()
+
+
+_backends = {}
+_preferred_backends = ['simplejson', 'json']
+_default_backend = [None]
+
+
+def register_backend(name, make_encoder):
+    """Register a JSON backend
+
+    Parameters
+    ----------
+    name : string
+        Name used to select the backend.
+    make_encoder : callable
+        Called as ``make_encoder(sort_keys=..., indent=..., separators=...)``
+        with the arguments of ``json.dumps``. It must return a function
+        that encodes a JSON-serializable object to a string that is
+        byte-identical to ``json.dumps(obj, default=default, ...)`` with
+        the same arguments.
+    """
+    _backends[name] = make_encoder
+
+
+def set_backend(name=None):
+    """Set the backend used when none is passed explicitly
+
+    With ``name=None``, the fastest installed backend is used: ``simplejson``
+    if it can be imported, else the standard library ``json``.
+    """
+    if name is not None and name not in _backends:
+        raise ValueError('unknown JSON backend: {0}'.format(name))
+    _default_backend[0] = name
+
+
+def get_backend(name=None):
+    """Return the ``make_encoder`` function of a registered backend"""
+    if name is None:
+        name = _default_backend[0]
+    if name is None:
+        name = next(b for b in _preferred_backends if b in _backends)
+    try:
+        return _backends[name]
+    except KeyError:
+        raise ValueError('unknown JSON backend: {0}'.format(name))
+
+
+def _json_encoder(sort_keys=False, indent=None, separators=None):
+    return json.JSONEncoder(sort_keys=sort_keys, indent=indent,
+                            separators=separators, default=default).encode
+
+
+def _simplejson_encoder(sort_keys=False, indent=None, separators=None):
+    # simplejson's extensions are turned off so that the output matches
+    # json's. Unlike json, it keeps using its C encoder when indenting.
+    return simplejson.JSONEncoder(
+        sort_keys=sort_keys, indent=indent, separators=separators,
+        default=default, allow_nan=True, use_decimal=False,
+        namedtuple_as_object=False, tuple_as_array=True,
+        iterable_as_array=False, for_json=False).encode
+
+
+register_backend('json', _json_encoder)
+if simplejson is not None:
+    register_backend('simplejson', _simplejson_encoder)
+
+
+def dumps(obj, backend=None, **kwargs):
+    """Encode ``obj`` to a JSON string with the given backend
+
+    ``**kwargs`` are ``sort_keys``, ``indent`` and ``separators``, as for
+    ``json.dumps``.
+    """
+    return get_backend(backend)(**kwargs)(obj)
+
+
+_plain_types = frozenset(str_types + (int, float, bool, type(None)))
+
+
+def _json_key(key):
+    """Coerce a dict key the way ``json`` does"""
+    if isinstance(key, str_types):
+        return key
+    elif isinstance(key, float):
+        return json.dumps(key)
+    elif key is True or key is False or key is None:
+        return json.dumps(key)
+    elif isinstance(key, int):
+        return int.__repr__(key)
+    raise TypeError('keys must be str, int, float, bool or None, '
+                    'not {0}'.format(type(key).__name__))
+
+
+def _materialize_list(lst):
+    out = []
+    append = out.append
+    for item in lst:
+        # Fast path for flat records such as Data values
+        if type(item) is dict:
+            for key, value in item.items():
+                if type(key) not in str_types or \
+                        type(value) not in _plain_types:
+                    break
+            else:
+                append(item.copy())
+                continue
+        append(materialize(item))
+    return out
+
+
+def materialize(obj):
+    """Convert a grammar tree to plain Python lists, dicts and scalars
+
+    The result is the same as ``json.loads(json.dumps(obj,
+    default=default))``, but is built directly, without producing and
+    parsing the JSON text. The result shares no mutable objects with
+    ``obj``.
+    """
+    if type(obj) in _plain_types:
+        return obj
+    elif isinstance(obj, str_types):
+        # Slicing returns a plain string for subclasses too
+        return obj[:]
+    elif isinstance(obj, int) and not isinstance(obj, bool):
+        return int(obj)
+    elif isinstance(obj, float):
+        return float(obj)
+    elif isinstance(obj, (list, tuple)):
+        return _materialize_list(obj)
+    elif isinstance(obj, dict):
+        _load(obj)
+        return dict((_json_key(k), materialize(v)) for k, v in obj.items())
+    elif isinstance(obj, ColumnarValues):
+        return _materialize_list(obj.to_records())
+    return materialize(default(obj))
+
+
+def _is_node(obj):
+    """True if ``obj`` is walked by :func:`iterencode` rather than handed to
+    ``json`` as a whole"""
+    return hasattr(obj, '_grammar') or isinstance(obj, ColumnarValues)
+
+
+_fragment_min_size = 256
+
+
+def iterencode(obj, sort_keys=True, indent=None, separators=None,
+               batch_size=1024, backend=None, cache=False):
+    """Encode a grammar tree to JSON, yielding the output in chunks
+
+    The output is identical to ``json.dumps(obj, default=default, ...)``
+    with the same arguments, but is produced incrementally: grammar objects
+    are walked one at a time, long lists are encoded ``batch_size`` items
+    at a time, and :class:`ColumnarValues` only build the records of the
+    batch being encoded. Peak memory therefore depends on ``batch_size``,
+    not on the size of the data.
+
+    Parameters
+    ----------
+    obj : GrammarClass, GrammarDict or JSON-serializable object
+        Object to encode.
+    sort_keys, indent, separators :
+        As for ``json.dumps``.
+    batch_size : int, default 1024
+        Number of list items encoded per chunk.
+        If None, lists are encoded whole.
+    backend : string, default None
+        JSON backend used to encode the chunks. See :func:`set_backend`.
+    cache : boolean, default False
+        If True, the JSON of large plain lists and dicts and of
+        :class:`ColumnarValues` stored in a ``GrammarDict`` is cached on
+        that dict, and reused while the same object, with the same length,
+        is stored under the same key. Everything else is encoded again, so
+        only data that was replaced is re-encoded. The cached JSON is held
+        in memory; see ``GrammarDict.invalidate`` for values modified in
+        place.
+
+    The JSON of grammars shared by several nodes, see
+    ``GrammarClass.shared``, is always cached on them, as they cannot
+    change.
+    """
+    make_encoder = get_backend(backend)
+    encode_chunk = make_encoder(sort_keys=sort_keys, indent=indent,
+                                separators=separators)
+    if separators is not None:
+        item_separator, key_separator = separators
+    elif indent is not None:
+        item_separator, key_separator = ',', ': '
+    else:
+        item_separator, key_separator = ', ', ': '
+    if isinstance(indent, int):
+        indent = ' ' * indent
+    markers = set()
+    options = (make_encoder, sort_keys, indent, separators)
+    shared_options = (make_encoder, sort_keys, indent,
+                      None if separators is None else tuple(separators))
+
+    def newline(level):
+        return '\n' + indent * level if indent is not None else ''
+
+    def encode(value, level):
+        """Encode a plain value sitting at the given indent level"""
+        chunk = encode_chunk(value)
+        if indent is not None and level:
+            chunk = chunk.replace('\n', newline(level))
+        return chunk
+
+    def encode_key(key):
+        return encode_chunk(_json_key(key))
+
+    def check_circular(value):
+        if id(value) in markers:
+            raise ValueError('Circular reference detected')
+        markers.add(id(value))
+
+    def is_cacheable(value):
+        if isinstance(value, ColumnarValues):
+            return True
+        elif isinstance(value, (list, tuple)):
+            return (len(value) >= _fragment_min_size and
+                    not any(_is_node(item) for item in value))
+        elif isinstance(value, dict) and not hasattr(value, '_grammar'):
+            return (len(value) >= _fragment_min_size and
+                    not any(_is_node(v) for v in value.values()))
+        return False
+
+    def cached_fragment(fragments, key, value, level):
+        """Return the JSON of ``value`` stored in a GrammarDict under
+        ``key``, from ``fragments`` if it is current"""
+        signature = (value, len(value), options, level)
+        entry = fragments.get(key)
+        if entry is not None and entry[0] is value and \
+                entry[1:-1] == signature[1:]:
+            return entry[-1]
+        fragment = ''.join(iter_value(value, level))
+        fragments[key] = signature + (fragment, )
+        return fragment
+
+    def shared_fragment(dct, level):
+        """Return the JSON of a shared grammar, encoded once per set of
+        options and level"""
+        key = shared_options + (level, )
+        fragment = dct._fragments.get(key)
+        if fragment is None:
+            fragment = dct._fragments[key] = ''.join(iter_dict(dct, level))
+        return fragment
+
+    def iter_dict(dct, level):
+        _load(dct)
+        if not dct:
+            yield '{}'
+            return
+        check_circular(dct)
+        fragments = getattr(dct, '_fragments', None) if cache else None
+        items = sorted(dct.items()) if sort_keys else dct.items()
+        separator = '{' + newline(level + 1)
+        for key, value in items:
+            yield separator + encode_key(key) + key_separator
+            separator = item_separator + newline(level + 1)
+            if fragments is not None and is_cacheable(value):
+                yield cached_fragment(fragments, key, value, level + 1)
+                continue
+            for chunk in iter_value(value, level + 1):
+                yield chunk
+        yield newline(level) + '}'
+        markers.discard(id(dct))
+
+    def iter_batches(batches, level):
+        # Encode each batch as a list, then splice the lists together
+        closing = newline(level) + ']'
+        separator = '['
+        for batch in batches:
+            chunk = encode(batch, level)
+            yield separator + chunk[1:len(chunk) - len(closing)]
+            separator = item_separator
+        yield closing if separator != '[' else '[]'
+
+    def iter_list(lst, level):
+        if not any(_is_node(item) for item in lst):
+            if batch_size is None:
+                slices = [lst] if lst else []
+            else:
+                slices = (lst[i:i + batch_size]
+                          for i in range(0, len(lst), batch_size))
+            for chunk in iter_batches(slices, level):
+                yield chunk
+            return
+        if not lst:
+            yield '[]'
+            return
+        check_circular(lst)
+        separator = '[' + newline(level + 1)
+        for item in lst:
+            yield separator
+            separator = item_separator + newline(level + 1)
+            for chunk in iter_value(item, level + 1):
+                yield chunk
+        yield newline(level) + ']'
+        markers.discard(id(lst))
+
+    def iter_value(value, level):
+        if hasattr(value, '_grammar'):
+            value = value._grammar
+        if isinstance(value, ColumnarValues):
+            batches = value.batches(batch_size)
+            for chunk in iter_batches(batches, level):
+                yield chunk
+        elif isinstance(value, dict):
+            _load(value)
+            if getattr(value, '_shared', False):
+                yield shared_fragment(value, level)
+            elif any(_is_node(v) for v in value.values()) or \
+                    (cache and hasattr(value, '_fragments')):
+                for chunk in iter_dict(value, level):
+                    yield chunk
+            else:
+                yield encode(value, level)
+        elif isinstance(value, (list, tuple)):
+            for chunk in iter_list(value, level):
+                yield chunk
+        else:
+            yield encode(value, level)
+
+    # Top-level grammar dicts are always walked so that their children can
+    # be streamed.
+    if hasattr(obj, '_grammar'):
+        obj = obj._grammar
+    if isinstance(obj, dict):
+        return iter_dict(obj, 0)
+    return iter_value(obj, 0)
+
+
+def dump(obj, fp, buffer_size=65536, **kwargs):
+    """Stream the JSON encoding of ``obj`` to a file-like object
+
+    Chunks from :func:`iterencode` are collected into writes of roughly
+    ``buffer_size`` characters. ``fp`` only needs a ``write`` method, so
+    sockets can be written to through ``socket.makefile('w')``.
+    ``**kwargs``, including ``backend``, are passed to :func:`iterencode`.
+    """
+    buf, size = [], 0
+    for chunk in iterencode(obj, **kwargs):
+        buf.append(chunk)
+        size += len(chunk)
+        if size >= buffer_size:
+            fp.write(''.join(buf))
+            buf, size = [], 0
+    if buf:
+        fp.write(''.join(buf))
@@ -0,0 +1,1067 @@
+# -*- coding: utf-8 -*-
+"""
+
+Engine: Evaluation of Vega data transforms in Python
+
+Only ``facet``, ``filter``, ``fold``, ``formula``, ``sort``, ``stats``,
+``stack`` (zero offset), ``truncate``, ``unique``, ``zip`` and ``pie`` are
+evaluated. The other Vega transforms, ``array``, ``copy``, ``cross``,
+``flatten``, ``slice``, ``window``, ``force``, ``geo``, ``geopath``,
+``link``, ``treemap`` and ``wordcloud``, raise
+:class:`UnsupportedTransform`, and :func:`evaluate_transforms` leaves the
+data sets using them for Vega to evaluate in the browser.
+
+"""
+from __future__ import (print_function, division)
+import copy
+import math
+import re
+from decimal import Decimal
+from functools import cmp_to_key
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from .encoder import materialize
+from .scales import DataRef
+from ._compat import str_types
+
+
+class UnsupportedTransform(Exception):
+    """Raised when a transform, or the data it is applied to, cannot be
+    evaluated exactly as Vega would in the browser"""
+    pass
+
+
+def ingest(values):
+    """Wrap data values into tuples, as Vega does when it loads them"""
+    return [{'data': value, 'index': i} for i, value in enumerate(values)]
+
+
+def _is_tree(data):
+    """True if ``data`` is the output of a ``facet`` transform"""
+    return isinstance(data, dict) and 'values' in data
+
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _js_number(value):
+    """``Number.prototype.toString()`` in Javascript, for finite floats
+
+    Both languages print the shortest digits that read back as the same
+    number; only their placement differs, per ECMAScript's Number::toString.
+    """
+    if value == 0:
+        return '0'
+    elif value < 0:
+        return '-' + _js_number(-value)
+    _, digits, exponent = Decimal(repr(value)).as_tuple()
+    # value is 0.<digits> * 10 ** exponent
+    exponent += len(digits)
+    digits = ''.join(str(d) for d in digits).rstrip('0')
+    k = len(digits)
+    if k <= exponent <= 21:
+        return digits + '0' * (exponent - k)
+    elif 0 < exponent <= 21:
+        return digits[:exponent] + '.' + digits[exponent:]
+    elif -6 < exponent <= 0:
+        return '0.' + '0' * -exponent + digits
+    power = exponent - 1
+    mantissa = digits if k == 1 else digits[0] + '.' + digits[1:]
+    return '{0}e{1}{2}'.format(mantissa, '+' if power >= 0 else '-',
+                               abs(power))
+
+
+def _js_string(value):
+    """``String(value)`` in Javascript, for scalars"""
+    if value is None:
+        return 'null'
+    elif isinstance(value, bool):
+        return 'true' if value else 'false'
+    elif isinstance(value, str_types):
+        return value
+    elif isinstance(value, float):
+        if math.isnan(value):
+            return 'NaN'
+        elif math.isinf(value):
+            return 'Infinity' if value > 0 else '-Infinity'
+        return _js_number(value)
+    elif isinstance(value, int):
+        # Javascript numbers are doubles
+        return str(value) if abs(value) <= 2 ** 53 else \
+            _js_number(float(value))
+    raise UnsupportedTransform('cannot convert {0} to a string'.format(
+        type(value).__name__))
+
+
+def _truthy(value):
+    """Javascript truthiness"""
+    if value is None or value is False or value == '':
+        return False
+    elif _is_number(value):
+        return value != 0 and value == value
+    return True
+
+
+def _accessor(field):
+    """Function reading a dotted field path from a tuple, like
+    ``vg.accessor``. Missing fields read as None."""
+    path = field.split('.')
+
+    def get(obj):
+        for part in path:
+            if not isinstance(obj, dict):
+                return None
+            obj = obj.get(part)
+        return obj
+    return get
+
+
+def _pluck(field, data):
+    """Values of ``field`` in every tuple of ``data``, as read by
+    ``_accessor``"""
+    values = data
+    try:
+        for part in field.split('.'):
+            values = [v[part] for v in values]
+        return values
+    except (KeyError, TypeError):
+        # Missing fields, or paths through values that are not objects
+        get = _accessor(field)
+        return [get(d) for d in data]
+
+
+def _mutator(field):
+    """Function writing a dotted field path of a tuple, like
+    ``vg.mutator``"""
+    path = field.split('.')
+
+    def set_(obj, value):
+        for part in path[:-1]:
+            obj = obj[part]
+        obj[path[-1]] = value
+    return set_
+
+
+# Expressions
+# -----------
+# Filter tests and formulas are Javascript expressions of a tuple ``d``.
+# The subset made of field paths, literals, arithmetic, comparison and
+# boolean operators is parsed here; anything else is left to Vega.
+
+_token_re = re.compile(r'''
+    \s*(?:
+        (?P<number>(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)
+      | (?P<string>"(?:[^"\\]|\\.)*"|'(?:[^'\\]|\\.)*')
+      | (?P<name>[A-Za-z_$][\w$]*(?:\.[A-Za-z_$][\w$]*)*)
+      | (?P<op>===|!==|==|!=|<=|>=|&&|\|\||[-+*/<>!()])
+    )''', re.VERBOSE)
+
+_constants = {'true': True, 'false': False, 'null': None}
+
+_binary_precedence = {
+    '||': 1, '&&': 2,
+    '==': 3, '!=': 3, '===': 3, '!==': 3,
+    '<': 4, '<=': 4, '>': 4, '>=': 4,
+    '+': 5, '-': 5,
+    '*': 6, '/': 6,
+}
+
+
+def _tokenize(expr):
+    tokens, pos = [], 0
+    expr = expr.rstrip()
+    while pos < len(expr):
+        match = _token_re.match(expr, pos)
+        if match is None or match.end() == pos:
+            raise UnsupportedTransform(
+                'unsupported expression: {0}'.format(expr))
+        tokens.append((match.lastgroup, match.group(match.lastgroup)))
+        pos = match.end()
+    return tokens
+
+
+def _loose_equal(a, b):
+    """Javascript ``==`` for the values expressions can produce"""
+    if a is None or b is None:
+        return a is b
+    if _is_number(a) and _is_number(b):
+        return a == b
+    if type(a) is not type(b) and not (isinstance(a, str_types) and
+                                       isinstance(b, str_types)):
+        raise UnsupportedTransform('cannot compare {0!r} and {1!r}'.format(
+            a, b))
+    return a == b
+
+
+def _strict_equal(a, b):
+    """Javascript ``===``"""
+    if _is_number(a) and _is_number(b):
+        return a == b
+    if isinstance(a, str_types) and isinstance(b, str_types):
+        return a == b
+    if type(a) is not type(b):
+        return False
+    return a == b
+
+
+def _compare(op, a, b):
+    if not ((_is_number(a) and _is_number(b)) or
+            (isinstance(a, str_types) and isinstance(b, str_types))):
+        raise UnsupportedTransform('cannot compare {0!r} and {1!r}'.format(
+            a, b))
+    if op == '<':
+        return a < b
+    elif op == '<=':
+        return a <= b
+    elif op == '>':
+        return a > b
+    return a >= b
+
+
+def _arithmetic(op, a, b):
+    if op == '+' and isinstance(a, str_types) and \
+            isinstance(b, str_types):
+        return a + b
+    if not (_is_number(a) and _is_number(b)):
+        raise UnsupportedTransform('cannot compute {0!r} {1} {2!r}'.format(
+            a, op, b))
+    if op == '+':
+        return a + b
+    elif op == '-':
+        return a - b
+    elif op == '*':
+        return a * b
+    if b == 0:
+        raise UnsupportedTransform('division by zero')
+    return a / b
+
+
+def _binary(op, left, right):
+    if op == '&&':
+        return lambda d: (lambda a: right(d) if _truthy(a) else a)(left(d))
+    elif op == '||':
+        return lambda d: (lambda a: a if _truthy(a) else right(d))(left(d))
+    elif op in ('==', '!='):
+        negate = op == '!='
+        return lambda d: _loose_equal(left(d), right(d)) != negate
+    elif op in ('===', '!=='):
+        negate = op == '!=='
+        return lambda d: _strict_equal(left(d), right(d)) != negate
+    elif op in ('<', '<=', '>', '>='):
+        return lambda d: _compare(op, left(d), right(d))
+    return lambda d: _arithmetic(op, left(d), right(d))
+
+
+def _negate(operand):
+    def negate(d):
+        value = operand(d)
+        if not _is_number(value):
+            raise UnsupportedTransform('cannot negate {0!r}'.format(value))
+        return -value
+    return negate
+
+
+class _Parser(object):
+    """Precedence-climbing parser turning an expression into a tree of
+    ``('literal', value)``, ``('field', path)``, ``('not', node)``,
+    ``('neg', node)`` and ``('binary', op, left, right)`` nodes"""
+
+    def __init__(self, expr):
+        self.expr = expr
+        self.tokens = _tokenize(expr)
+        self.pos = 0
+
+    def fail(self):
+        raise UnsupportedTransform(
+            'unsupported expression: {0}'.format(self.expr))
+
+    def peek(self):
+        if self.pos < len(self.tokens):
+            return self.tokens[self.pos]
+        return (None, None)
+
+    def next(self):
+        token = self.peek()
+        if token[0] is None:
+            self.fail()
+        self.pos += 1
+        return token
+
+    def parse(self):
+        node = self.expression(1)
+        if self.pos != len(self.tokens):
+            self.fail()
+        return node
+
+    def expression(self, min_precedence):
+        left = self.unary()
+        while True:
+            kind, op = self.peek()
+            precedence = _binary_precedence.get(op) if kind == 'op' else None
+            if precedence is None or precedence < min_precedence:
+                return left
+            self.pos += 1
+            left = ('binary', op, left, self.expression(precedence + 1))
+
+    def unary(self):
+        kind, value = self.next()
+        if kind == 'op' and value == '!':
+            return ('not', self.unary())
+        elif kind == 'op' and value == '-':
+            return ('neg', self.unary())
+        elif kind == 'op' and value == '(':
+            node = self.expression(1)
+            if self.next() != ('op', ')'):
+                self.fail()
+            return node
+        elif kind == 'number':
+            number = float(value)
+            number = int(number) if number == int(number) and \
+                re.match(r'^\d+$', value) else number
+            return ('literal', number)
+        elif kind == 'string':
+            return ('literal', re.sub(r'\\(.)', r'\1', value[1:-1]))
+        elif kind == 'name':
+            if value in _constants:
+                return ('literal', _constants[value])
+            root, _, field = value.partition('.')
+            if root != 'd':
+                self.fail()
+            return ('field', field)
+        self.fail()
+
+
+def _compile(node):
+    """Function of a tuple evaluating an expression tree"""
+    kind = node[0]
+    if kind == 'literal':
+        value = node[1]
+        return lambda d: value
+    elif kind == 'field':
+        return _accessor(node[1]) if node[1] else (lambda d: d)
+    elif kind == 'not':
+        operand = _compile(node[1])
+        return lambda d: not _truthy(operand(d))
+    elif kind == 'neg':
+        return _negate(_compile(node[1]))
+    return _binary(node[1], _compile(node[2]), _compile(node[3]))
+
+
+def compile_expression(expr):
+    """Compile a Vega filter test or formula into a function of a tuple
+
+    Only field paths of ``d``, number, string, boolean and null literals,
+    parentheses, ``+ - * /``, comparisons and ``! && ||`` are supported.
+    Operations whose Javascript result depends on type coercion, such as
+    comparing a number to a string, raise :class:`UnsupportedTransform`
+    when evaluated.
+    """
+    return _compile(_Parser(expr).parse())
+
+
+# Vectorized expressions
+# ----------------------
+# When the fields an expression reads hold only ints, or only floats, it is
+# evaluated on NumPy arrays of them, one operation per column instead of
+# one function call per tuple. Whatever the arrays cannot reproduce exactly
+# (other types, division by zero, ints beyond 2 ** 53, mixed result types)
+# raises ``_NotVectorized``, and the tuples are evaluated one at a time.
+
+class _NotVectorized(Exception):
+    pass
+
+
+_max_exact_int = 2 ** 53
+
+
+def _column(values):
+    """NumPy array of a field's values, if they are all ints or all
+    floats"""
+    types = set(map(type, values))
+    if types == set([float]):
+        return np.array(values, dtype=np.float64)
+    elif types == set([int]):
+        column = np.array(values, dtype=object)
+        if np.abs(column).max() > _max_exact_int:
+            raise _NotVectorized()
+        return column.astype(np.int64)
+    raise _NotVectorized()
+
+
+def _vector_truthy(a):
+    if a.dtype.kind == 'b':
+        return a
+    elif a.dtype.kind == 'f':
+        return (a != 0) & ~np.isnan(a)
+    return a != 0
+
+
+def _vector_binary(op, a, b):
+    numbers = a.dtype.kind in 'if' and b.dtype.kind in 'if'
+    if op in ('&&', '||'):
+        # The operand values are returned, so they must be of one type
+        if a.dtype.kind != b.dtype.kind:
+            raise _NotVectorized()
+        a, b = np.broadcast_arrays(a, b)
+        if op == '&&':
+            return np.where(_vector_truthy(a), b, a)
+        return np.where(_vector_truthy(a), a, b)
+    elif op in ('==', '!=', '===', '!=='):
+        if not numbers and not (a.dtype.kind == b.dtype.kind == 'b'):
+            raise _NotVectorized()
+        return (a == b) if op in ('==', '===') else (a != b)
+    elif not numbers:
+        raise _NotVectorized()
+    elif op == '<':
+        return a < b
+    elif op == '<=':
+        return a <= b
+    elif op == '>':
+        return a > b
+    elif op == '>=':
+        return a >= b
+    elif op == '/':
+        if np.any(b == 0):
+            raise _NotVectorized()
+        return np.true_divide(a, b)
+    if a.dtype.kind == b.dtype.kind == 'i':
+        # Python ints do not overflow; checked in floats, which are exact
+        # up to 2 ** 53
+        bound = _vector_binary(op, a.astype(np.float64),
+                               b.astype(np.float64))
+        if np.any(np.abs(bound) > _max_exact_int):
+            raise _NotVectorized()
+    if op == '+':
+        return a + b
+    elif op == '-':
+        return a - b
+    return a * b
+
+
+def _vector_evaluate(node, columns):
+    """Evaluate an expression tree on arrays of the fields it reads"""
+    kind = node[0]
+    if kind == 'literal':
+        value = node[1]
+        if type(value) is int and abs(value) <= _max_exact_int:
+            return np.array(value, dtype=np.int64)
+        elif type(value) is float:
+            return np.array(value, dtype=np.float64)
+        raise _NotVectorized()
+    elif kind == 'field':
+        if not node[1]:
+            raise _NotVectorized()
+        return columns[node[1]]
+    elif kind == 'not':
+        return ~_vector_truthy(_vector_evaluate(node[1], columns))
+    elif kind == 'neg':
+        operand = _vector_evaluate(node[1], columns)
+        if operand.dtype.kind not in 'if':
+            raise _NotVectorized()
+        return -operand
+    return _vector_binary(node[1], _vector_evaluate(node[2], columns),
+                          _vector_evaluate(node[3], columns))
+
+
+def _fields(node):
+    """Field paths read by an expression tree"""
+    if node[0] == 'field':
+        return set([node[1]])
+    return set().union(*[_fields(child) for child in node[1:]
+                         if isinstance(child, tuple)])
+
+
+def _evaluate_all(expr, data):
+    """Values of ``expr`` for every tuple of ``data``, as a list"""
+    node = _Parser(expr).parse()
+    if np is not None and len(data):
+        try:
+            columns = dict((field, _column(_pluck(field, data)))
+                           for field in _fields(node))
+            with np.errstate(all='ignore'):
+                result = _vector_evaluate(node, columns)
+            return np.broadcast_to(result, (len(data), )).tolist()
+        except _NotVectorized:
+            pass
+    func = _compile(node)
+    return [func(d) for d in data]
+
+
+# Transforms
+# ----------
+# Each function takes the transform definition as a plain dict, the input
+# data (a list of tuples, or the tree output by ``facet``) and a function
+# returning the evaluated tuples of another data set by name.
+
+def _apply_to_values(func):
+    """Apply a transform of tuple lists to a list, or to every facet of a
+    tree"""
+    def apply(spec, data, lookup):
+        if _is_tree(data):
+            for group in data['values']:
+                group['values'] = func(spec, group['values'], lookup)
+            return data
+        return func(spec, data, lookup)
+    return apply
+
+
+def _facet(spec, data, lookup):
+    if _is_tree(data):
+        raise UnsupportedTransform('nested facets are not supported')
+    keys = [_accessor(k) for k in spec.get('keys', [])]
+    result = {'key': '', 'keys': [], 'values': []}
+    groups = result['values']
+    if not keys:
+        groups.append({'key': '', 'keys': [], 'index': 0,
+                       'values': list(data)})
+    else:
+        by_key = {}
+        for d in data:
+            values = [k(d) for k in keys]
+            key = '|'.join(_js_string(v) for v in values)
+            group = by_key.get(key)
+            if group is None:
+                group = by_key[key] = {'key': key, 'keys': values,
+                                       'index': len(groups), 'values': []}
+                groups.append(group)
+            group['values'].append(d)
+    if spec.get('sort'):
+        for group in groups:
+            group['values'] = _sort({'by': spec['sort']}, group['values'],
+                                    lookup)
+    return result
+
+
+def _filter(spec, data, lookup):
+    keep = _evaluate_all(spec['test'], data)
+    return [d for d, value in zip(data, keep) if _truthy(value)]
+
+
+def _formula(spec, data, lookup):
+    set_ = _mutator(spec['field'])
+    for d, value in zip(data, _evaluate_all(spec['expr'], data)):
+        set_(d, value)
+    return data
+
+
+def _sort(spec, data, lookup):
+    if _is_tree(data):
+        raise UnsupportedTransform('sort is only supported on flat data')
+    fields = spec.get('by', [])
+    if isinstance(fields, str_types):
+        fields = [fields]
+    order = []
+    for field in fields:
+        sign = 1
+        if field[:1] in ('-', '+'):
+            sign = -1 if field[0] == '-' else 1
+            field = field[1:]
+        order.append((_accessor(field), sign))
+
+    def compare(a, b):
+        for get, sign in order:
+            x, y = get(a), get(b)
+            if x != y:
+                return sign if _compare('>', x, y) else -sign
+        return 0
+    return sorted(data, key=cmp_to_key(compare))
+
+
+def _stats(spec, data, lookup):
+    get = _accessor(spec.get('value', 'data'))
+    groups = data['values'] if _is_tree(data) else [data]
+    output = []
+    for group in groups:
+        tuples = group if isinstance(group, list) else group['values']
+        values = [get(d) for d in tuples]
+        if not values or not all(_is_number(v) for v in values):
+            raise UnsupportedTransform('stats needs numbers')
+        stats = {} if isinstance(group, list) else group
+        if spec.get('median'):
+            ordered = sorted(values)
+            i = len(ordered) >> 1
+            stats['median'] = (ordered[i] if len(ordered) % 2 else
+                               (ordered[i - 1] + ordered[i]) / 2.0)
+        # Welford's algorithm, in the order Vega accumulates
+        mean, m2 = 0, 0
+        for i, v in enumerate(values):
+            delta = v - mean
+            mean = mean + delta / (i + 1)
+            m2 = m2 + delta * (v - mean)
+        variance = m2 / (len(values) - 1) if len(values) > 1 else float('nan')
+        stats.update(count=len(values), min=min(values), max=max(values),
+                     sum=sum(values), mean=mean, variance=variance,
+                     stdev=math.sqrt(variance))
+        if spec.get('assign'):
+            shared = dict((k, stats[k]) for k in stats
+                          if k not in ('key', 'keys', 'index', 'values'))
+            for d in tuples:
+                d['stats'] = shared
+        output.append(stats)
+    return output
+
+
+def _stack_offsets(points, values):
+    """Bottom, top and center of each value stacked on the earlier values
+    at the same point, as lists"""
+    column = _column(values)
+    if column.dtype.kind == 'i' and \
+            np.abs(column).sum() > _max_exact_int:
+        raise _NotVectorized()
+    try:
+        keys = _column(points)
+        if keys.dtype.kind == 'f' and np.isnan(keys).any():
+            raise _NotVectorized()
+    except _NotVectorized:
+        # Points are told apart by their string form, as object keys
+        keys = np.array([_js_string(p) for p in points])
+    _, codes = np.unique(keys, return_inverse=True)
+    codes = codes.ravel()
+    # Rank of each value among those with its key
+    order = np.argsort(codes, kind='mergesort')
+    starts = np.flatnonzero(np.r_[True, np.diff(codes[order]) != 0])
+    counts = np.diff(np.r_[starts, len(codes)])
+    ranks = np.empty(len(codes), dtype=np.int64)
+    ranks[order] = np.arange(len(codes)) - np.repeat(starts, counts)
+    # Row r + 1 of the running sums is the top of the value ranked r; the
+    # sums run down the rows in order, as Vega adds the values
+    table = np.zeros((ranks.max() + 2, codes.max() + 1), dtype=column.dtype)
+    table[ranks + 1, codes] = column
+    sums = np.cumsum(table, axis=0)
+    bottoms, tops = sums[ranks, codes], sums[ranks + 1, codes]
+    centers = bottoms + column / 2
+    bottoms = bottoms.tolist()
+    for i in np.flatnonzero(ranks == 0).tolist():
+        # The first baseline is Javascript's 0, not 0.0
+        bottoms[i] = 0
+    return bottoms, tops.tolist(), centers.tolist()
+
+
+def _stack(spec, data, lookup):
+    if spec.get('offset', 'zero') != 'zero' or \
+            spec.get('order', 'default') != 'default':
+        raise UnsupportedTransform('only zero offset stacks are supported')
+    if not _is_tree(data):
+        # Vega stacks the facets of a tree; a flat list is left unchanged
+        return data
+    tuples = [d for group in data['values'] for d in group['values']]
+    points = _pluck(spec.get('point', 'index'), tuples)
+    values = _pluck(spec.get('height', 'data'), tuples)
+    if np is not None and tuples:
+        try:
+            offsets = zip(tuples, *_stack_offsets(points, values))
+            for d, y2, y, cy in offsets:
+                d['y2'], d['y'], d['cy'] = y2, y, cy
+            return data
+        except _NotVectorized:
+            pass
+    if not all(_is_number(v) for v in values):
+        raise UnsupportedTransform('stack heights must be numbers')
+    baselines = {}
+    for d, point, value in zip(tuples, points, values):
+        key = _js_string(point)
+        y0 = baselines.get(key, 0)
+        d['y2'], d['y'], d['cy'] = y0, y0 + value, y0 + value / 2
+        baselines[key] = y0 + value
+    return data
+
+
+def _zip(spec, data, lookup):
+    other = lookup(spec['with'])
+    if _is_tree(other) or not other:
+        raise UnsupportedTransform('zip needs a flat, non-empty data set')
+    output = spec.get('as', 'zip')
+    key = _accessor(spec.get('key', 'data'))
+    by_key = None
+    if spec.get('withKey'):
+        with_key = _accessor(spec['withKey'])
+        by_key = dict((_js_string(with_key(s)), s) for s in other)
+    for i, d in enumerate(data):
+        if by_key is None:
+            d[output] = other[i % len(other)]
+        else:
+            match = by_key.get(_js_string(key(d)))
+            d[output] = match if match is not None else spec.get('default')
+    return data
+
+
+def _fold(spec, data, lookup):
+    if _is_tree(data):
+        raise UnsupportedTransform('fold is only supported on flat data')
+    fields = spec.get('fields') or []
+    if isinstance(fields, str_types):
+        fields = [fields]
+    output = spec.get('output') or {}
+    if not isinstance(output, dict):
+        raise UnsupportedTransform('fold output must map key and value')
+    key_name = output.get('key', 'key')
+    value_name = output.get('value', 'value')
+    getters = [_accessor(f) for f in fields]
+    folded = []
+    for d in data:
+        for field, get in zip(fields, getters):
+            folded.append({'index': len(folded), 'data': d.get('data'),
+                           key_name: field, value_name: get(d)})
+    return folded
+
+
+# Whitespace removed by ``String.prototype.trim``
+_js_spaces = (u'\t\n\x0b\x0c\r \xa0\u1680\u2000\u2001\u2002\u2003\u2004'
+              u'\u2005\u2006\u2007\u2008\u2009\u200a'
+              u'\u2028\u2029\u202f\u205f\u3000\ufeff')
+# ``vg_truncate_word_re``, per-mille sign included
+_word_re = re.compile(u'([\t\n\x0b\x0c\r \xa0\u1680\u180e\u2000-\u200a'
+                      u'\u2028\u2029\u202f\u205f\u2030\u3000\ufeff])')
+
+
+def _truncate_on_word(text, length, reverse=False):
+    """``vg_truncateOnWord``: whole words and spaces that fit ``length``"""
+    tokens = _word_re.split(text)
+    if reverse:
+        tokens.reverse()
+    kept, count = [], 0
+    for token in tokens:
+        count += len(token)
+        if count <= length:
+            kept.append(token)
+    if reverse:
+        kept.reverse()
+    if kept:
+        return ''.join(kept).strip(_js_spaces)
+    return tokens[0][:length]
+
+
+def _truncate_text(text, length, position, word_break, ellipsis):
+    """``vg.truncate``"""
+    if len(text) <= length:
+        return text
+    keep = max(0, length - len(ellipsis))
+    if position == 'left':
+        return ellipsis + (_truncate_on_word(text, keep, True) if word_break
+                           else text[len(text) - keep:])
+    elif position in ('middle', 'center'):
+        head, tail = (keep + 1) // 2, keep // 2
+        return ((_truncate_on_word(text, head) if word_break
+                 else text[:head]) + ellipsis +
+                (_truncate_on_word(text, tail, True) if word_break
+                 else text[len(text) - tail:]))
+    return (_truncate_on_word(text, keep) if word_break
+            else text[:keep]) + ellipsis
+
+
+def _truncate(spec, data, lookup):
+    if 'limit' not in spec:
+        raise UnsupportedTransform('truncate needs a limit')
+    get = _accessor(spec.get('value', 'data'))
+    output = spec.get('output', 'truncate')
+    ellipsis = spec.get('ellipsis', '...')
+    for d in data:
+        text = get(d)
+        # Javascript lengths count UTF-16 code units
+        if not isinstance(text, str_types) or \
+                any(ord(c) > 0xffff for c in text + ellipsis):
+            raise UnsupportedTransform('truncate needs text')
+        d[output] = _truncate_text(text, spec['limit'],
+                                   spec.get('position', 'right'),
+                                   spec.get('wordbreak', False), ellipsis)
+    return data
+
+
+# Keys that ``key in {}`` finds on Object.prototype
+_prototype_keys = frozenset([
+    'constructor', 'hasOwnProperty', 'isPrototypeOf',
+    'propertyIsEnumerable', 'toLocaleString', 'toString', 'valueOf',
+    '__proto__', '__defineGetter__', '__defineSetter__',
+    '__lookupGetter__', '__lookupSetter__'])
+
+
+def _unique(spec, data, lookup):
+    if _is_tree(data):
+        raise UnsupportedTransform('unique is only supported on flat data')
+    if not spec.get('field') or \
+            not isinstance(spec.get('as', 'field'), str_types):
+        raise UnsupportedTransform('unique needs a field and a name')
+    get = _accessor(spec['field'])
+    output = spec.get('as', 'field')
+    seen, values = set(), []
+    for d in data:
+        value = get(d)
+        # Values are told apart by their string form, as object keys
+        key = 'undefined' if value is None and \
+            not _has_path(d, spec['field']) else _js_string(value)
+        if key in _prototype_keys:
+            raise UnsupportedTransform('cannot key on {0}'.format(key))
+        if key not in seen:
+            seen.add(key)
+            values.append({output: value})
+    return values
+
+
+def _has_path(obj, field):
+    """True if the dotted ``field`` is present in ``obj``"""
+    for part in field.split('.'):
+        if not isinstance(obj, dict) or part not in obj:
+            return False
+        obj = obj[part]
+    return True
+
+
+def _pie(spec, data, lookup):
+    if _is_tree(data):
+        raise UnsupportedTransform('pie is only supported on flat data')
+    get = _accessor(spec.get('value', 'data'))
+    values = [get(d) for d in data]
+    if not all(_is_number(v) for v in values) or not sum(values):
+        raise UnsupportedTransform('pie needs numbers with a non-zero sum')
+    scale = 2 * math.pi / sum(values)
+    angle = 0
+    for d, value in zip(data, values):
+        d['value'] = value
+        d['startAngle'] = angle
+        d['midAngle'] = angle + 0.5 * value * scale
+        angle += value * scale
+        d['endAngle'] = angle
+    return data
+
+
+_transforms = {
+    'facet': _facet,
+    'filter': _apply_to_values(_filter),
+    'formula': _apply_to_values(_formula),
+    'sort': _sort,
+    'stats': _stats,
+    'stack': _stack,
+    'zip': _zip,
+    'pie': _pie,
+    'fold': _fold,
+    'truncate': _apply_to_values(_truncate),
+    'unique': _unique,
+}
+
+
+def supported(transform):
+    """True if the type of ``transform`` can be evaluated by this module,
+    see the module docstring for the list"""
+    return materialize(transform).get('type') in _transforms
+
+
+def apply_transforms(transforms, data, lookup=None):
+    """Run a chain of transforms on a list of tuples
+
+    Parameters
+    ----------
+    transforms : list of Transform or dicts
+        Transforms to apply, in order.
+    data : list of dicts
+        Tuples, as returned by :func:`ingest`. They are modified in place,
+        as Vega does.
+    lookup : callable, default None
+        Returns the tuples of another data set by name, for ``zip``.
+
+    Returns
+    -------
+    List of tuples, or for ``facet`` a tree
+    ``{'key': '', 'keys': [], 'values': [group, ...]}`` whose groups hold
+    their tuples in ``values``.
+    """
+    def no_lookup(name):
+        raise UnsupportedTransform('unknown data set: {0}'.format(name))
+    lookup = lookup or no_lookup
+    for transform in transforms:
+        spec = materialize(transform)
+        func = _transforms.get(spec.get('type'))
+        if func is None:
+            raise UnsupportedTransform('unsupported transform: {0}'.format(
+                spec.get('type')))
+        data = func(spec, data, lookup)
+    return data
+
+
+def evaluate(data, datasets=None):
+    """Evaluate a ``Data`` object as Vega would in the browser
+
+    Parameters
+    ----------
+    data : Data
+        Data set with ``values`` or a ``source``, and optional transforms.
+    datasets : dict or KeyedList of Data, default None
+        Other data sets, by name, for ``source`` and ``zip``.
+
+    Returns
+    -------
+    The transformed tuples, see :func:`apply_transforms`.
+
+    Raises
+    ------
+    UnsupportedTransform
+        If the data is loaded from a ``url``, has a ``format``, or uses a
+        transform or expression that is not supported.
+    """
+    datasets = datasets if datasets is not None else {}
+    cache, active = {}, set()
+
+    def lookup(name):
+        if name in cache:
+            return copy.deepcopy(cache[name])
+        if name in active:
+            raise UnsupportedTransform('circular data reference')
+        try:
+            target = datasets[name]
+        except (KeyError, IndexError, TypeError):
+            raise UnsupportedTransform('unknown data set: {0}'.format(name))
+        active.add(name)
+        cache[name] = run(target)
+        active.discard(name)
+        return copy.deepcopy(cache[name])
+
+    def run(target):
+        # Read through the grammar: LazyData redefines ``source``
+        grammar = target.grammar
+        if 'url' in grammar or 'format' in grammar:
+            raise UnsupportedTransform('only inline values are supported')
+        if 'source' in grammar:
+            tuples = lookup(grammar['source'])
+        elif target.values is not None:
+            tuples = ingest(materialize(target.values))
+        else:
+            tuples = []
+        return apply_transforms(grammar.get('transform') or [], tuples,
+                                lookup)
+
+    return run(data)
+
+
+def _children(obj):
+    """(key, child) pairs of a grammar node, dict or list"""
+    if hasattr(obj, '_grammar'):
+        return list(obj._grammar.items())
+    elif isinstance(obj, dict):
+        return list(obj.items())
+    elif isinstance(obj, (list, tuple)):
+        return list(enumerate(obj))
+    return []
+
+
+def _references(vis, name):
+    """Paths from ``vis`` to the scale ``DataRef``s to the data set
+    ``name``, and whether anything else in the spec refers to it"""
+    refs, other = [], False
+    stack = [((k, ), v) for k, v in vis._grammar.items() if k != 'data']
+    while stack:
+        path, obj = stack.pop()
+        target = getattr(obj, '_grammar', obj)
+        if isinstance(target, dict) and target.get('data') == name:
+            if isinstance(obj, DataRef):
+                refs.append(path)
+            else:
+                # Mark sources, or references we cannot rewrite
+                other = True
+        stack.extend((path + (k, ), v) for k, v in _children(obj))
+    for entry in vis.data:
+        grammar = entry.grammar
+        if grammar.get('source') == name or any(
+                materialize(t).get('with') == name
+                for t in grammar.get('transform') or []):
+            other = True
+    return refs, other
+
+
+def _owned(vis, path):
+    """Node at ``path`` below ``vis``, giving the nodes on the way their
+    own copy of any grammar they share with other charts, so that it can
+    be changed. See ``GrammarClass.shared``."""
+    obj = vis
+    for key in path:
+        if hasattr(obj, '_grammar'):
+            obj = obj._unshare()[key]
+        else:
+            obj = obj[key]
+    return obj
+
+
+def _plain(tuples):
+    """True if every tuple only wraps a value, as freshly ingested ones"""
+    return all(isinstance(t, dict) and set(t) == set(['data', 'index'])
+               for t in tuples)
+
+
+def evaluate_transforms(vis, names=None):
+    """Replace the transforms of data sets with their computed values
+
+    Each data set with a ``source`` or transforms is evaluated with
+    :func:`evaluate`. It is then replaced by inline ``values`` if the result
+    can be written so that the spec renders the same:
+
+    * Tuples that only carry their original value, as after ``filter``,
+      ``formula`` on ``data.`` fields or ``sort``, are written back as the
+      values they wrap. Vega numbers the tuples again, so their ``index``
+      follows the new order.
+    * Other flat results, such as the output of ``stats`` or ``pie``, are
+      only written if the data set is referenced by nothing but scale
+      domains and ranges. Their tuples are wrapped again when Vega loads
+      them, so the fields of those ``DataRef``s are prefixed with
+      ``data.``, and only the referenced fields are kept.
+
+    Data sets with unsupported transforms, such as ``fold``, ``window``,
+    ``truncate`` or ``unique`` (see the module docstring), URLs, or results
+    that cannot be written, such as the trees output by ``facet``, are left
+    for Vega to evaluate in the browser.
+
+    Parameters
+    ----------
+    vis : Visualization
+        Visualization to modify in place.
+    names : list of strings, default None
+        Data sets to evaluate. If None, all of them are.
+
+    Returns
+    -------
+    list of strings
+        Names of the data sets that were replaced.
+    """
+    results = []
+    for entry in vis.data:
+        grammar = entry.grammar
+        if names is not None and entry.name not in names:
+            continue
+        if 'source' not in grammar and not grammar.get('transform'):
+            continue
+        try:
+            results.append((entry, evaluate(entry, vis.data)))
+        except UnsupportedTransform:
+            continue
+
+    replaced = []
+    for entry, tuples in results:
+        if _is_tree(tuples):
+            continue
+        if _plain(tuples):
+            values = [t['data'] for t in tuples]
+        else:
+            paths, other = _references(vis, entry.name)
+            if other:
+                continue
+            refs = [_owned(vis, path) for path in paths]
+            fields = []
+            for ref in refs:
+                field = ref.field
+                fields.extend([field] if isinstance(field, str_types) else
+                              field or [])
+            roots = set(f.split('.')[0] for f in fields)
+            values = [dict((k, v) for k, v in t.items()
+                           if not roots or k in roots) for t in tuples]
+            for ref in refs:
+                if isinstance(ref.field, str_types):
+                    ref.field = 'data.' + ref.field
+                elif ref.field:
+                    ref.field = ['data.' + f for f in ref.field]
+        entry.grammar.pop('source', None)
+        entry.grammar.pop('transform', None)
+        entry.values = values
+        replaced.append(entry.name)
+    return replaced
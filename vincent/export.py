@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+"""
+
+Export: Write batches of charts with shared, deduplicated data files
+
+"""
+from __future__ import (print_function, division)
+import os
+
+
+class ExportReport(object):
+    """Summary of an :func:`export_charts` run
+
+    Attributes
+    ----------
+    specs : list of strings
+        Paths of the spec files written.
+    blocks : int
+        Number of ``Data`` entries whose values were exported.
+    unique_blocks : int
+        Number of distinct data files those entries reference.
+    written_blocks : int
+        Number of data files written. Files left by an earlier run with
+        the same contents are not written again.
+    total_bytes : int
+        Size of the data if every chart held its own copy.
+    unique_bytes : int
+        Size of the distinct data files.
+    """
+    def __init__(self):
+        self.specs = []
+        self.blocks = 0
+        self.unique_blocks = 0
+        self.written_blocks = 0
+        self.total_bytes = 0
+        self.unique_bytes = 0
+
+    @property
+    def saved_bytes(self):
+        """int : Bytes saved by storing each distinct data block once"""
+        return self.total_bytes - self.unique_bytes
+
+    def __str__(self):
+        return ('{0} specs, {1} data blocks in {2} files ({3} written); '
+                '{4} of {5} data bytes saved'.format(
+                    len(self.specs), self.blocks, self.unique_blocks,
+                    self.written_blocks, self.saved_bytes, self.total_bytes))
+
+    def __repr__(self):
+        return '<ExportReport: {0}>'.format(self)
+
+
+def export_charts(charts, spec_path, data_path, data_url=None,
+                  pretty_print=True, backend=None):
+    """Write many visualizations, storing each distinct data block once
+
+    The values of every ``Data`` entry are written to a file in
+    ``data_path`` named by the hash of its contents, as with
+    ``Visualization.to_json(data_path=...)``. Each spec is written to
+    ``<name>.json`` in ``spec_path``, with its data referenced by ``url``.
+    Charts built from the same source data therefore share one file per
+    data block, and a values object used by several charts is only encoded
+    once. The visualizations are not modified, and their values should not
+    change during the export.
+
+    Parameters
+    ----------
+    charts : dict or iterable of (name, Visualization) pairs
+        Visualizations to export, by spec file name.
+    spec_path : string
+        Directory to write the specs to. It is created if needed.
+    data_path : string
+        Directory to write the data files to. It is created if needed.
+    data_url : string, default None
+        URL prefix of the data files, if it differs from ``data_path``.
+    pretty_print, backend :
+        As for ``to_json``.
+
+    Returns
+    -------
+    ExportReport
+        Spec paths written, and data block and byte counts.
+
+    Example
+    -------
+    >>> report = export_charts({'sales': line, 'costs': bar}, 'specs',
+    ...                        'specs/data', data_url='data')
+    >>> print(report)
+    """
+    if hasattr(charts, 'items'):
+        charts = charts.items()
+    if not os.path.isdir(spec_path):
+        os.makedirs(spec_path)
+    report = ExportReport()
+    # id of values -> (values, file name, size); the values are kept so
+    # their id cannot be reused during the export
+    encoded = {}
+    sizes = {}
+    for name, vis in charts:
+        data = []
+        for entry in vis.data:
+            values = entry.values
+            if values is None:
+                data.append(entry)
+                continue
+            written = encoded.get(id(values))
+            if written is None or written[0] is not values:
+                filename, size, created = entry._write_values(data_path)
+                written = encoded[id(values)] = (values, filename, size)
+                report.written_blocks += created
+            report.blocks += 1
+            report.total_bytes += written[2]
+            sizes[written[1]] = written[2]
+            data.append(entry._with_url(written[1], data_path, data_url))
+        path = os.path.join(spec_path, name + '.json')
+        vis._with_data(data).to_json(path, pretty_print=pretty_print,
+                                     backend=backend)
+        report.specs.append(path)
+    report.unique_blocks = len(sizes)
+    report.unique_bytes = sum(sizes.values())
+    return report
@@ -17,6 +17,7 @@ class LegendProperties(GrammarClass):
     elements. Each element can use a standard ValueRef for values.
 
     """
+    __slots__ = ()
 
     @grammar(PropertySet)
     def title(value):
@@ -46,6 +47,7 @@ class Legend(GrammarClass):
     They can be customized via a LegendProperty object.
 
     """
+    __slots__ = ()
 
     @grammar(str_types)
     def size(value):
@@ -7,6 +7,8 @@ Marks: Classes to define Vega Marks
 from .core import grammar, GrammarClass, KeyedList
 from .values import ValueRef
 from .properties import PropertySet
+from .scales import Scale
+from .transforms import Transform
 from ._compat import str_types
 
 
@@ -17,6 +19,8 @@ class MarkProperties(GrammarClass):
     data. This class defines four events for which the properties may
     change.
     """
+    __slots__ = ()
+
     @grammar(PropertySet)
     def enter(value):
         """PropertySet : properties applied when data is loaded
@@ -45,6 +49,9 @@ class MarkProperties(GrammarClass):
 class MarkRef(GrammarClass):
     """Definitions for Mark source data
     """
+    __slots__ = ()
+    _element_types = {'transform': Transform}
+
     @grammar(str_types)
     def data(value):
         """string : Name of the source `Data`"""
@@ -61,6 +68,7 @@ class Mark(GrammarClass):
     bar, line etc.. This class defines how the marks appear and what data
     the marks represent.
     """
+    __slots__ = ()
     _valid_type_values = frozenset(['rect', 'symbol', 'path', 'arc', 'area',
                                     'line', 'image', 'text', 'group'])
 
@@ -133,3 +141,7 @@ class Mark(GrammarClass):
         """list or KeyedList: For grouped marks, you can define a set of scales
         for within the mark groups
         """
+
+
+# Grouped marks nest marks of their own
+Mark._element_types = {'marks': Mark, 'scales': Scale}
@@ -0,0 +1,222 @@
+# -*- coding: utf-8 -*-
+"""
+
+Patch: JSON Patch (RFC 6902) diffs between Vincent grammar trees
+
+"""
+from __future__ import (print_function, division)
+import copy
+import json
+
+from .columnar import ColumnarValues
+from .encoder import default, materialize, _json_key, _load
+
+
+def _pointer(path, key):
+    """Append ``key`` to a JSON Pointer"""
+    key = _json_key(key) if not isinstance(key, int) else str(key)
+    return path + '/' + key.replace('~', '~0').replace('/', '~1')
+
+
+def _unwrap(obj):
+    """Reduce grammar objects to the structure they are serialized as"""
+    while hasattr(obj, '_grammar'):
+        obj = obj._grammar
+    _load(obj)
+    if isinstance(obj, ColumnarValues):
+        return obj.to_records()
+    return obj
+
+
+def _same_json(a, b):
+    """True if ``a`` and ``b`` serialize to the same JSON
+
+    Python equality is not enough: ``1 == 1.0 == True`` and ``0.0 == -0.0``
+    encode differently, while NaN is not equal to itself."""
+    return json.dumps(a, sort_keys=True, default=default) == \
+        json.dumps(b, sort_keys=True, default=default)
+
+
+def _keys(lst):
+    """Return the keys of a KeyedList, or None if it cannot be keyed"""
+    attr_name = getattr(lst, 'attr_name', None)
+    if attr_name is None:
+        return None
+    try:
+        keys = [getattr(x, attr_name) for x in lst]
+    except AttributeError:
+        return None
+    if len(keys) != len(set(keys)):
+        return None
+    return keys
+
+
+def _diff_keyed(old, new, old_keys, new_keys, path, ops):
+    """Match elements by key: remove, then move or add into place"""
+    new_set = set(new_keys)
+    current = list(old_keys)
+    old_by_key = dict(zip(old_keys, old))
+    for i in reversed(range(len(current))):
+        if current[i] not in new_set:
+            ops.append({'op': 'remove', 'path': _pointer(path, i)})
+            del current[i]
+    for i, (key, value) in enumerate(zip(new_keys, new)):
+        if key in old_by_key:
+            j = current.index(key, i)
+            if j != i:
+                ops.append({'op': 'move', 'from': _pointer(path, j),
+                            'path': _pointer(path, i)})
+                current.insert(i, current.pop(j))
+            _diff(old_by_key[key], value, _pointer(path, i), ops)
+        else:
+            ops.append({'op': 'add', 'path': _pointer(path, i),
+                        'value': materialize(value)})
+            current.insert(i, key)
+
+
+def _diff_list(old, new, path, ops):
+    old_keys, new_keys = _keys(old), _keys(new)
+    if old_keys is not None and new_keys is not None:
+        return _diff_keyed(old, new, old_keys, new_keys, path, ops)
+
+    start = len(ops)
+    for i in range(min(len(old), len(new))):
+        _diff(old[i], new[i], _pointer(path, i), ops)
+    for i in reversed(range(len(new), len(old))):
+        ops.append({'op': 'remove', 'path': _pointer(path, i)})
+    for value in new[len(old):]:
+        ops.append({'op': 'add', 'path': path + '/-',
+                    'value': materialize(value)})
+    if len(ops) - start > len(new):
+        # Elements were shifted; replacing the list is shorter
+        del ops[start:]
+        ops.append({'op': 'replace', 'path': path, 'value': materialize(new)})
+
+
+def _diff(old, new, path, ops):
+    if old is new:
+        return
+    old, new = _unwrap(old), _unwrap(new)
+    if old is new:
+        # Nodes sharing a grammar, see ``GrammarClass.shared``
+        return
+    if isinstance(old, dict) and isinstance(new, dict):
+        old_keys = dict((_json_key(k), k) for k in old)
+        new_keys = dict((_json_key(k), k) for k in new)
+        for key in sorted(old_keys):
+            if key not in new_keys:
+                ops.append({'op': 'remove', 'path': _pointer(path, key)})
+        for key in sorted(new_keys):
+            value = new[new_keys[key]]
+            if key in old_keys:
+                _diff(old[old_keys[key]], value, _pointer(path, key), ops)
+            else:
+                ops.append({'op': 'add', 'path': _pointer(path, key),
+                            'value': materialize(value)})
+    elif isinstance(old, (list, tuple)) and isinstance(new, (list, tuple)):
+        if type(old) is list and type(new) is list and old == new and \
+                _same_json(old, new):
+            return
+        _diff_list(old, new, path, ops)
+    elif isinstance(old, (dict, list, tuple)) or \
+            isinstance(new, (dict, list, tuple)) or \
+            not _same_json(materialize(old), materialize(new)):
+        ops.append({'op': 'replace', 'path': path,
+                    'value': materialize(new)})
+
+
+def diff(old, new):
+    """JSON Patch (RFC 6902) that turns the JSON of ``old`` into ``new``
+
+    Grammar objects are compared through their ``grammar``. Elements of
+    ``KeyedList``s, such as ``data`` and ``scales``, are matched by their
+    key rather than their position, so adding, removing or reordering
+    data sets or scales yields ``add``, ``remove`` and ``move``
+    operations. Other lists are compared position by position, or
+    replaced whole when that is shorter.
+
+    Parameters
+    ----------
+    old, new : GrammarClass, GrammarDict or JSON-serializable object
+        Trees to compare.
+
+    Returns
+    -------
+    list of dicts
+        Patch operations, to be applied in order.
+    """
+    ops = []
+    _diff(old, new, '', ops)
+    return ops
+
+
+def _resolve(doc, pointer):
+    """Return the container and key that ``pointer`` refers to"""
+    if not pointer.startswith('/'):
+        raise ValueError('invalid JSON pointer: {0}'.format(pointer))
+    parts = [p.replace('~1', '/').replace('~0', '~')
+             for p in pointer[1:].split('/')]
+    for part in parts[:-1]:
+        doc = doc[int(part) if isinstance(doc, list) else part]
+    key = parts[-1]
+    if isinstance(doc, list) and key != '-':
+        key = int(key)
+    return doc, key
+
+
+def apply_patch(doc, patch):
+    """Apply a JSON Patch to a plain JSON document
+
+    Parameters
+    ----------
+    doc : JSON-serializable object
+        Document to patch, such as the result of ``vis.grammar()``. It is
+        not modified.
+    patch : list of dicts
+        Patch operations, as returned by :func:`diff`.
+
+    Returns
+    -------
+    Patched copy of ``doc``.
+    """
+    doc = copy.deepcopy(doc)
+    for op in patch:
+        name, pointer = op['op'], op['path']
+        if name not in ('add', 'remove', 'replace', 'move', 'copy', 'test'):
+            raise ValueError('unknown operation: {0}'.format(name))
+        if name in ('move', 'copy'):
+            source, key = _resolve(doc, op['from'])
+            value = source[key]
+            if name == 'move':
+                del source[key]
+            else:
+                value = copy.deepcopy(value)
+        elif name in ('add', 'replace', 'test'):
+            value = copy.deepcopy(op['value'])
+        if pointer == '':
+            if name == 'test':
+                if doc != value:
+                    raise ValueError('test failed at ""')
+            elif name == 'remove':
+                doc = None
+            else:
+                doc = value
+            continue
+        target, key = _resolve(doc, pointer)
+        if name == 'remove':
+            del target[key]
+        elif name == 'test':
+            if target[key] != value:
+                raise ValueError('test failed at {0}'.format(pointer))
+        elif name == 'replace':
+            if isinstance(target, dict) and key not in target:
+                raise KeyError(pointer)
+            target[key] = value
+        elif isinstance(target, list):
+            if key == '-':
+                target.append(value)
+            else:
+                target.insert(key, value)
+        else:
+            target[key] = value
+    return doc
@@ -21,6 +21,8 @@ class PropertySet(GrammarClass):
     validation of the values is only performed on the ``value`` field of the
     class, which is ignored by Vega if the ``field`` property is set.
     """
+    __slots__ = ()
+
     @grammar(ValueRef)
     def x(value):
         """ValueRef : number, left-most x-coordinate
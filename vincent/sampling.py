@@ -0,0 +1,181 @@
+# -*- coding: utf-8 -*-
+"""
+
+Sampling: Downsampling of long series before they are sent to the browser
+
+"""
+from __future__ import (print_function, division)
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+def _x_values(index):
+    """Positions of the index values along the x axis, as floats
+
+    Datetimes are measured in nanoseconds. Indexes that are not numeric, or
+    not sorted, are spaced evenly.
+    """
+    values = getattr(index, 'asi8', None)
+    if values is None:
+        values = np.asarray(index)
+    x = None
+    if values.dtype.kind in 'iuf':
+        x = values.astype(float)
+    elif values.dtype.kind in 'mM':
+        x = values.view('int64').astype(float)
+    if x is None or len(x) < 2 or not np.all(np.diff(x) >= 0):
+        x = np.arange(len(values), dtype=float)
+    return x
+
+
+def _y_values(values):
+    """Values of a series as floats, with NaN for missing values, or None
+    if the series is not numeric"""
+    values = np.asarray(values)
+    if values.dtype.kind in 'biuf':
+        return values.astype(float)
+    elif values.dtype.kind in 'mM':
+        y = values.view('int64').astype(float)
+        y[np.isnat(values)] = np.nan
+        return y
+    return None
+
+
+def _edges(n, n_buckets):
+    """Bucket boundaries splitting the points between the first and the
+    last into ``n_buckets`` ranges"""
+    return np.linspace(1, n - 1, n_buckets + 1).astype(int)
+
+
+def lttb(x, y, n_out):
+    """Largest-Triangle-Three-Buckets downsampling of one series
+
+    Keeps the first and last points, and from each of ``n_out - 2`` buckets
+    in between the point forming the largest triangle with the point kept
+    from the previous bucket and the mean of the next bucket. NaN values
+    are only kept from buckets that hold nothing else.
+
+    Parameters
+    ----------
+    x, y : array-like of floats
+        Point coordinates. ``x`` must be sorted.
+    n_out : int
+        Number of points to keep.
+
+    Returns
+    -------
+    Sorted array of the positions of the kept points.
+    """
+    x, y = np.asarray(x, dtype=float), np.asarray(y, dtype=float)
+    n = len(y)
+    if n_out >= n:
+        return np.arange(n)
+    if n_out < 3:
+        return np.array([0, n - 1][:max(n_out, 0)], dtype=int)
+
+    edges = _edges(n, n_out - 2)
+    starts, counts = edges[:-1], np.diff(edges)
+    valid = ~np.isnan(y)
+    filled = np.where(valid, y, 0.0)
+    # Means of every bucket, with the last point as the final "bucket"
+    mean_x = np.append(np.add.reduceat(x[:-1], starts) / counts, x[-1])
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean_y = np.append(np.add.reduceat(filled[:-1], starts) /
+                           np.add.reduceat(valid[:-1].astype(int), starts),
+                           y[-1])
+
+    kept = np.empty(n_out, dtype=int)
+    kept[0], kept[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        start, stop = edges[i], edges[i + 1]
+        next_x, next_y = mean_x[i + 1], mean_y[i + 1]
+        area = np.abs((x[a] - next_x) * (y[start:stop] - y[a]) -
+                      (x[a] - x[start:stop]) * (next_y - y[a]))
+        area[np.isnan(area)] = -1
+        a = start + int(np.argmax(area))
+        kept[i + 1] = a
+    return kept
+
+
+def min_max(y, n_out):
+    """Min/max decimation of one series
+
+    Keeps the first and last points, and the smallest and largest value of
+    each of ``(n_out - 2) // 2`` buckets in between, so that peaks are never
+    lost.
+
+    Parameters
+    ----------
+    y : array-like of floats
+        Values of the series.
+    n_out : int
+        Maximum number of points to keep.
+
+    Returns
+    -------
+    Sorted array of the positions of the kept points.
+    """
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    if n_out >= n:
+        return np.arange(n)
+    n_buckets = (n_out - 2) // 2
+    if n_buckets < 1:
+        return np.array([0, n - 1][:max(n_out, 0)], dtype=int)
+
+    # Equal buckets as rows of a padded 2-D array
+    inner = y[1:-1]
+    size = -(-len(inner) // n_buckets)
+    padded = np.full(n_buckets * size, np.nan)
+    padded[:len(inner)] = inner
+    padded = padded.reshape(n_buckets, size)
+    offsets = np.arange(n_buckets) * size
+    low = np.where(np.isnan(padded), np.inf, padded).argmin(axis=1)
+    high = np.where(np.isnan(padded), -np.inf, padded).argmax(axis=1)
+    kept = np.concatenate([offsets + low, offsets + high]) + 1
+    kept = kept[kept < n - 1]
+    return np.unique(np.concatenate([[0, n - 1], kept]))
+
+
+def downsample(index, columns, max_points, method='lttb'):
+    """Positions of the rows to keep so that every series has at most
+    ``max_points`` points
+
+    Each column is decimated on its own, and the union of the rows kept
+    for any column is returned, so that rows stay aligned. Columns that are
+    not numeric are ignored; if none is numeric, rows are kept at even
+    intervals.
+
+    Parameters
+    ----------
+    index : array-like or pandas Index
+        x values shared by the columns. Datetimes are supported; indexes
+        that are not numeric or not sorted are treated as evenly spaced.
+    columns : list of array-likes
+        y values of each series.
+    max_points : int
+        Maximum number of points kept per series.
+    method : string, default 'lttb'
+        ``'lttb'`` (Largest-Triangle-Three-Buckets) or ``'minmax'``.
+
+    Returns
+    -------
+    Sorted array of row positions.
+    """
+    if method not in ('lttb', 'minmax'):
+        raise ValueError("method must be 'lttb' or 'minmax'")
+    n = len(index)
+    columns = [y for y in map(_y_values, columns) if y is not None]
+    if not columns:
+        return np.unique(np.linspace(0, n - 1, min(max_points, n))
+                         .astype(int))
+    if method == 'lttb':
+        x = _x_values(index)
+        kept = [lttb(x, y, max_points) for y in columns]
+    else:
+        kept = [min_max(y, max_points) for y in columns]
+    return np.unique(np.concatenate(kept))
@@ -14,6 +14,8 @@ class DataRef(GrammarClass):
     Data can be referenced in multiple ways, and sometimes it makes sense to
     reference multiple data fields at once.
     """
+    __slots__ = ()
+
     @grammar(str_types)
     def data(value):
         """string : Name of data-set containing the domain values"""
@@ -34,6 +36,8 @@ class Scale(GrammarClass):
     as numbers, time stamps, etc.) to a visual space (length of a line,
     height of a bar, etc.), for both independent and dependent variables.
     """
+    __slots__ = ()
+
     @grammar(str_types)
     def name(value):
         """string : Unique name for the scale
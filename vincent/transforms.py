@@ -23,6 +23,7 @@ class Transform(GrammarClass):
     Each transform then has a set of transform-specific parameters."
 
     """
+    __slots__ = ()
 
     @grammar(str_types)
     def type(value):
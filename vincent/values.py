@@ -21,6 +21,8 @@ class ValueRef(GrammarClass):
     ValueRefs can reference numbers, strings, or arbitrary objects,
     depending on their use.
     """
+    __slots__ = ()
+
     @grammar(str_types + (int, float))
     def value(value):
         """int, float, or string : used for constant values
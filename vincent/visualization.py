@@ -5,9 +5,11 @@ Visualization: Top level class for Vega Grammar
 
 """
 from __future__ import (print_function, division)
+import copy
 from uuid import uuid4
+from . import engine
 from .core import (_assert_is_type, ValidationError,
-                   KeyedList, grammar, GrammarClass)
+                   KeyedList, grammar, GrammarClass, GrammarDict)
 from .data import Data
 from .scales import Scale
 from .marks import Mark
@@ -29,6 +31,9 @@ class Visualization(GrammarClass):
     ``axes``, ``marks``, and ``scales`` attributes. See the docs for each
     attribute for details.
     """
+    _element_types = {'data': Data, 'scales': Scale, 'axes': Axis,
+                      'marks': Mark, 'legends': Legend}
+
     def __init__(self, *args, **kwargs):
         """Initialize a Visualization
 
@@ -347,6 +352,26 @@ class Visualization(GrammarClass):
             self.scales['color'].range = range_
         return self
 
+    def evaluate_transforms(self, names=None):
+        """Compute data transforms in Python instead of in the browser
+
+        Data sets whose transforms are all supported by
+        :mod:`vincent.engine` are replaced with their computed ``values``
+        when the spec renders the same; the others are left for Vega. See
+        :func:`vincent.engine.evaluate_transforms`.
+
+        Parameters
+        ----------
+        names : list of strings, default None
+            Data sets to evaluate. If None, all of them are.
+
+        Returns
+        -------
+        list of strings
+            Names of the data sets that were replaced.
+        """
+        return engine.evaluate_transforms(self, names=names)
+
     def validate(self, require_all=True, scale='colors'):
         """Validate the visualization contents.
 
@@ -361,7 +386,7 @@ class Visualization(GrammarClass):
         If the contents of the visualization are not valid Vega, then a
         :class:`ValidationError` is raised.
         """
-        super(self.__class__, self).validate()
+        super(Visualization, self).validate()
         required_attribs = ('data', 'scales', 'axes', 'marks')
         for elem in required_attribs:
             attr = getattr(self, elem)
@@ -369,13 +394,58 @@ class Visualization(GrammarClass):
                 # Validate each element of the sets of data, etc
                 for entry in attr:
                     entry.validate()
-                names = [a.name for a in attr]
+                # Axes have no names
+                names = [a.name for a in attr if hasattr(a, 'name')]
                 if len(names) != len(set(names)):
                     raise ValidationError(elem + ' has duplicate names')
             elif require_all:
                 raise ValidationError(
                     elem + ' must be defined for valid visualization')
 
+    def to_json(self, path=None, html_out=False,
+                html_path='vega_template.html', validate=False,
+                pretty_print=True, backend=None, cache=False,
+                data_path=None, data_url=None):
+        """Convert the visualization to JSON
+
+        Takes the arguments of :func:`GrammarClass.to_json`, and:
+
+        Parameters
+        ----------
+        data_path : string, default None
+            If not None, the ``values`` of every ``Data`` entry are written
+            to files in this directory named by the hash of their contents,
+            and the JSON references them with ``url``. The visualization
+            itself is not modified. See :func:`Data.externalize`.
+        data_url : string, default None
+            URL prefix of the data files, if it differs from ``data_path``.
+
+        Notes
+        -----
+        With ``cache=True``, the JSON of large data is reused for as long as
+        the same list, with the same length, is stored under the same key.
+        Changes made in place that keep the length, such as
+        ``vis.data[0].values[0]['val'] = 1``, are NOT detected: the old
+        JSON is returned. Assign a new list instead, or call
+        ``vis.data[0].grammar.invalidate('values')`` after such a change.
+        The default, ``cache=False``, always encodes the current data.
+        """
+        vis = self
+        if data_path is not None:
+            vis = self._with_data([d.externalize(data_path, data_url)
+                                   for d in self.data])
+        return super(Visualization, vis).to_json(
+            path=path, html_out=html_out, html_path=html_path,
+            validate=validate, pretty_print=pretty_print, backend=backend,
+            cache=cache)
+
+    def _with_data(self, data):
+        """Copy of this visualization with the ``data`` list replaced"""
+        vis = copy.copy(self)
+        vis.grammar = GrammarDict(self.grammar)
+        vis.data = KeyedList(getattr(self.data, 'attr_name', 'name'), data)
+        return vis
+
     def _repr_html_(self):
         """Build the HTML representation for IPython."""
         vis_id = str(uuid4()).replace("-", "")